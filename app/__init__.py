@@ -1 +1,9 @@
-from app.app import create_app
+import time
+
+_start = time.perf_counter()
+
+from app.app import create_app  # noqa: E402
+from app.utils.metrics import STARTUP_SECONDS  # noqa: E402
+
+# Chi phí import package app, theo dõi cùng các giai đoạn khởi động khác
+STARTUP_SECONDS.set(time.perf_counter() - _start, phase="import")
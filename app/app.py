@@ -2,8 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.lifespan import lifespan
-from app.middleware import EnforceJSONMiddleware
-from app.router import regression_router, history_router
+from app.middleware import (
+    EnforceContentTypeMiddleware,
+    ProfilingMiddleware,
+    ServerTimingMiddleware,
+)
+from app.router import regression_router, history_router, metrics_router
 from app.utils.panic import Panic
 
 
@@ -26,13 +30,21 @@ def create_app():
     )
 
     # Middleware kiểm tra Content-Type
-    app.add_middleware(EnforceJSONMiddleware)
+    app.add_middleware(EnforceContentTypeMiddleware)
+
+    # Profile request theo yêu cầu / lấy mẫu (X-Profile-Id)
+    app.add_middleware(ProfilingMiddleware)
+
+    # Đo thời gian các giai đoạn (Server-Timing, /metrics); thêm sau cùng
+    # để bao ngoài mọi middleware khác
+    app.add_middleware(ServerTimingMiddleware)
 
     @app.get("/")
     async def root():
         return {"message": "Chào mừng đến với API của chúng tôi!"}
 
     app.include_router(history_router)
+    app.include_router(metrics_router)
     app.include_router(regression_router)
 
     return app
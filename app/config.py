@@ -0,0 +1,212 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _get_int(name: str, default: int | None) -> int | None:
+    """
+    Đọc biến môi trường kiểu số nguyên
+
+    Param:
+    - name: Tên biến môi trường
+    - default: Giá trị mặc định nếu biến không tồn tại
+
+    Raises:
+    - ValueError: Nếu giá trị không phải số nguyên
+    """
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def _get_float(name: str, default: float) -> float:
+    """
+    Đọc biến môi trường kiểu số thực
+
+    Raises:
+    - ValueError: Nếu giá trị không phải số
+    """
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+# --------------------------------
+# Execution engine (process pool)
+# --------------------------------
+# Số tiến trình worker huấn luyện mô hình (0 = chạy trong thread, không dùng pool)
+WORKER_POOL_SIZE = _get_int("WORKER_POOL_SIZE", 2)
+
+# Số task trung bình mỗi worker xử lý trước khi pool được thay bằng worker mới
+# (0 = không giới hạn)
+WORKER_MAX_TASKS = _get_int("WORKER_MAX_TASKS", 50)
+
+# Warm-up worker trong nền sau khi server đã nhận request (0 = tắt, worker được
+# tạo khi có request đầu tiên)
+WORKER_WARMUP = _get_int("WORKER_WARMUP", 1)
+
+# Các mô hình được import và fit thử trên dữ liệu nhỏ khi warm-up mỗi worker
+# (rỗng = chỉ import các hàm huấn luyện)
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "linear,ridge,elastic,decision_tree,knn,svr")
+
+# Chu kỳ (giây) kiểm tra client của request huấn luyện đồng bộ đã ngắt kết nối
+# hay chưa; ngắt kết nối thì huỷ huấn luyện trong worker
+DISCONNECT_POLL_SECONDS = _get_float("DISCONNECT_POLL_SECONDS", 0.5)
+
+# --------------------------------
+# Machine learning
+# --------------------------------
+# Số tiến trình dùng để huấn luyện song song các mô hình ứng viên trong best-model
+# (-1 = tất cả CPU, 1 = tuần tự); trong worker của pool bị giới hạn ở
+# số CPU / WORKER_POOL_SIZE (app.utils.executor.worker_n_jobs)
+BEST_MODEL_N_JOBS = _get_int("BEST_MODEL_N_JOBS", -1)
+
+# Dưới ngưỡng số dòng này, các ứng viên được huấn luyện tuần tự
+# (chi phí gửi dữ liệu sang tiến trình khác lớn hơn thời gian fit)
+BEST_MODEL_PARALLEL_MIN_SAMPLES = _get_int("BEST_MODEL_PARALLEL_MIN_SAMPLES", 1000)
+
+# n_jobs bên trong mỗi GridSearchCV / RandomizedSearchCV
+SEARCH_N_JOBS = _get_int("SEARCH_N_JOBS", 1)
+
+# --------------------------------
+# Job API
+# --------------------------------
+# Backend lưu trạng thái job: "memory" hoặc "sqlite"
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+
+# Đường dẫn file SQLite khi JOB_STORE = "sqlite"
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+
+# Số job được chạy đồng thời
+JOB_WORKERS = _get_int("JOB_WORKERS", 2)
+
+# Số job tối đa được phép chờ trong hàng đợi
+JOB_QUEUE_SIZE = _get_int("JOB_QUEUE_SIZE", 100)
+
+# Thời gian (giây) giữ lại job đã kết thúc trước khi bị xoá
+JOB_TTL_SECONDS = _get_int("JOB_TTL_SECONDS", 3600)
+
+# --------------------------------
+# Admission control
+# --------------------------------
+# Tổng số giây CPU ước lượng của các lượt huấn luyện được chạy cùng lúc
+# (0 = tắt admission control)
+ADMISSION_CPU_SECONDS = _get_float("ADMISSION_CPU_SECONDS", 120.0)
+
+# Tổng bộ nhớ (byte) ước lượng của các lượt huấn luyện được chạy cùng lúc
+ADMISSION_MEMORY_BYTES = _get_int("ADMISSION_MEMORY_BYTES", 2 * 1024**3)
+
+# Số lượt huấn luyện tối đa được chờ khi vượt ngân sách (vượt quá → 503)
+ADMISSION_QUEUE_SIZE = _get_int("ADMISSION_QUEUE_SIZE", 32)
+
+# --------------------------------
+# Model registry
+# --------------------------------
+# Thư mục lưu các mô hình đã huấn luyện (rỗng = tắt registry)
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "model_registry")
+
+# Số mô hình tối đa được lưu trên đĩa (LRU)
+MODEL_REGISTRY_MAX_ENTRIES = _get_int("MODEL_REGISTRY_MAX_ENTRIES", 200)
+
+# Tổng dung lượng tối đa (byte) của registry trên đĩa
+MODEL_REGISTRY_MAX_BYTES = _get_int("MODEL_REGISTRY_MAX_BYTES", 1024**3)
+
+# Số mô hình giữ sẵn trong bộ nhớ của mỗi tiến trình
+MODEL_REGISTRY_CACHE_SIZE = _get_int("MODEL_REGISTRY_CACHE_SIZE", 16)
+
+# --------------------------------
+# Result cache
+# --------------------------------
+# Seed mặc định cho việc chia dữ liệu khi request không gửi random_state
+# (rỗng = ngẫu nhiên, khi đó kết quả không được cache)
+SPLIT_RANDOM_STATE = _get_int("SPLIT_RANDOM_STATE", None)
+
+# Số kết quả tối đa giữ trong bộ nhớ (0 = tắt cache)
+RESULT_CACHE_SIZE = _get_int("RESULT_CACHE_SIZE", 256)
+
+# Thời gian sống (giây) của một kết quả trong cache
+RESULT_CACHE_TTL_SECONDS = _get_int("RESULT_CACHE_TTL_SECONDS", 3600)
+
+# Thư mục cache trên đĩa (rỗng = chỉ cache trong bộ nhớ)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+
+# --------------------------------
+# History retention
+# --------------------------------
+# Số bản ghi lịch sử tối đa giữ lại cho mỗi collection (0 = không giới hạn)
+HISTORY_LIMIT_SIMPLE_MODEL = _get_int("HISTORY_LIMIT_SIMPLE_MODEL", 100)
+HISTORY_LIMIT_BEST_MODEL = _get_int("HISTORY_LIMIT_BEST_MODEL", 100)
+HISTORY_LIMIT_STACK_MODEL = _get_int("HISTORY_LIMIT_STACK_MODEL", 100)
+
+# Chu kỳ (giây) chạy tiến trình nền xoá bản ghi vượt giới hạn
+HISTORY_TRIM_INTERVAL_SECONDS = _get_int("HISTORY_TRIM_INTERVAL_SECONDS", 30)
+
+# Thời gian sống (giây) của một bản ghi lịch sử qua TTL index (0 = tắt)
+HISTORY_TTL_SECONDS = _get_int("HISTORY_TTL_SECONDS", 0)
+
+# --------------------------------
+# Best-model racing (successive halving)
+# --------------------------------
+# Số dòng tối thiểu của mẫu con ở vòng đầu tiên
+RACE_MIN_SAMPLES = _get_int("RACE_MIN_SAMPLES", 500)
+
+# Số ứng viên còn lại để huấn luyện trên toàn bộ dữ liệu
+RACE_SURVIVORS = _get_int("RACE_SURVIVORS", 2)
+
+# --------------------------------
+# Profiling
+# --------------------------------
+# Cho phép profile theo yêu cầu (header X-Profile: 1 hoặc ?profile=1); 0 = tắt
+PROFILE_ENABLED = _get_int("PROFILE_ENABLED", 0)
+
+# Tỉ lệ (0..1) request huấn luyện được profile tự động, kể cả khi PROFILE_ENABLED = 0
+PROFILE_SAMPLE_RATE = _get_float("PROFILE_SAMPLE_RATE", 0.0)
+
+# Thư mục lưu kết quả profile (file .prof và bản tóm tắt .json)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Số profile tối đa được giữ trên đĩa (cũ nhất bị xoá trước)
+PROFILE_MAX_ENTRIES = _get_int("PROFILE_MAX_ENTRIES", 100)
+
+# Số hàm tốn thời gian nhất được ghi trong bản tóm tắt
+PROFILE_TOP_N = _get_int("PROFILE_TOP_N", 25)
+
+# --------------------------------
+# Streaming (dữ liệu lớn hơn bộ nhớ)
+# --------------------------------
+# Thư mục lưu tạm body CSV và bản nhị phân của nó (rỗng = thư mục tạm của hệ thống)
+STREAM_DIR = os.getenv("STREAM_DIR", "")
+
+# Dung lượng tối đa (byte) của body CSV (0 = không giới hạn)
+STREAM_MAX_BYTES = _get_int("STREAM_MAX_BYTES", 10 * 1024**3)
+
+# Số dòng mỗi khối được đọc vào bộ nhớ (quyết định bộ nhớ tối đa của một request)
+STREAM_CHUNK_ROWS = _get_int("STREAM_CHUNK_ROWS", 10000)
+
+# Số lượt duyệt tập train khi học dần (sgd, passive_aggressive)
+STREAM_EPOCHS = _get_int("STREAM_EPOCHS", 5)
+
+# --------------------------------
+# Dataset session (thêm dòng, cập nhật mô hình)
+# --------------------------------
+# Thư mục lưu trạng thái và dữ liệu của các phiên
+SESSION_DIR = os.getenv("SESSION_DIR", "sessions")
+
+# Số phiên tối đa được giữ trên đĩa (phiên ít dùng nhất bị xoá trước)
+SESSION_MAX_ENTRIES = _get_int("SESSION_MAX_ENTRIES", 100)
+
+# --------------------------------
+# Dataset store (upload X, Y một lần, dùng lại bằng dataset_id)
+# --------------------------------
+# Thư mục lưu các dataset (file .npy đọc qua memory map)
+DATASET_DIR = os.getenv("DATASET_DIR", "datasets")
+
+# Tổng dung lượng tối đa (byte) của các dataset trên đĩa
+DATASET_MAX_BYTES = _get_int("DATASET_MAX_BYTES", 5 * 1024**3)
+
+# Số dataset tối đa được giữ trên đĩa (ít dùng nhất bị xoá trước)
+DATASET_MAX_ENTRIES = _get_int("DATASET_MAX_ENTRIES", 100)
@@ -5,3 +5,4 @@ from app.database.database import (
     get_simple_model_collection,
     get_stack_model_collection,
 )
+from app.database.retention import start_retention, stop_retention
@@ -3,22 +3,28 @@ import os
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from app.database.memory import MEMORY_URL_PREFIX, MemoryClient
+
 load_dotenv()
 URL = os.getenv("URL")
 
-_client: AsyncIOMotorClient | None = None
+_client: AsyncIOMotorClient | MemoryClient | None = None
 
 
 async def connect_to_database():
     # Phần kết nối với database
     global _client
-    _client = AsyncIOMotorClient(URL)
+    # URL memory:// dùng database trong bộ nhớ (chạy thử, load test không cần MongoDB)
+    if URL and URL.startswith(MEMORY_URL_PREFIX):
+        _client = MemoryClient()
+        print("✅ Đang dùng database trong bộ nhớ (memory://)")
+        return
+
+    # tz_aware: time đọc ra là datetime UTC có múi giờ, giống lúc ghi (save_result)
+    _client = AsyncIOMotorClient(URL, tz_aware=True)
     print("✅ Đã kết nối MongoDB (async)")
 
-    # Phần indexing
-    await _client["regression"]["simple_model"].create_index("time")
-    await _client["regression"]["best_model"].create_index("time")
-    await _client["regression"]["stack_model"].create_index("time")
+    # Phần indexing: index time được tạo trong start_retention (kèm TTL nếu có)
 
 
 async def disconnect_to_database():
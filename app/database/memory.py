@@ -0,0 +1,184 @@
+import asyncio
+import copy
+import operator
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+# Tiền tố URL để dùng database trong bộ nhớ thay cho MongoDB (vd: memory://)
+MEMORY_URL_PREFIX = "memory://"
+
+_OPERATORS = {
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$ne": operator.ne,
+    "$eq": operator.eq,
+}
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    """
+    Kiểm tra doc có thoả query (tập con cú pháp lọc của MongoDB) hay không
+
+    Note:
+    - Hỗ trợ so sánh bằng, $lt, $lte, $gt, $gte, $ne, $eq, $in, $or, $and
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(_matches(doc, sub) for sub in condition):
+                return False
+        elif (
+            isinstance(condition, dict)
+            and condition
+            and all(op.startswith("$") for op in condition)
+        ):
+            if key not in doc:
+                return False
+            for op, value in condition.items():
+                if op == "$in":
+                    if doc[key] not in value:
+                        return False
+                elif not _OPERATORS[op](doc[key], value):
+                    return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+def _project(doc: dict, projection: dict | None) -> dict:
+    if not projection:
+        return copy.deepcopy(doc)
+
+    include = {key for key, value in projection.items() if value and key != "_id"}
+    if include:
+        keys = include | ({"_id"} if projection.get("_id", 1) else set())
+        return {key: copy.deepcopy(doc[key]) for key in keys if key in doc}
+
+    excluded = {key for key, value in projection.items() if not value}
+    return {key: copy.deepcopy(v) for key, v in doc.items() if key not in excluded}
+
+
+class MemoryCursor:
+    """
+    Cursor trong bộ nhớ với các thao tác find(...).sort().skip().limit().to_list()
+    """
+
+    def __init__(self, docs: list[dict], projection: dict | None):
+        self._docs = docs
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    async def to_list(self, length=None):
+        docs = self._docs
+        # Sắp xếp ổn định theo từng khóa, khóa cuối trước
+        for key, direction in reversed(self._sort):
+            docs = sorted(docs, key=operator.itemgetter(key), reverse=direction < 0)
+
+        end = None
+        for bound in (self._limit, length):
+            if bound:
+                end = bound if end is None else min(end, bound)
+        docs = docs[self._skip :][:end]
+        return [_project(doc, self._projection) for doc in docs]
+
+
+class MemoryCollection:
+    """
+    Collection trong bộ nhớ, cùng giao diện async với các collection Motor
+    mà app đang dùng (insert_one, find, delete_many, create_index)
+
+    Note:
+    - Chỉ dùng cho chạy thử / load test; dữ liệu mất khi tắt app
+    - Index (kể cả TTL) chỉ được ghi nhận (index_information), không có tác dụng
+    """
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self._docs: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._indexes: dict[str, dict] = {"_id_": {"key": [("_id", 1)]}}
+
+    async def insert_one(self, document: dict):
+        # Giống Motor: thêm _id vào chính document được truyền vào
+        document.setdefault("_id", ObjectId())
+        async with self._lock:
+            self._docs.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    def find(self, query: dict | None = None, projection: dict | None = None):
+        docs = [doc for doc in self._docs if _matches(doc, query or {})]
+        return MemoryCursor(docs, projection)
+
+    async def delete_many(self, query: dict):
+        async with self._lock:
+            kept = [doc for doc in self._docs if not _matches(doc, query)]
+            deleted = len(self._docs) - len(kept)
+            self._docs = kept
+        return SimpleNamespace(deleted_count=deleted, acknowledged=True)
+
+    async def count_documents(self, query: dict) -> int:
+        return sum(1 for doc in self._docs if _matches(doc, query))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        # Tên index giống MongoDB: "time_1", "time_-1__id_-1"
+        name = "_".join(f"{key}_{direction}" for key, direction in keys)
+        self._indexes.setdefault(name, {"key": keys, **kwargs})
+        return name
+
+    async def drop_index(self, name: str):
+        self._indexes.pop(name)
+
+    async def index_information(self) -> dict:
+        return copy.deepcopy(self._indexes)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    async def command(self, *args, **kwargs) -> dict:
+        return {"ok": 1}
+
+
+class MemoryClient:
+    """
+    Client thay thế AsyncIOMotorClient khi URL bắt đầu bằng memory://
+    """
+
+    def __init__(self):
+        self._databases: dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name)
+        return self._databases[name]
+
+    def close(self):
+        self._databases.clear()
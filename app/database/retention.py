@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from app import config
+from app.database.database import (
+    get_best_model_collection,
+    get_simple_model_collection,
+    get_stack_model_collection,
+)
+from app.utils.metrics import observe_stages
+
+# Tên index mặc định MongoDB đặt cho index tăng dần trên time
+TIME_INDEX = "time_1"
+
+
+def history_limits() -> dict:
+    """
+    Giới hạn số bản ghi của từng collection lịch sử (theo cấu hình)
+
+    Return:
+    - Dict {getter collection: số bản ghi tối đa}
+    """
+    return {
+        get_simple_model_collection: config.HISTORY_LIMIT_SIMPLE_MODEL,
+        get_best_model_collection: config.HISTORY_LIMIT_BEST_MODEL,
+        get_stack_model_collection: config.HISTORY_LIMIT_STACK_MODEL,
+    }
+
+
+async def ensure_time_index(collection):
+    """
+    Tạo index theo time; nếu HISTORY_TTL_SECONDS > 0 thì index này là TTL index
+
+    Note:
+    - TTL index đã có với thời gian sống khác thì sửa lại bằng collMod
+    - Chuyển giữa index thường và TTL index (kể cả đặt HISTORY_TTL_SECONDS về 0)
+      thì xoá index cũ rồi tạo lại: create_index với tuỳ chọn khác sẽ lỗi
+      IndexOptionsConflict, còn collMod không bỏ được expireAfterSeconds
+    - Thêm index (time, _id) cho phân trang bằng token after của /history
+    """
+    await collection.create_index([("time", -1), ("_id", -1)])
+
+    ttl = config.HISTORY_TTL_SECONDS
+    current = (await collection.index_information()).get(TIME_INDEX)
+    current_ttl = current.get("expireAfterSeconds") if current else None
+
+    if ttl > 0 and current_ttl is not None:
+        if current_ttl != ttl:
+            await collection.database.command(
+                "collMod",
+                collection.name,
+                index={"keyPattern": {"time": 1}, "expireAfterSeconds": ttl},
+            )
+        return
+
+    if current is not None and (ttl > 0) != (current_ttl is not None):
+        await collection.drop_index(TIME_INDEX)
+
+    if ttl > 0:
+        await collection.create_index("time", expireAfterSeconds=ttl)
+    else:
+        await collection.create_index("time")
+
+
+async def trim_collection(collection, limit: int) -> int:
+    """
+    Xoá các bản ghi cũ nhất để collection chỉ còn tối đa limit bản ghi
+
+    Param:
+    - collection: Collection lịch sử
+    - limit: Số bản ghi tối đa (0 = không giới hạn)
+
+    Return:
+    - Số bản ghi đã xoá
+
+    Note:
+    - Tìm mốc time của bản ghi mới thứ limit rồi xoá mọi bản ghi cũ hơn mốc đó
+      (dùng index time, không cần đếm cả collection)
+    """
+    if limit <= 0:
+        return 0
+
+    cursor = collection.find({}, {"time": 1}).sort("time", -1).skip(limit - 1)
+    boundary = await cursor.limit(1).to_list(length=1)
+    if not boundary:
+        return 0
+
+    result = await collection.delete_many({"time": {"$lt": boundary[0]["time"]}})
+    return result.deleted_count
+
+
+async def _trim_forever():
+    while True:
+        for get_collection, limit in history_limits().items():
+            try:
+                collection = get_collection()
+                start = time.perf_counter()
+                await trim_collection(collection, limit)
+                observe_stages(
+                    {"trim": time.perf_counter() - start}, endpoint=collection.name
+                )
+            except Exception as e:
+                print(f"Lỗi khi dọn lịch sử: {e}")
+        await asyncio.sleep(config.HISTORY_TRIM_INTERVAL_SECONDS)
+
+
+_task: asyncio.Task | None = None
+
+
+async def start_retention():
+    """
+    Tạo index time (kèm TTL nếu có) và khởi động tiến trình nền dọn lịch sử
+    """
+    global _task
+    for get_collection in history_limits():
+        await ensure_time_index(get_collection())
+
+    _task = asyncio.create_task(_trim_forever())
+    print("✅ Đã khởi động tiến trình dọn lịch sử")
+
+
+async def stop_retention():
+    global _task
+    if _task is not None:
+        task, _task = _task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        print("🛑 Đã dừng tiến trình dọn lịch sử")
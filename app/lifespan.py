@@ -1,10 +1,18 @@
-import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from app.database import connect_to_database, disconnect_to_database
+from app.database import (
+    connect_to_database,
+    disconnect_to_database,
+    start_retention,
+    stop_retention,
+)
+from app.utils.executor import start_executor, stop_executor
+from app.utils.jobs import start_job_runner, stop_job_runner
+from app.utils.metrics import STARTUP_SECONDS
 from app.utils.panic import Panic
+from app.utils.timing import record_stages, stage
 
 
 @asynccontextmanager
@@ -12,6 +20,10 @@ async def lifespan(app: FastAPI):
     """
     Quản lý vòng đời của ứng dụng FastAPI.
     Kết nối và ngắt kết nối database khi ứng dụng khởi động và tắt tương ứng.
+    Khởi động tiến trình nền dọn lịch sử (giới hạn số bản ghi, TTL).
+    Khởi tạo và tắt process pool huấn luyện mô hình và job runner.
+    Thời gian từng giai đoạn khởi động được ghi vào STARTUP_SECONDS (/metrics);
+    warm-up worker chạy trong nền sau khi server đã nhận request.
 
     Args:
         app (FastAPI): Ứng dụng FastAPI.
@@ -21,15 +33,27 @@ async def lifespan(app: FastAPI):
     """
 
     print("Bắt đầu khởi động...")
-    await asyncio.sleep(1)
-    print("Bắt đầu nạp database...")
-    await connect_to_database()
-    print("Khởi động hoàn tất!")
+    with record_stages() as startup:
+        with stage("database"):
+            print("Bắt đầu nạp database...")
+            await connect_to_database()
+            await start_retention()
+        with stage("executor"):
+            print("Bắt đầu khởi tạo worker huấn luyện...")
+            await start_executor()
+        with stage("job_runner"):
+            await start_job_runner()
+
+    for phase, seconds in startup.items():
+        STARTUP_SECONDS.set(seconds, phase=phase)
+    print(f"Khởi động hoàn tất! ({sum(startup.values()):.2f} s)")
 
     yield  # Đây là nơi app chạy
 
+    print("Tắt worker huấn luyện...")
+    await stop_job_runner()
+    await stop_executor()
     print("Đóng kết nối database...")
+    await stop_retention()
     await disconnect_to_database()
-    print("Bắt đầu tắt...")
-    await asyncio.sleep(1)
     print("Tắt hoàn tất")
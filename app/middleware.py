@@ -1,19 +1,118 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from fastapi import Response
 
+from app import config
+from app.utils.binary import DECODERS
+from app.utils.metrics import observe_stages
+from app.utils.profiling import Profile, profiling, should_profile
+from app.utils.timing import record_stages, server_timing
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, Response
+# Content-Type được chấp nhận cho request có body
+ALLOWED_CONTENT_TYPES = ("application/json", *DECODERS, "text/csv")
 
-class EnforceJSONMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+
+class EnforceContentTypeMiddleware:
+    """
+    Từ chối (415) request có body với Content-Type không được hỗ trợ
+
+    Note:
+    - Middleware ASGI thuần: BaseHTTPMiddleware bọc receive nên
+      request.is_disconnected() ở endpoint không bao giờ thấy client ngắt kết
+      nối (cancel_on_disconnect không huỷ được huấn luyện)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
         # Chỉ kiểm tra Content-Type nếu method có thể có body
-        if request.method in ("POST", "PUT", "PATCH"):
-            content_type = request.headers.get("Content-Type", "")
-            if "application/json" not in content_type:
-                return Response(
-                    content="❌ Content-Type must be application/json",
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT", "PATCH"):
+            content_type = Headers(scope=scope).get("Content-Type", "")
+            if not any(allowed in content_type for allowed in ALLOWED_CONTENT_TYPES):
+                response = Response(
+                    content="❌ Content-Type must be one of: "
+                    + ", ".join(ALLOWED_CONTENT_TYPES),
                     status_code=415,
-                    media_type="application/json"
+                    media_type="application/json",
                 )
-        return await call_next(request)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class ServerTimingMiddleware:
+    """
+    Đo thời gian các giai đoạn của mỗi request (app.utils.timing), trả về trong
+    header Server-Timing và ghi vào metrics nếu request đã gắn nhãn endpoint
+
+    Note:
+    - Middleware ASGI thuần (không dùng BaseHTTPMiddleware) để lần đo bao
+      trọn request và header được thêm ngay khi response bắt đầu
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with record_stages() as timings:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start" and timings:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(timings))
+                    headers.append("Timing-Allow-Origin", "*")
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        if "endpoint" in timings.labels:
+            observe_stages(timings, **timings.labels)
+
+
+# Giá trị bật cờ profile (header X-Profile hoặc query ?profile=)
+PROFILE_FLAG_VALUES = ("1", "true", "yes")
+
+
+def _profile_requested(scope) -> bool:
+    header = Headers(scope=scope).get("X-Profile", "")
+    query = QueryParams(scope.get("query_string", b"")).get("profile", "")
+    return header.lower() in PROFILE_FLAG_VALUES or query.lower() in PROFILE_FLAG_VALUES
+
+
+class ProfilingMiddleware:
+    """
+    Profile request theo yêu cầu (header X-Profile: 1 hoặc ?profile=1, cần
+    PROFILE_ENABLED) hoặc ngẫu nhiên theo PROFILE_SAMPLE_RATE
+
+    Note:
+    - Việc profile diễn ra trong worker huấn luyện (app.utils.profiling); nếu
+      request có huấn luyện, response có header X-Profile-Id để xem kết quả
+      qua GET /regression/profiles/{profile_id}
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = bool(config.PROFILE_ENABLED) and _profile_requested(scope)
+        if not should_profile(requested):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start" and profile.used:
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        with profiling(profile):
+            await self.app(scope, receive, send_with_profile)
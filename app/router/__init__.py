@@ -1,2 +1,3 @@
 from app.router.main import regression_router
 from app.router.history import router as history_router
+from app.router.metrics import router as metrics_router
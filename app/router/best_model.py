@@ -1,14 +1,22 @@
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, Query
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Query, Request, Response
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from app.database import get_best_model_collection
 from app.schemas import InputBestModelData, OutputBestModelData
 from app.utils.machine_learning import run_best_model
 from app.utils.panic import Panic
-from app.router.utils import normalize_doc
+from app.router.utils import (
+    arrival_time,
+    body_openapi,
+    cancel_on_disconnect,
+    data_kwargs,
+    effective_seed,
+    parse_body,
+    read_history,
+    run_training,
+    save_result,
+    submit_job,
+)
 
 router = APIRouter(prefix="/best-model")
 
@@ -23,62 +31,89 @@ def best_model_info():
     }
 
 
-@router.post("/", response_model=OutputBestModelData)
+@router.post(
+    "/",
+    response_model=OutputBestModelData,
+    openapi_extra=body_openapi(InputBestModelData),
+)
 async def best_model_post(
-    input_data: InputBestModelData,
+    request: Request,
+    arrival: float = Depends(arrival_time),
+    input_data: InputBestModelData = Depends(parse_body(InputBestModelData)),
+    job: bool = Query(False, description="Chạy ở chế độ job (trả job_id ngay)"),
     collection: AsyncIOMotorCollection = Depends(get_best_model_collection),
 ):
     """
     Tìm mô hình tốt nhất cho dữ liệu đầu vào
 
     Param:
-    - input_data: Dữ liệu đầu vào với X_array, Y_array và x0 (tùy chọn)
+    - request: Request (client ngắt kết nối → huỷ huấn luyện, trả 499)
+    - arrival: Thời điểm request tới, mốc của time_budget_ms
+    - input_data: Dữ liệu đầu vào với X_array, Y_array (hoặc dataset_id) và x0 (tùy chọn)
+    - job: Nếu true, trả về job_id ngay (202) và huấn luyện trong nền
     - collection: Bộ sưu tập MongoDB để lưu kết quả
 
     Return:
     - Kết quả với mô hình tốt nhất và các chỉ số liên quan
     """
-    result = run_best_model(
-        X=input_data.X_array, 
-        Y=input_data.Y_array, 
-        x0=input_data.x0
+    kwargs = dict(
+        **await data_kwargs(input_data),
+        x0=input_data.x0,
+        random_state=effective_seed(input_data.random_state),
+        race=input_data.race,
+        time_budget_ms=input_data.time_budget_ms,
     )
-
-    result["time"] = datetime.now()
-
-    await collection.insert_one(result)
-
-    total = await collection.count_documents({})
-
-    if total > 100:
-        excess = total - 100
-        old_records_cursor = collection.find().sort("time", 1).limit(excess)
-        old_records = await old_records_cursor.to_list(length=excess)
-        ids_to_delete = [doc["_id"] for doc in old_records]
-        await collection.delete_many({"_id": {"$in": ids_to_delete}})
+    # Kết quả có ngân sách thời gian phụ thuộc tốc độ máy lúc chạy: không cache
+    cache = input_data.time_budget_ms is None
+
+    if job:
+        return await submit_job(
+            "best_model",
+            run_best_model,
+            kwargs,
+            collection,
+            OutputBestModelData,
+            cache=cache,
+        )
+
+    async with cancel_on_disconnect(request) as cancel:
+        result = await run_training(
+            "best_model",
+            run_best_model,
+            kwargs,
+            cache=cache,
+            cancel=cancel,
+            arrival=arrival,
+        )
+    await save_result(collection, result)
 
     return OutputBestModelData(**result)
 
 
 @router.get("/history")
 async def best_model_history(
+    response: Response,
     limit: int = Query(20, gt=1, lt=100),
     skip: int = Query(0, ge=0),
+    after: str | None = Query(None, description="Token X-Next-After của trang trước"),
+    fields: str | None = Query(
+        None, description="Các trường cần lấy, vd: model,r2_test"
+    ),
     collection: AsyncIOMotorCollection = Depends(get_best_model_collection),
 ):
     """
     Lấy lịch sử các lần tìm mô hình tốt nhất
 
     Param:
+    - response: Response để gắn header X-Next-After
     - limit: Số lượng bản ghi trả về (mặc định 20, tối đa 100)
-    - skip: Số lượng bản ghi bỏ qua (mặc định 0)
+    - skip: Số lượng bản ghi bỏ qua (mặc định 0, bỏ qua khi có after)
+    - after: Token phân trang lấy từ header X-Next-After
+    - fields: Danh sách trường cần lấy (projection), phân tách bằng dấu phẩy
     - collection: Bộ sưu tập MongoDB để truy vấn
 
     Return:
     - Danh sách các bản ghi lịch sử
     """
 
-    cursor = collection.find().sort("time", -1).skip(skip).limit(limit)
-    raw_docs = await cursor.to_list(length=limit)
-    normalized_docs = [normalize_doc(doc) for doc in raw_docs]
-    return jsonable_encoder(normalized_docs)
+    return await read_history(collection, response, limit, skip, after, fields)
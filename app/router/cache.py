@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from app.utils.cache import result_cache
+
+router = APIRouter(prefix="/cache")
+
+
+@router.get("/stats")
+def cache_stats():
+    """
+    Thống kê cache kết quả huấn luyện (số lần hit/miss, kích thước)
+    """
+    return result_cache.stats()
@@ -0,0 +1,81 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.schemas import InputDatasetData, OutputDatasetData
+from app.utils.datasets import (
+    DatasetNotFound,
+    DatasetTooLarge,
+    delete_dataset,
+    read_dataset_meta,
+    save_dataset,
+)
+from app.router.utils import body_openapi, parse_body
+
+router = APIRouter(prefix="/datasets")
+
+
+@router.post(
+    "/",
+    status_code=201,
+    response_model=OutputDatasetData,
+    openapi_extra=body_openapi(InputDatasetData),
+)
+async def dataset_post(
+    response: Response,
+    input_data: InputDatasetData = Depends(parse_body(InputDatasetData)),
+) -> OutputDatasetData:
+    """
+    Lưu X, Y một lần trên server, các request sau chỉ cần gửi dataset_id
+
+    Param:
+    - response: Response để gắn header Location
+    - input_data: X_array, Y_array (JSON hoặc body nhị phân)
+
+    Return:
+    - dataset_id, kích thước và thống kê theo cột
+
+    Note:
+    - dataset_id theo nội dung: upload lại cùng dữ liệu trả về cùng dataset_id
+    """
+    try:
+        meta = await asyncio.to_thread(
+            save_dataset, input_data.X_array, input_data.Y_array
+        )
+    except DatasetTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    response.headers["Location"] = f"/regression/datasets/{meta['dataset_id']}"
+    return OutputDatasetData(**meta)
+
+
+@router.get("/{dataset_id}", response_model=OutputDatasetData)
+async def dataset_get(dataset_id: str) -> OutputDatasetData:
+    """
+    Thông tin và thống kê của dataset
+
+    Param:
+    - dataset_id: Mã dataset
+    """
+    try:
+        meta = await asyncio.to_thread(read_dataset_meta, dataset_id)
+    except DatasetNotFound:
+        raise HTTPException(status_code=404, detail="Không tồn tại dataset này")
+
+    return OutputDatasetData(**meta)
+
+
+@router.delete("/{dataset_id}", status_code=204)
+async def dataset_delete(dataset_id: str):
+    """
+    Xoá dataset
+
+    Param:
+    - dataset_id: Mã dataset
+    """
+    try:
+        await asyncio.to_thread(delete_dataset, dataset_id)
+    except DatasetNotFound:
+        raise HTTPException(status_code=404, detail="Không tồn tại dataset này")
+
+    return Response(status_code=204)
@@ -1,3 +1,5 @@
+from urllib.parse import urlencode
+
 from fastapi import APIRouter, HTTPException, status, Query
 from fastapi.responses import RedirectResponse
 from app.utils.panic import Panic
@@ -10,21 +12,28 @@ async def get_history(
     type: str,
     limit: int = Query(10, gt=1, lt=100),
     skip: int = Query(0, ge=0),
+    after: str | None = Query(None),
+    fields: str | None = Query(None),
 ):
+    params = {"limit": limit, "skip": skip, "after": after, "fields": fields}
+    query = urlencode(
+        {key: value for key, value in params.items() if value is not None}
+    )
+
     match type.lower():
         case "option":
             return RedirectResponse(
-                url=f"/regression/option/history?limit={limit}&skip={skip}",
+                url=f"/regression/option/history?{query}",
                 status_code=status.HTTP_302_FOUND,
             )
         case "best_model":
             return RedirectResponse(
-                url=f"/regression/best-model/history?limit={limit}&skip={skip}",
+                url=f"/regression/best-model/history?{query}",
                 status_code=status.HTTP_302_FOUND,
             )
         case "stacking_model":
             return RedirectResponse(
-                url=f"/regression/stack-model/history?limit={limit}&skip={skip}",
+                url=f"/regression/stack-model/history?{query}",
                 status_code=status.HTTP_302_FOUND,
             )
         case _:
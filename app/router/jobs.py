@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.schemas import JobStatus
+from app.utils.jobs import get_job_runner
+from app.utils.jobs.runner import JobRunner
+from app.utils.panic import Panic
+
+router = APIRouter(prefix="/jobs")
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def job_status(
+    job_id: str,
+    runner: JobRunner = Depends(get_job_runner),
+):
+    """
+    Lấy trạng thái, tiến độ và kết quả của một job
+
+    Param:
+    - job_id: Mã job nhận được khi gửi request với job=true
+
+    Return:
+    - Trạng thái job, kèm kết quả nếu job đã hoàn thành
+    """
+    job = await runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tồn tại job này")
+    return job
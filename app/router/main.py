@@ -1,11 +1,25 @@
 from fastapi import APIRouter
 
 from app.router.best_model import router as best_model_router
+from app.router.cache import router as cache_router
+from app.router.datasets import router as datasets_router
+from app.router.jobs import router as jobs_router
 from app.router.option import router as option_router
+from app.router.predict import router as predict_router
+from app.router.profiles import router as profiles_router
+from app.router.session import router as session_router
 from app.router.stack_model import router as stack_model_router
+from app.router.stream import router as stream_router
 
 regression_router = APIRouter(prefix="/regression")
 
 regression_router.include_router(option_router)
 regression_router.include_router(best_model_router)
 regression_router.include_router(stack_model_router)
+regression_router.include_router(jobs_router)
+regression_router.include_router(predict_router)
+regression_router.include_router(cache_router)
+regression_router.include_router(profiles_router)
+regression_router.include_router(stream_router)
+regression_router.include_router(session_router)
+regression_router.include_router(datasets_router)
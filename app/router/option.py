@@ -1,14 +1,21 @@
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, Query
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Query, Request, Response
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from app.database import get_simple_model_collection
 from app.schemas import InputOptionData, OutputOptionData
 from app.utils import run_option_model
 from app.utils.panic import Panic
-from app.router.utils import normalize_doc
+from app.router.utils import (
+    body_openapi,
+    cancel_on_disconnect,
+    data_kwargs,
+    effective_seed,
+    parse_body,
+    read_history,
+    run_training,
+    save_result,
+    submit_job,
+)
 
 router = APIRouter(prefix="/option")
 
@@ -21,63 +28,72 @@ def option_get():
     return {"message": "Đây là nơi bạn có thể tùy chọn mô hình với input tùy ý"}
 
 
-@router.post("/", response_model=OutputOptionData)
+@router.post(
+    "/",
+    response_model=OutputOptionData,
+    openapi_extra=body_openapi(InputOptionData),
+)
 async def option_post(
-    input_data: InputOptionData,
+    request: Request,
+    input_data: InputOptionData = Depends(parse_body(InputOptionData)),
+    job: bool = Query(False, description="Chạy ở chế độ job (trả job_id ngay)"),
     collection: AsyncIOMotorCollection = Depends(get_simple_model_collection),
 ) -> OutputOptionData:
     """
     Chạy mô hình tùy chọn từ dữ liệu và tên mô hình người dùng chỉ định
 
     Param:
-    - input_data: Dữ liệu đầu vào với X_array, Y_array, x0 (tùy chọn) và model
+    - request: Request (client ngắt kết nối → huỷ huấn luyện, trả 499)
+    - input_data: Dữ liệu đầu vào với X_array, Y_array (hoặc dataset_id), x0 (tùy chọn) và model
+    - job: Nếu true, trả về job_id ngay (202) và huấn luyện trong nền
     - collection: Bộ sưu tập MongoDB để lưu kết quả
 
     Return:
     - Kết quả với các chỉ số liên quan và dự đoán (nếu có)
     """
 
-    result = run_option_model(
-        X=input_data.X_array,
-        Y=input_data.Y_array,
+    kwargs = dict(
+        **await data_kwargs(input_data),
         model_name=input_data.model,
         x0=input_data.x0,
+        random_state=effective_seed(input_data.random_state),
     )
 
-    result["time"] = datetime.now()
-
-    await collection.insert_one(result)
-
-    total = await collection.count_documents({})
+    if job:
+        return await submit_job(
+            "option", run_option_model, kwargs, collection, OutputOptionData
+        )
 
-    if total > 100:
-        excess = total - 100
-        old_records_cursor = collection.find().sort("time", 1).limit(excess)
-        old_records = await old_records_cursor.to_list(length=excess)
-        ids_to_delete = [doc["_id"] for doc in old_records]
-        await collection.delete_many({"_id": {"$in": ids_to_delete}})
+    async with cancel_on_disconnect(request) as cancel:
+        result = await run_training("option", run_option_model, kwargs, cancel=cancel)
+    await save_result(collection, result)
 
     return OutputOptionData(**result)
 
 
 @router.get("/history")
 async def best_model_history(
+    response: Response,
     limit: int = Query(20, gt=1, lt=100),
     skip: int = Query(0, ge=0),
+    after: str | None = Query(None, description="Token X-Next-After của trang trước"),
+    fields: str | None = Query(
+        None, description="Các trường cần lấy, vd: model,r2_test"
+    ),
     collection: AsyncIOMotorCollection = Depends(get_simple_model_collection),
 ):
     """
     Lấy lịch sử các lần tùy chọn mô hình
 
     Param:
+    - response: Response để gắn header X-Next-After
     - limit: Số lượng bản ghi trả về (mặc định 20, tối đa 100)
-    - skip: Số lượng bản ghi bỏ qua (mặc định 0)
+    - skip: Số lượng bản ghi bỏ qua (mặc định 0, bỏ qua khi có after)
+    - after: Token phân trang lấy từ header X-Next-After
+    - fields: Danh sách trường cần lấy (projection), phân tách bằng dấu phẩy
     - collection: Bộ sưu tập MongoDB để truy vấn
 
     Return:
     - Danh sách các bản ghi lịch sử
     """
-    cursor = collection.find().sort("time", -1).skip(skip).limit(limit)
-    raw_docs = await cursor.to_list(length=limit)
-    normalized_docs = [normalize_doc(doc) for doc in raw_docs]
-    return jsonable_encoder(normalized_docs)
+    return await read_history(collection, response, limit, skip, after, fields)
@@ -0,0 +1,36 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas import InputPredictData, OutputPredictData
+from app.utils.machine_learning.model_index import to_float_round
+from app.utils.machine_learning.registry import predict_with_model
+from app.utils.panic import Panic
+
+router = APIRouter(prefix="/predict")
+
+
+@router.post("/{model_id}", response_model=OutputPredictData)
+async def predict_post(model_id: str, input_data: InputPredictData):
+    """
+    Dự đoán với mô hình đã huấn luyện trước đó (không huấn luyện lại)
+
+    Param:
+    - model_id: Mã mô hình trả về từ option, best-model hoặc stack-model
+    - input_data: Dữ liệu đầu vào với x0
+
+    Return:
+    - Kết quả dự đoán y0
+    """
+    try:
+        model_name, y0 = await asyncio.to_thread(
+            predict_with_model, model_id, input_data.x0
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=404, detail="Không tồn tại mô hình này (có thể đã bị xoá)"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return OutputPredictData(model_id=model_id, model=model_name, y0=to_float_round(y0))
@@ -0,0 +1,36 @@
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.utils.profiling import profile_path, read_profile
+
+router = APIRouter(prefix="/profiles")
+
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: str, format: Literal["json", "pstats"] = "json"):
+    """
+    Kết quả profile của một request (mã lấy từ header X-Profile-Id)
+
+    Param:
+    - profile_id: Mã profile
+    - format: "json" = các hàm sklearn / NumPy / app tốn thời gian nhất,
+      "pstats" = file .prof đầy đủ (mở bằng pstats, snakeviz)
+
+    Return:
+    - Bản tóm tắt hoặc file .prof
+    """
+    suffix = ".prof" if format == "pstats" else ".json"
+    path = profile_path(profile_id, suffix)
+    if path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Không tồn tại profile này (có thể chưa chạy xong hoặc đã bị xoá)",
+        )
+
+    if format == "pstats":
+        return FileResponse(
+            path, media_type="application/octet-stream", filename=profile_id + ".prof"
+        )
+    return read_profile(profile_id)
@@ -0,0 +1,153 @@
+import asyncio
+import weakref
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.database import get_simple_model_collection
+from app.schemas import InputAppendData, InputOptionData, OutputSessionData
+from app.utils.machine_learning import append_session_model, create_session_model
+from app.utils.machine_learning.session_store import (
+    delete_session,
+    read_session_result,
+)
+from app.router.utils import (
+    body_openapi,
+    data_kwargs,
+    effective_seed,
+    parse_body,
+    run_training,
+    save_result,
+)
+
+router = APIRouter(prefix="/sessions")
+
+# Các lần thêm dòng vào cùng một phiên trong process này xếp hàng ở đây, không
+# chiếm worker để chờ; giữa các process / instance, session_lock (fcntl.flock)
+# trong worker mới là khoá đảm bảo không ghi đè lên nhau
+_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    lock = _locks.get(session_id)
+    if lock is None:
+        lock = _locks[session_id] = asyncio.Lock()
+    return lock
+
+
+@router.post(
+    "/",
+    status_code=201,
+    response_model=OutputSessionData,
+    openapi_extra=body_openapi(InputOptionData),
+)
+async def session_post(
+    response: Response,
+    input_data: InputOptionData = Depends(parse_body(InputOptionData)),
+    collection: AsyncIOMotorCollection = Depends(get_simple_model_collection),
+) -> OutputSessionData:
+    """
+    Tạo phiên dữ liệu: huấn luyện như /regression/option/ và giữ lại dữ liệu
+    để thêm dòng sau này
+
+    Param:
+    - response: Response để gắn header Location
+    - input_data: Dữ liệu đầu vào với X_array, Y_array (hoặc dataset_id), x0 (tùy chọn) và model
+    - collection: Bộ sưu tập MongoDB để lưu kết quả (chung với option)
+
+    Return:
+    - Kết quả như option, kèm session_id
+    """
+    kwargs = dict(
+        **await data_kwargs(input_data),
+        x0=input_data.x0,
+        model_name=input_data.model,
+        random_state=effective_seed(input_data.random_state),
+    )
+
+    # Mỗi lần gọi tạo một phiên mới: không dùng kết quả đã cache
+    result = await run_training("session", create_session_model, kwargs, cache=False)
+    await save_result(collection, result)
+
+    response.headers["Location"] = f"/regression/sessions/{result['session_id']}"
+    return OutputSessionData(**result)
+
+
+@router.post(
+    "/{session_id}/append",
+    response_model=OutputSessionData,
+    openapi_extra=body_openapi(InputAppendData),
+)
+async def session_append(
+    session_id: str,
+    input_data: InputAppendData = Depends(parse_body(InputAppendData)),
+    collection: AsyncIOMotorCollection = Depends(get_simple_model_collection),
+) -> OutputSessionData:
+    """
+    Thêm dòng vào phiên và cập nhật mô hình
+
+    Param:
+    - session_id: Mã phiên
+    - input_data: Các dòng mới (X_array, Y_array) và x0 (tùy chọn)
+    - collection: Bộ sưu tập MongoDB để lưu kết quả
+
+    Return:
+    - Kết quả trên toàn bộ dữ liệu của phiên; update = "incremental" nếu mô
+      hình được giải từ thống kê đủ (linear, ridge, bayesian), "full" nếu
+      phải huấn luyện lại (cây, kernel, ...)
+    """
+    kwargs = dict(
+        session_id=session_id,
+        X=input_data.X_array,
+        Y=input_data.Y_array,
+        x0=input_data.x0,
+    )
+
+    try:
+        async with _session_lock(session_id):
+            result = await run_training(
+                "session", append_session_model, kwargs, cache=False
+            )
+    except KeyError:
+        raise HTTPException(
+            status_code=404, detail="Không tồn tại phiên này (có thể đã bị xoá)"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    await save_result(collection, result)
+
+    return OutputSessionData(**result)
+
+
+@router.get("/{session_id}", response_model=OutputSessionData)
+async def session_get(session_id: str) -> OutputSessionData:
+    """
+    Kết quả mới nhất của phiên
+
+    Param:
+    - session_id: Mã phiên
+    """
+    try:
+        result = await asyncio.to_thread(read_session_result, session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Không tồn tại phiên này")
+
+    return OutputSessionData(**result)
+
+
+@router.delete("/{session_id}", status_code=204)
+async def session_delete(session_id: str):
+    """
+    Xoá phiên cùng dữ liệu của nó
+
+    Param:
+    - session_id: Mã phiên
+    """
+    try:
+        async with _session_lock(session_id):
+            await asyncio.to_thread(delete_session, session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Không tồn tại phiên này")
+
+    return Response(status_code=204)
@@ -1,14 +1,21 @@
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, Query
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Query, Request, Response
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from app.database import get_stack_model_collection
 from app.schemas import InputStackModelData, OutputStackModelData
 from app.utils.machine_learning import run_stack_model
 from app.utils.panic import Panic
-from app.router.utils import normalize_doc
+from app.router.utils import (
+    body_openapi,
+    cancel_on_disconnect,
+    data_kwargs,
+    effective_seed,
+    parse_body,
+    read_history,
+    run_training,
+    save_result,
+    submit_job,
+)
 
 router = APIRouter(prefix="/stack-model")
 
@@ -21,9 +28,15 @@ def stack_model_get():
     return {"message": "Đây là nơi bạn có thể tùy chọn mô hình với input tùy ý"}
 
 
-@router.post("/", response_model=OutputStackModelData)
+@router.post(
+    "/",
+    response_model=OutputStackModelData,
+    openapi_extra=body_openapi(InputStackModelData),
+)
 async def stack_model_post(
-    input_data: InputStackModelData,
+    request: Request,
+    input_data: InputStackModelData = Depends(parse_body(InputStackModelData)),
+    job: bool = Query(False, description="Chạy ở chế độ job (trả job_id ngay)"),
     collection: AsyncIOMotorCollection = Depends(get_stack_model_collection),
 ) -> OutputStackModelData:
     """
@@ -33,53 +46,58 @@ async def stack_model_post(
     - Feature này chưa tối ưu cho việc dự đoán các giá trị nằm ngoài khoảng đã cho
 
     Param:
-    - input_data: Dữ liệu đầu vào với X_array, Y_array, x0 (tùy chọn) và danh sách mô hình
+    - request: Request (client ngắt kết nối → huỷ huấn luyện, trả 499)
+    - input_data: Dữ liệu đầu vào với X_array, Y_array (hoặc dataset_id), x0 (tùy chọn) và danh sách mô hình
+    - job: Nếu true, trả về job_id ngay (202) và huấn luyện trong nền
     - collection: Bộ sưu tập MongoDB để lưu kết quả
 
     Return:
     - Kết quả với các chỉ số liên quan và dự đoán (nếu có)
     """
 
-    result = run_stack_model(
-        X=input_data.X_array,
-        Y=input_data.Y_array,
+    kwargs = dict(
+        **await data_kwargs(input_data),
         x0=input_data.x0,
+        random_state=effective_seed(input_data.random_state),
     )
 
-    result["time"] = datetime.now()
-
-    await collection.insert_one(result)
-
-    total = await collection.count_documents({})
+    if job:
+        return await submit_job(
+            "stack_model", run_stack_model, kwargs, collection, OutputStackModelData
+        )
 
-    if total > 100:
-        excess = total - 100
-        old_records_cursor = collection.find().sort("time", 1).limit(excess)
-        old_records = await old_records_cursor.to_list(length=excess)
-        ids_to_delete = [doc["_id"] for doc in old_records]
-        await collection.delete_many({"_id": {"$in": ids_to_delete}})
+    async with cancel_on_disconnect(request) as cancel:
+        result = await run_training(
+            "stack_model", run_stack_model, kwargs, cancel=cancel
+        )
+    await save_result(collection, result)
 
     return OutputStackModelData(**result)
 
 
 @router.get("/history")
 async def best_model_history(
+    response: Response,
     limit: int = Query(10, gt=1, lt=100),
     skip: int = Query(0, ge=0),
+    after: str | None = Query(None, description="Token X-Next-After của trang trước"),
+    fields: str | None = Query(
+        None, description="Các trường cần lấy, vd: model,r2_test"
+    ),
     collection: AsyncIOMotorCollection = Depends(get_stack_model_collection),
 ):
     """
     Lấy lịch sử các lần tùy chọn mô hình Stacking Ensemble
 
     Param:
+    - response: Response để gắn header X-Next-After
     - limit: Số lượng bản ghi trả về (mặc định 20, tối đa 100)
-    - skip: Số lượng bản ghi bỏ qua (mặc định 0)
+    - skip: Số lượng bản ghi bỏ qua (mặc định 0, bỏ qua khi có after)
+    - after: Token phân trang lấy từ header X-Next-After
+    - fields: Danh sách trường cần lấy (projection), phân tách bằng dấu phẩy
     - collection: Bộ sưu tập MongoDB để truy vấn
 
     Return:
     - Danh sách các bản ghi lịch sử
     """
-    cursor = collection.find().sort("time", -1).skip(skip).limit(limit)
-    raw_docs = await cursor.to_list(length=limit)
-    normalized_docs = [normalize_doc(doc) for doc in raw_docs]
-    return jsonable_encoder(normalized_docs)
+    return await read_history(collection, response, limit, skip, after, fields)
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app import config
+from app.database import get_simple_model_collection
+from app.schemas import OutputOptionData
+from app.utils.machine_learning import run_stream_model
+from app.router.utils import effective_seed, run_training, save_result, submit_job
+
+router = APIRouter(prefix="/stream")
+
+# Body được gom tới kích thước này rồi mới ghi xuống đĩa (trong thread)
+_SPOOL_BUFFER_BYTES = 1024**2
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def parse_x0(x0: list[str] | None) -> list[list[float]] | None:
+    """
+    Chuyển tham số x0 (mỗi giá trị là một dòng "85,3") thành mảng 2D
+
+    Raises:
+    - HTTPException 422: Nếu có giá trị không phải số
+    """
+    if not x0:
+        return None
+
+    try:
+        return [[float(value) for value in row.split(",")] for row in x0]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="x0 phải là các số, vd: x0=85,3")
+
+
+async def spool_body(request: Request) -> str:
+    """
+    Ghi body (upload hoặc chunked) ra file tạm theo từng đoạn, không giữ cả body
+    trong bộ nhớ
+
+    Return:
+    - Đường dẫn file tạm (người gọi chịu trách nhiệm xoá)
+
+    Raises:
+    - HTTPException 413: Nếu body vượt quá STREAM_MAX_BYTES
+    """
+    spool = tempfile.NamedTemporaryFile(
+        dir=config.STREAM_DIR or None, prefix="stream-", suffix=".csv", delete=False
+    )
+    size = 0
+    buffer = bytearray()
+
+    try:
+        with spool:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if config.STREAM_MAX_BYTES and size > config.STREAM_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Body vượt quá {config.STREAM_MAX_BYTES} byte",
+                    )
+
+                buffer += chunk
+                if len(buffer) >= _SPOOL_BUFFER_BYTES:
+                    await asyncio.to_thread(spool.write, bytes(buffer))
+                    buffer.clear()
+
+            await asyncio.to_thread(spool.write, bytes(buffer))
+    except BaseException:
+        _remove(spool.name)
+        raise
+
+    return spool.name
+
+
+@router.post("/", response_model=OutputOptionData)
+async def stream_post(
+    request: Request,
+    model: Literal["sgd", "passive_aggressive", "linear"] = Query(
+        "sgd", description="Mô hình học theo từng khối dòng"
+    ),
+    x0: list[str] | None = Query(
+        None, description="Dòng cần dự đoán, lặp lại cho nhiều dòng: x0=85,3&x0=90,4"
+    ),
+    target: int = Query(-1, description="Vị trí cột Y trong CSV (mặc định cột cuối)"),
+    header: bool = Query(False, description="Dòng đầu tiên của CSV là tên cột"),
+    random_state: int | None = Query(None, description="Seed chia dữ liệu và mô hình"),
+    job: bool = Query(False, description="Chạy ở chế độ job (trả job_id ngay)"),
+    collection: AsyncIOMotorCollection = Depends(get_simple_model_collection),
+) -> OutputOptionData:
+    """
+    Huấn luyện trên dữ liệu lớn hơn bộ nhớ: body là CSV (Content-Type: text/csv),
+    gửi dạng file hoặc chunked, được đọc và học theo từng khối dòng
+
+    Param:
+    - request: Request có body CSV, mỗi dòng là một mẫu
+    - model: sgd, passive_aggressive hoặc linear (bình phương tối thiểu chính xác)
+    - x0: Các dòng cần dự đoán (tùy chọn)
+    - target: Vị trí cột Y
+    - header: CSV có dòng tên cột
+    - random_state: Seed cố định (tùy chọn)
+    - job: Nếu true, trả về job_id ngay (202) và huấn luyện trong nền
+    - collection: Bộ sưu tập MongoDB để lưu kết quả (chung với option)
+
+    Return:
+    - Kết quả cùng dạng với /regression/option/
+    """
+    x0 = parse_x0(x0)
+    source = await spool_body(request)
+
+    kwargs = dict(
+        source=source,
+        model_name=model,
+        x0=x0,
+        random_state=effective_seed(random_state),
+        target=target,
+        header=header,
+    )
+
+    # Hàm huấn luyện tự xoá file tạm; ở đây xoá nếu nó không được chạy
+    # (job đã được nhận thì file thuộc về job)
+    submitted = False
+    try:
+        if job:
+            response = await submit_job(
+                "stream",
+                run_stream_model,
+                kwargs,
+                collection,
+                OutputOptionData,
+                cache=False,
+            )
+            submitted = True
+            return response
+
+        # Dữ liệu nằm trong file tạm, không có mảng để tạo khóa cache
+        result = await run_training("stream", run_stream_model, kwargs, cache=False)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        if not submitted:
+            _remove(source)
+
+    await save_result(collection, result)
+
+    return OutputOptionData(**result)
@@ -1,3 +1,524 @@
+import asyncio
+import base64
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import numpy as np
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from app import config
+from app.schemas import JobSubmitted
+from app.utils.admission import AdmissionRejected, admission
+from app.utils.binary import DECODERS, UnsupportedFormat
+from app.utils.cache import make_key, result_cache
+from app.utils.datasets import DatasetNotFound, call_with_dataset, read_dataset_meta
+from app.utils.executor import create_cancel_event, run_in_pool
+from app.utils.jobs import JobQueueFull, get_job_runner
+from app.utils.machine_learning.control import Cancelled, call_with_cancel
+from app.utils.machine_learning.cost import request_cost
+from app.utils.machine_learning.session_store import read_session_meta
+from app.utils.metrics import TRAININGS_IN_FLIGHT, observe_stages
+from app.utils.profiling import call_with_profile, current_profile, profiling
+from app.utils.timing import (
+    Timings,
+    add_stages,
+    call_with_stages,
+    record_stages,
+    set_stage_labels,
+    stage,
+)
+
+# Mã trạng thái (theo nginx) khi client đóng kết nối trước khi có kết quả
+CLIENT_CLOSED_REQUEST = 499
+
+# Event được set khi client của request hiện tại ngắt kết nối (cancel_on_disconnect)
+_disconnected: ContextVar[asyncio.Event | None] = ContextVar(
+    "disconnected", default=None
+)
+
+
 def normalize_doc(doc: dict) -> dict:
     doc["_id"] = str(doc["_id"])  # Chuyển ObjectId thành chuỗi
     return doc
+
+
+def encode_cursor(doc: dict) -> str:
+    """
+    Tạo token after (opaque) từ bản ghi cuối cùng của trang hiện tại
+    """
+    payload = json.dumps({"time": doc["time"].isoformat(), "_id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(after: str) -> dict:
+    """
+    Chuyển token after thành điều kiện lọc các bản ghi cũ hơn (theo time, _id)
+
+    Raises:
+    - HTTPException 400: Nếu token không hợp lệ
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(after.encode()))
+        time = datetime.fromisoformat(payload["time"])
+        _id = ObjectId(payload["_id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Token after không hợp lệ")
+
+    return {"$or": [{"time": {"$lt": time}}, {"time": time, "_id": {"$lt": _id}}]}
+
+
+def parse_fields(fields: str | None) -> dict | None:
+    """
+    Chuyển tham số fields ("model,r2_test") thành projection của MongoDB
+
+    Note:
+    - time và _id luôn được trả về (dùng cho token after)
+
+    Raises:
+    - HTTPException 400: Nếu tên trường không hợp lệ
+    """
+    if not fields:
+        return None
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names or any(name.startswith("$") for name in names):
+        raise HTTPException(status_code=400, detail="Tham số fields không hợp lệ")
+
+    return {name: 1 for name in ("time", *names)}
+
+
+async def read_history(
+    collection,
+    response: Response,
+    limit: int,
+    skip: int = 0,
+    after: str | None = None,
+    fields: str | None = None,
+) -> list:
+    """
+    Đọc lịch sử mới nhất trước, phân trang bằng token after (hoặc skip)
+
+    Param:
+    - collection: Bộ sưu tập MongoDB để truy vấn
+    - response: Response để gắn header X-Next-After
+    - limit: Số lượng bản ghi trả về
+    - skip: Số lượng bản ghi bỏ qua (chỉ dùng khi không có after)
+    - after: Token lấy từ header X-Next-After của trang trước
+    - fields: Danh sách trường cần lấy, phân tách bằng dấu phẩy
+
+    Return:
+    - Danh sách các bản ghi lịch sử
+    """
+    query = decode_cursor(after) if after else {}
+    cursor = collection.find(query, parse_fields(fields)).sort(
+        [("time", -1), ("_id", -1)]
+    )
+    if not after:
+        cursor = cursor.skip(skip)
+
+    raw_docs = await cursor.limit(limit).to_list(length=limit)
+
+    if len(raw_docs) == limit:
+        response.headers["X-Next-After"] = encode_cursor(raw_docs[-1])
+
+    normalized_docs = [normalize_doc(doc) for doc in raw_docs]
+    return jsonable_encoder(normalized_docs)
+
+
+async def save_result(collection, result: dict):
+    """
+    Lưu kết quả vào lịch sử (chỉ một lần ghi)
+
+    Param:
+    - collection: Bộ sưu tập MongoDB để lưu kết quả
+    - result: Kết quả huấn luyện (được thêm khóa time và _id)
+
+    Note:
+    - Bản ghi vượt giới hạn được xoá bởi tiến trình nền (app/database/retention.py)
+    - time theo UTC: MongoDB coi datetime không có múi giờ là UTC, TTL index
+      cũng tính theo UTC
+    """
+    result["time"] = datetime.now(timezone.utc)
+
+    with stage("db_insert"):
+        await collection.insert_one(result)
+
+
+def parse_body(schema: type[BaseModel]):
+    """
+    Tạo dependency đọc body theo Content-Type: JSON hoặc nhị phân (npz, Arrow, MessagePack)
+
+    Param:
+    - schema: Schema input của endpoint
+
+    Return:
+    - Dependency trả về instance của schema
+
+    Note:
+    - Body nhị phân được giải mã thẳng thành mảng numpy (không qua list Python)
+      rồi vẫn đi qua các validator của schema
+    """
+
+    async def dependency(request: Request) -> BaseModel:
+        content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+        body = await request.body()
+
+        try:
+            if content_type in DECODERS:
+                data = await asyncio.to_thread(DECODERS[content_type], body)
+            else:
+                data = await request.json()
+        except UnsupportedFormat as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Body không hợp lệ: {e}")
+
+        try:
+            return schema.model_validate(data)
+        except ValidationError as e:
+            # Bỏ input khỏi lỗi: có thể là mảng numpy lớn, không encode JSON được
+            raise RequestValidationError(
+                e.errors(include_url=False, include_input=False)
+            )
+
+    return dependency
+
+
+def body_openapi(schema: type[BaseModel]) -> dict:
+    """
+    Mô tả request body cho OpenAPI khi endpoint dùng parse_body
+    """
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema.model_json_schema()},
+                **{content_type: binary for content_type in DECODERS},
+            },
+        }
+    }
+
+
+def arrival_time() -> float:
+    """
+    Thời điểm (time.time()) request tới, dùng làm mốc cho time_budget_ms
+
+    Note:
+    - Khai báo dependency này trước parse_body để mốc tính cả thời gian đọc body
+    """
+    return time.time()
+
+
+def effective_seed(random_state: int | None) -> int | None:
+    """
+    Seed dùng cho request: seed người dùng gửi, nếu không có thì SPLIT_RANDOM_STATE
+    """
+    return random_state if random_state is not None else config.SPLIT_RANDOM_STATE
+
+
+async def data_kwargs(input_data) -> dict:
+    """
+    Tham số dữ liệu cho hàm huấn luyện: X, Y trong body hoặc dataset_id
+
+    Param:
+    - input_data: Input có X_array, Y_array, dataset_id, x0
+
+    Return:
+    - {"X": ..., "Y": ...} hoặc {"dataset_id": ...} (worker tự mở dataset)
+
+    Raises:
+    - HTTPException 404: Nếu dataset không tồn tại (hoặc đã bị xoá)
+    - HTTPException 422: Nếu số cột của x0 khác số cột của dataset
+    """
+    if input_data.dataset_id is None:
+        return {"X": input_data.X_array, "Y": input_data.Y_array}
+
+    try:
+        meta = await asyncio.to_thread(read_dataset_meta, input_data.dataset_id)
+    except DatasetNotFound:
+        raise HTTPException(status_code=404, detail="Không tồn tại dataset này")
+
+    x0 = input_data.x0
+    if x0 is not None and x0.shape[1] != meta["n_features"]:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Số cột của x0 ({x0.shape[1]}) phải bằng số cột của dataset"
+            f" ({meta['n_features']})",
+        )
+
+    return {"dataset_id": input_data.dataset_id}
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request):
+    """
+    Huỷ việc huấn luyện của request đồng bộ khi client ngắt kết nối
+
+    Param:
+    - request: Request đang xử lý
+
+    Return:
+    - Event huỷ (truyền cho run_training qua tham số cancel)
+
+    Raises:
+    - HTTPException 499: Nếu client đã ngắt kết nối (việc huấn luyện dừng ở
+      ranh giới mô hình / fold tiếp theo, kết quả không được lưu)
+
+    Note:
+    - Kết nối được kiểm tra mỗi DISCONNECT_POLL_SECONDS giây trong nền
+    - Request đang chờ trong hàng đợi admission thì rời hàng đợi ngay khi
+      client ngắt kết nối (run_training đọc event qua context)
+    """
+    cancel = await create_cancel_event()
+    disconnected = asyncio.Event()
+    token = _disconnected.set(disconnected)
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(config.DISCONNECT_POLL_SECONDS)
+        disconnected.set()
+        await asyncio.to_thread(cancel.set)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield cancel
+    except Cancelled:
+        disconnected.set()
+    finally:
+        _disconnected.reset(token)
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+
+    if disconnected.is_set():
+        raise HTTPException(
+            status_code=CLIENT_CLOSED_REQUEST, detail="Client đã ngắt kết nối"
+        )
+
+
+async def estimate_cost(kind: str, kwargs: dict) -> tuple[float, int]:
+    """
+    Ước lượng chi phí (giây CPU, byte bộ nhớ) của một lượt huấn luyện
+
+    Param:
+    - kind: Loại request
+    - kwargs: Tham số của hàm huấn luyện (X hoặc dataset_id, source, session_id,
+      model_name, ...)
+
+    Raises:
+    - DatasetNotFound: Nếu dataset_id không tồn tại
+
+    Note:
+    - Thêm dòng vào phiên: mô hình không cập nhật được từ thống kê đủ phải
+      huấn luyện lại trên mọi dòng train, nên chi phí tính theo mô hình của
+      phiên và n_train của phiên cộng số dòng mới (không chỉ số dòng mới)
+    """
+    n_samples, n_features, n_bytes = 0, 0, 0
+    model_name = kwargs.get("model_name")
+    if kwargs.get("X") is not None:
+        shape = np.shape(kwargs["X"])
+        n_samples, n_features = shape[0], shape[1] if len(shape) > 1 else 1
+    elif "dataset_id" in kwargs:
+        meta = await asyncio.to_thread(read_dataset_meta, kwargs["dataset_id"])
+        n_samples, n_features = meta["n_samples"], meta["n_features"]
+    if "source" in kwargs:
+        try:
+            n_bytes = os.path.getsize(kwargs["source"])
+        except OSError:
+            pass
+    if "session_id" in kwargs:
+        try:
+            meta = await asyncio.to_thread(read_session_meta, kwargs["session_id"])
+        except KeyError:
+            # Phiên không tồn tại: hàm huấn luyện sẽ báo lỗi (404)
+            pass
+        else:
+            n_samples += meta["n_train"]
+            model_name = meta["model_name"]
+
+    return request_cost(
+        kind,
+        n_samples,
+        n_features,
+        model_name=model_name,
+        time_budget_ms=kwargs.get("time_budget_ms"),
+        n_bytes=n_bytes,
+    )
+
+
+async def run_training(
+    kind: str,
+    func,
+    kwargs: dict,
+    progress=None,
+    cache: bool = True,
+    cancel=None,
+    bounded: bool = True,
+    arrival: float | None = None,
+) -> dict:
+    """
+    Chạy hàm huấn luyện trong process pool, dùng lại kết quả đã cache nếu có
+
+    Param:
+    - kind: Loại request (option, best_model, stack_model)
+    - func: Hàm huấn luyện
+    - kwargs: Tham số truyền cho func (X, Y hoặc dataset_id, x0, random_state, ...)
+    - progress: Callback tiến độ (tùy chọn)
+    - cache: Dùng result cache (False khi kết quả không chỉ phụ thuộc kwargs)
+    - cancel: Event huỷ từ cancel_on_disconnect (tùy chọn)
+    - bounded: Từ chối khi hàng đợi admission đầy (False cho job: job đã có
+      hàng đợi riêng nên chỉ chờ tới lượt)
+    - arrival: Mốc tính time_budget_ms (arrival_time(); mặc định: lúc gọi)
+
+    Return:
+    - Dict kết quả huấn luyện
+
+    Note:
+    - Chỉ cache khi request có seed: không có seed thì mỗi lần chia train/test
+      khác nhau nên kết quả không tái lập được
+    - Thời gian các giai đoạn (kể cả trong worker) được cộng vào lần đo
+      của request, gắn nhãn endpoint = kind và model
+    - Nếu request đang được profile (app.utils.profiling), worker chạy func
+      dưới cProfile và ghi kết quả với tên profile.id
+    - Với dataset_id, worker mở X, Y qua memory map (call_with_dataset);
+      dataset_id là mã theo nội dung nên dùng thay X, Y trong khóa cache
+    - Admission control (app.utils.admission): lượt huấn luyện chỉ chạy khi
+      chi phí ước lượng còn nằm trong ngân sách CPU / bộ nhớ, nếu không thì
+      chờ trong hàng đợi có giới hạn; kết quả đã cache không phải chờ.
+      Trong cancel_on_disconnect, client ngắt kết nối lúc đang chờ thì
+      request rời hàng đợi (Cancelled)
+    - time_budget_ms tính từ arrival: thời gian chờ admission bị trừ vào
+      ngân sách, worker chỉ nhận phần còn lại (có thể bằng 0: chỉ chạy ứng
+      viên rẻ nhất)
+
+    Raises:
+    - HTTPException 404: Nếu dataset bị xoá trước khi worker kịp mở
+    - HTTPException 503: Nếu hàng đợi admission đã đầy (kèm header Retry-After)
+    - Cancelled: Nếu cancel được set trong lúc huấn luyện, hoặc client ngắt
+      kết nối khi đang chờ admission
+    """
+    if arrival is None:
+        arrival = time.time()
+    set_stage_labels(endpoint=kind, model=kwargs.get("model_name", kind))
+    random_state = kwargs.get("random_state")
+    key = None
+
+    if cache and random_state is not None and result_cache.enabled:
+        params = {
+            name: value
+            for name, value in kwargs.items()
+            if name not in ("X", "Y", "x0")
+        }
+        with stage("cache"):
+            key = await asyncio.to_thread(
+                make_key,
+                kind,
+                params,
+                kwargs.get("X"),
+                kwargs.get("Y"),
+                kwargs.get("x0"),
+            )
+            cached = await result_cache.get(key)
+        if cached is not None:
+            return cached
+
+    call = (call_with_stages, func)
+    if "dataset_id" in kwargs:
+        call = (call_with_stages, call_with_dataset, func)
+    if cancel is not None:
+        call = (call_with_cancel, cancel, *call)
+    profile = current_profile()
+    if profile is not None:
+        profile.used = True
+        call = (call_with_profile, profile.id, *call)
+
+    try:
+        cost, memory = await estimate_cost(kind, kwargs)
+        async with admission.admit(cost, memory, bounded, _disconnected.get()):
+            if kwargs.get("time_budget_ms") is not None:
+                elapsed_ms = (time.time() - arrival) * 1000
+                remaining = max(kwargs["time_budget_ms"] - elapsed_ms, 0)
+                kwargs = {**kwargs, "time_budget_ms": remaining}
+            TRAININGS_IN_FLIGHT.inc()
+            try:
+                result, stages = await run_in_pool(*call, **kwargs, progress=progress)
+            finally:
+                TRAININGS_IN_FLIGHT.dec()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except DatasetNotFound:
+        # Chỉ lỗi dataset không tồn tại; KeyError khác là lỗi thật (500)
+        raise HTTPException(status_code=404, detail="Không tồn tại dataset này")
+    add_stages(stages)
+
+    if key is not None:
+        await result_cache.set(key, result)
+
+    return result
+
+
+async def submit_job(
+    kind: str, func, kwargs: dict, collection, output_model, cache: bool = True
+):
+    """
+    Chạy request ở chế độ job: trả job_id ngay, huấn luyện trong nền
+
+    Param:
+    - kind: Loại job (option, best_model, stack_model)
+    - func: Hàm huấn luyện (run_option_model, run_best_model, run_stack_model)
+    - kwargs: Tham số truyền cho func
+    - collection: Bộ sưu tập MongoDB để lưu kết quả khi job hoàn thành
+    - output_model: Schema output của endpoint
+    - cache: Dùng result cache (xem run_training)
+
+    Return:
+    - Response 202 với job_id, header Location trỏ tới /regression/jobs/{job_id}
+
+    Raises:
+    - HTTPException 503: Nếu hàng đợi job đã đầy
+    """
+
+    # Job chạy ngoài request nên tự đo các giai đoạn rồi ghi vào metrics,
+    # và mang theo profile của request (header X-Profile-Id được gửi ngay)
+    timings = Timings()
+    profile = current_profile()
+    if profile is not None:
+        profile.used = True
+
+    async def work(progress) -> dict:
+        with record_stages(timings), profiling(profile):
+            return await run_training(
+                kind, func, kwargs, progress, cache, bounded=False
+            )
+
+    async def on_done(result: dict) -> dict:
+        with record_stages(timings):
+            await save_result(collection, result)
+        observe_stages(timings, **timings.labels)
+        return output_model(**result).model_dump()
+
+    try:
+        job_id = await get_job_runner().submit(kind, work, on_done)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Hàng đợi job đã đầy")
+
+    return JSONResponse(
+        status_code=202,
+        content=JobSubmitted(job_id=job_id, status="queued").model_dump(),
+        headers={"Location": f"/regression/jobs/{job_id}"},
+    )
@@ -1,3 +1,7 @@
 from app.schemas.best_model import InputBestModelData, OutputBestModelData
 from app.schemas.option import InputOptionData, OutputOptionData
 from app.schemas.stack_model import InputStackModelData, OutputStackModelData
+from app.schemas.jobs import JobStatus, JobSubmitted
+from app.schemas.predict import InputPredictData, OutputPredictData
+from app.schemas.session import InputAppendData, OutputSessionData
+from app.schemas.datasets import InputDatasetData, OutputDatasetData
@@ -1,8 +1,15 @@
-from typing import Optional
-
-from pydantic import BaseModel, field_validator
-
-from app.schemas.utils import Matrix, Vector, VectorOrMatrix
+from typing import List, Optional
+
+from pydantic import BaseModel, field_validator, model_validator
+
+from app.schemas.utils import (
+    Matrix,
+    Vector,
+    VectorOrMatrix,
+    check_data_source,
+    to_matrix,
+    to_vector,
+)
 from app.utils.panic import Panic
 
 
@@ -11,47 +18,50 @@ class InputBestModelData(BaseModel):
     Schema cho input của best_model
 
     Param:
-    - X_array: Mảng X (bắt buộc)
-    - Y_array: Mảng Y (bắt buộc)
+    - X_array: Mảng X (bắt buộc nếu không có dataset_id)
+    - Y_array: Mảng Y (bắt buộc nếu không có dataset_id)
+    - dataset_id: Mã dataset đã upload (/regression/datasets/), thay cho X_array, Y_array
     - x0: Mảng dự đoán (tùy chọn)
+    - random_state: Seed chia train/test và khởi tạo mô hình (tùy chọn)
+    - race: Loại dần ứng viên trên mẫu con trước khi huấn luyện đầy đủ (mặc định False)
+    - time_budget_ms: Thời gian tối đa (ms) cho việc tìm mô hình; trả mô hình tốt nhất
+      trong các ứng viên kịp chạy (tùy chọn, phải > 0)
 
     Note:
     - X_array và x0 luôn là ma trận 2D
     - Y_array luôn là vector 1D
     - Số cột của x0 phải bằng số cột của X_array
     - Số hàng của Y_array phải bằng số hàng của X_array
+    - Số cột của x0 so với dataset được kiểm tra ở router (dataset nằm trên đĩa)
 
     Raises:
     - ValueError: Nếu dữ liệu không hợp lệ
     - Panic: Nếu có lỗi không lường trước
     """
 
-    X_array: VectorOrMatrix
-    Y_array: Vector
+    X_array: Optional[VectorOrMatrix] = None
+    Y_array: Optional[Vector] = None
+    dataset_id: Optional[str] = None
     x0: Optional[VectorOrMatrix] = None
+    random_state: Optional[int] = None
+    race: bool = False
+    time_budget_ms: Optional[int] = None
 
     # Validator để đảm bảo X_array và x0 luôn là 2D
+    # Chuyển sang mảng numpy một lần, kiểm tra bằng phép toán vector hoá
     @field_validator("X_array", "x0", mode="before")
     @classmethod
-    def ensure_2d(cls, v):
+    def ensure_2d(cls, v, info):
         if v is None:
             return None
+        return to_matrix(v, info.field_name)
 
-        if not isinstance(v, list) or not v:
-            raise ValueError("X_array/x0 không được rỗng")
-
-        # Nếu là list 1D → nhồi thành ma trận cột
-        if all(isinstance(el, (int, float)) for el in v):
-            return [[el] for el in v]  # ✅ mỗi phần tử thành một hàng
-
-        # Nếu đã là list of lists
-        if all(isinstance(el, list) for el in v):
-            for row in v:
-                if not all(isinstance(el, (int, float)) for el in row):
-                    raise ValueError("Tất cả phần tử trong ma trận phải là số")
-            return v
-
-        raise ValueError("Kiểu dữ liệu không hợp lệ cho ma trận")
+    @field_validator("Y_array", mode="before")
+    @classmethod
+    def ensure_1d(cls, v):
+        if v is None:
+            return None
+        return to_vector(v)
 
     @field_validator("Y_array")
     @classmethod
@@ -72,14 +82,26 @@ class InputBestModelData(BaseModel):
 
         X_array = info.data.get("X_array")
         if X_array is not None:
-            n_cols_X = len(X_array[0])
-            n_cols_x0 = len(v[0])
+            n_cols_X = X_array.shape[1]
+            n_cols_x0 = v.shape[1]
             if n_cols_X != n_cols_x0:
                 raise ValueError(
                     f"Số cột của x0 ({n_cols_x0}) phải bằng số cột của X_array ({n_cols_X})"
                 )
         return v
 
+    @field_validator("time_budget_ms")
+    @classmethod
+    def check_time_budget(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("time_budget_ms phải lớn hơn 0")
+        return v
+
+    @model_validator(mode="after")
+    def check_source(self):
+        check_data_source(self.X_array, self.Y_array, self.dataset_id)
+        return self
+
 
 class OutputBestModelData(BaseModel):
     """
@@ -87,13 +109,25 @@ class OutputBestModelData(BaseModel):
 
     Param:
     - best_model: Tên mô hình tốt nhất
-    - best_score: Chỉ số RMSE trên tập test của mô hình tốt nhất
+    - best_r2_test: Chỉ số R² trên tập test của mô hình tốt nhất
+    - best_rmse_test: Chỉ số RMSE trên tập test của mô hình tốt nhất
     - best_generalization_error: Sai số tổng quát hóa của mô hình tốt nhất
     - best_result: Kết quả dự đoán từ mô hình tốt nhất (nếu x0 được cung cấp)
+    - model_id: Mã mô hình tốt nhất đã lưu, dùng cho /regression/predict/{model_id}
+    - race_rounds: Số vòng loại đã chạy (chỉ khi race=True)
+    - eliminated: Các ứng viên bị loại theo thứ tự bị loại (chỉ khi race=True)
+    - skipped: Các ứng viên không được chạy vì hết thời gian (chỉ khi có time_budget_ms)
+    - cut_short: Các ứng viên dừng search sớm vì hết thời gian, chỉ thử một phần
+      bộ tham số (chỉ khi có time_budget_ms)
     """
 
     best_model: str
-    best_r2_score: float
-    best_rmse_score: float
+    best_r2_test: float
+    best_rmse_test: float
     best_generalization_error: float
     best_result: Optional[Vector] = None
+    model_id: Optional[str] = None
+    race_rounds: Optional[int] = None
+    eliminated: Optional[List[str]] = None
+    skipped: Optional[List[str]] = None
+    cut_short: Optional[List[str]] = None
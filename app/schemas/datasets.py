@@ -0,0 +1,74 @@
+from typing import List
+
+from pydantic import BaseModel, field_validator
+
+from app.schemas.utils import Vector, VectorOrMatrix, to_matrix, to_vector
+
+
+class InputDatasetData(BaseModel):
+    """
+    Dữ liệu đầu vào khi upload dataset
+
+    Attributes:
+    - X_array: Ma trận đặc trưng (2D)
+    - Y_array: Vectơ mục tiêu (1D)
+    """
+
+    X_array: VectorOrMatrix
+    Y_array: Vector
+
+    @field_validator("X_array", mode="before")
+    @classmethod
+    def ensure_2d(cls, v, info):
+        return to_matrix(v, info.field_name)
+
+    @field_validator("Y_array", mode="before")
+    @classmethod
+    def ensure_1d(cls, v):
+        return to_vector(v)
+
+    @field_validator("Y_array")
+    @classmethod
+    def check_XY_alignment(cls, y, info):
+        X = info.data.get("X_array")
+        if X is not None and len(X) != len(y):
+            raise ValueError(
+                f"Số hàng của X_array ({len(X)}) phải bằng độ dài của Y_array ({len(y)})"
+            )
+        return y
+
+
+class ColumnStats(BaseModel):
+    """
+    Thống kê theo cột (Y được coi như ma trận một cột)
+    """
+
+    mean: List[float]
+    std: List[float]
+    min: List[float]
+    max: List[float]
+
+
+class DatasetStats(BaseModel):
+    X: ColumnStats
+    Y: ColumnStats
+
+
+class OutputDatasetData(BaseModel):
+    """
+    Thông tin dataset đã lưu
+
+    Attributes:
+    - dataset_id: Mã dataset (theo nội dung), dùng thay cho X_array, Y_array
+      ở option, best-model, stack-model và sessions
+    - n_samples: Số dòng
+    - n_features: Số cột của X
+    - bytes: Dung lượng trên đĩa của X, Y
+    - stats: Trung bình, độ lệch chuẩn, min, max theo cột của X và Y
+    """
+
+    dataset_id: str
+    n_samples: int
+    n_features: int
+    bytes: int
+    stats: DatasetStats
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel
+
+from app.schemas.best_model import OutputBestModelData
+from app.schemas.option import OutputOptionData
+from app.schemas.stack_model import OutputStackModelData
+
+
+class JobSubmitted(BaseModel):
+    """
+    Phản hồi khi một request được chạy ở chế độ job
+
+    Attributes:
+    - job_id: Mã job dùng để truy vấn trạng thái
+    - status: Trạng thái ban đầu (queued)
+    """
+
+    job_id: str
+    status: str
+
+
+class JobStatus(BaseModel):
+    """
+    Trạng thái của một job
+
+    Attributes:
+    - job_id: Mã job
+    - kind: Loại job (option, best_model, stack_model)
+    - status: queued | running | done | failed
+    - progress: Tiến độ huấn luyện (mô hình đang chạy, số mô hình đã xong, ...)
+    - result: Kết quả cuối cùng khi status = done
+    - error: Thông báo lỗi khi status = failed
+    - created_at, updated_at: Thời điểm tạo / cập nhật
+    """
+
+    job_id: str
+    kind: str
+    status: str
+    progress: Optional[dict[str, Any]] = None
+    result: Optional[
+        Union[OutputBestModelData, OutputOptionData, OutputStackModelData]
+    ] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
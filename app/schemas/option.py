@@ -1,6 +1,13 @@
 from typing import Optional
-from pydantic import BaseModel, field_validator
-from app.schemas.utils import Matrix, Vector, VectorOrMatrix
+from pydantic import BaseModel, field_validator, model_validator
+from app.schemas.utils import (
+    Matrix,
+    Vector,
+    VectorOrMatrix,
+    check_data_source,
+    to_matrix,
+    to_vector,
+)
 from app.utils.panic import Panic
 
 
@@ -11,37 +18,34 @@ class InputOptionData(BaseModel):
     Attributes:
     - X_array: Ma trận đặc trưng (2D)
     - Y_array: Vectơ mục tiêu (1D)
+    - dataset_id: Mã dataset đã upload (/regression/datasets/), thay cho X_array, Y_array
     - x0: Ma trận dự đoán (2D, tùy chọn)
     - model: Tên mô hình (chuỗi, mặc định "linear")
+    - random_state: Seed chia train/test và khởi tạo mô hình (tùy chọn)
     """
 
-    X_array: VectorOrMatrix
-    Y_array: Vector
+    X_array: Optional[VectorOrMatrix] = None
+    Y_array: Optional[Vector] = None
+    dataset_id: Optional[str] = None
     x0: Optional[VectorOrMatrix] = None
     model: str = "linear"
+    random_state: Optional[int] = None
 
     # Validator để đảm bảo X_array và x0 luôn là 2D
+    # Chuyển sang mảng numpy một lần, kiểm tra bằng phép toán vector hoá
     @field_validator("X_array", "x0", mode="before")
     @classmethod
-    def ensure_2d(cls, v):
+    def ensure_2d(cls, v, info):
         if v is None:
             return None
+        return to_matrix(v, info.field_name)
 
-        if not isinstance(v, list) or not v:
-            raise ValueError("X_array/x0 không được rỗng")
-
-        # Nếu là list 1D → nhồi thành ma trận cột
-        if all(isinstance(el, (int, float)) for el in v):
-            return [[el] for el in v]  # ✅ mỗi phần tử thành một hàng
-
-        # Nếu đã là list of lists
-        if all(isinstance(el, list) for el in v):
-            for row in v:
-                if not all(isinstance(el, (int, float)) for el in row):
-                    raise ValueError("Tất cả phần tử trong ma trận phải là số")
-            return v
-
-        raise ValueError("Kiểu dữ liệu không hợp lệ cho ma trận")
+    @field_validator("Y_array", mode="before")
+    @classmethod
+    def ensure_1d(cls, v):
+        if v is None:
+            return None
+        return to_vector(v)
 
     @field_validator("Y_array")
     @classmethod
@@ -62,14 +66,19 @@ class InputOptionData(BaseModel):
 
         X_array = info.data.get("X_array")
         if X_array is not None:
-            n_cols_X = len(X_array[0])
-            n_cols_x0 = len(v[0])
+            n_cols_X = X_array.shape[1]
+            n_cols_x0 = v.shape[1]
             if n_cols_X != n_cols_x0:
                 raise ValueError(
                     f"Số cột của x0 ({n_cols_x0}) phải bằng số cột của X_array ({n_cols_X})"
                 )
         return v
 
+    @model_validator(mode="after")
+    def check_source(self):
+        check_data_source(self.X_array, self.Y_array, self.dataset_id)
+        return self
+
 
 class OutputOptionData(BaseModel):
     """
@@ -87,6 +96,7 @@ class OutputOptionData(BaseModel):
     - r2_train: Chỉ số R^2 trên tập train
     - r2_test: Chỉ số R^2 trên tập test
     - r2_status: Trạng thái mô hình
+    - model_id: Mã mô hình đã lưu, dùng cho /regression/predict/{model_id}
     """
 
     model: str
@@ -100,3 +110,4 @@ class OutputOptionData(BaseModel):
     r2_train: float
     r2_test: float
     r2_status: str
+    model_id: Optional[str] = None
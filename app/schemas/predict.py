@@ -0,0 +1,36 @@
+from pydantic import BaseModel, field_validator
+
+from app.schemas.utils import Vector, VectorOrMatrix, to_matrix
+from app.utils.panic import Panic
+
+
+class InputPredictData(BaseModel):
+    """
+    Dữ liệu đầu vào cho dự đoán với mô hình đã lưu
+
+    Attributes:
+    - x0: Ma trận dự đoán (2D)
+    """
+
+    x0: VectorOrMatrix
+
+    # Validator để đảm bảo x0 luôn là 2D
+    @field_validator("x0", mode="before")
+    @classmethod
+    def ensure_2d(cls, v):
+        return to_matrix(v, "x0")
+
+
+class OutputPredictData(BaseModel):
+    """
+    Dữ liệu đầu ra của dự đoán với mô hình đã lưu
+
+    Attributes:
+    - model_id: Mã mô hình
+    - model: Tên mô hình
+    - y0: Vectơ kết quả dự đoán (1D)
+    """
+
+    model_id: str
+    model: str
+    y0: Vector
@@ -0,0 +1,60 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, field_validator
+
+from app.schemas.option import OutputOptionData
+from app.schemas.utils import Vector, VectorOrMatrix, to_matrix, to_vector
+
+
+class InputAppendData(BaseModel):
+    """
+    Dữ liệu đầu vào khi thêm dòng vào phiên
+
+    Attributes:
+    - X_array: Các dòng X mới (2D)
+    - Y_array: Các giá trị Y mới (1D)
+    - x0: Ma trận dự đoán (2D, tùy chọn)
+
+    Note:
+    - Số cột được kiểm tra với phiên khi huấn luyện (phiên nằm trên đĩa)
+    """
+
+    X_array: VectorOrMatrix
+    Y_array: Vector
+    x0: Optional[VectorOrMatrix] = None
+
+    @field_validator("X_array", "x0", mode="before")
+    @classmethod
+    def ensure_2d(cls, v, info):
+        if v is None:
+            return None
+        return to_matrix(v, info.field_name)
+
+    @field_validator("Y_array", mode="before")
+    @classmethod
+    def ensure_1d(cls, v):
+        return to_vector(v)
+
+    @field_validator("Y_array")
+    @classmethod
+    def check_XY_alignment(cls, y, info):
+        X = info.data.get("X_array")
+        if X is not None and len(X) != len(y):
+            raise ValueError(
+                f"Số hàng của X_array ({len(X)}) phải bằng độ dài của Y_array ({len(y)})"
+            )
+        return y
+
+
+class OutputSessionData(OutputOptionData):
+    """
+    Dữ liệu đầu ra của phiên dữ liệu (tạo phiên hoặc thêm dòng)
+
+    Attributes:
+    - Các trường của OutputOptionData, tính trên toàn bộ dữ liệu của phiên
+    - session_id: Mã phiên, dùng cho /regression/sessions/{session_id}/append
+    - update: "incremental" (giải từ thống kê đủ) hoặc "full" (huấn luyện lại)
+    """
+
+    session_id: str
+    update: Literal["incremental", "full"]
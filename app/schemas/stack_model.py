@@ -1,38 +1,40 @@
 from typing import Optional, List
-from pydantic import BaseModel, field_validator
-
-from app.schemas.utils import Vector, Matrix, VectorOrMatrix
+from pydantic import BaseModel, field_validator, model_validator
+
+from app.schemas.utils import (
+    Vector,
+    Matrix,
+    VectorOrMatrix,
+    check_data_source,
+    to_matrix,
+    to_vector,
+)
 from app.utils.panic import Panic
 
 
 class InputStackModelData(BaseModel):
-    X_array: VectorOrMatrix
-    Y_array: Vector
+    X_array: Optional[VectorOrMatrix] = None
+    Y_array: Optional[Vector] = None
+    dataset_id: Optional[str] = None
     x0: Optional[VectorOrMatrix]
+    random_state: Optional[int] = None
 
     # Chuẩn hóa X_array và x0
     # Validator để đảm bảo X_array và x0 luôn là 2D
+    # Chuyển sang mảng numpy một lần, kiểm tra bằng phép toán vector hoá
     @field_validator("X_array", "x0", mode="before")
     @classmethod
-    def ensure_2d(cls, v):
+    def ensure_2d(cls, v, info):
         if v is None:
             return None
+        return to_matrix(v, info.field_name)
 
-        if not isinstance(v, list) or not v:
-            raise ValueError("X_array/x0 không được rỗng")
-
-        # Nếu là list 1D → nhồi thành ma trận cột
-        if all(isinstance(el, (int, float)) for el in v):
-            return [[el] for el in v]  # ✅ mỗi phần tử thành một hàng
-
-        # Nếu đã là list of lists
-        if all(isinstance(el, list) for el in v):
-            for row in v:
-                if not all(isinstance(el, (int, float)) for el in row):
-                    raise ValueError("Tất cả phần tử trong ma trận phải là số")
-            return v
-
-        raise ValueError("Kiểu dữ liệu không hợp lệ cho ma trận")
+    @field_validator("Y_array", mode="before")
+    @classmethod
+    def ensure_1d(cls, v):
+        if v is None:
+            return None
+        return to_vector(v)
 
     @field_validator("Y_array")
     @classmethod
@@ -53,17 +55,21 @@ class InputStackModelData(BaseModel):
 
         X_array = info.data.get("X_array")
         if X_array is not None:
-            n_cols_X = len(X_array[0])
-            n_cols_x0 = len(v[0])
+            n_cols_X = X_array.shape[1]
+            n_cols_x0 = v.shape[1]
             if n_cols_X != n_cols_x0:
                 raise ValueError(
                     f"Số cột của x0 ({n_cols_x0}) phải bằng số cột của X_array ({n_cols_X})"
                 )
         return v
 
-
         Panic().todo()
 
+    @model_validator(mode="after")
+    def check_source(self):
+        check_data_source(self.X_array, self.Y_array, self.dataset_id)
+        return self
+
 
 class OutputStackModelData(BaseModel):
     """
@@ -81,6 +87,7 @@ class OutputStackModelData(BaseModel):
     - r2_train: Chỉ số R^2 trên tập train
     - r2_test: Chỉ số R^2 trên tập test
     - r2_status: Trạng thái mô hình
+    - model_id: Mã mô hình đã lưu, dùng cho /regression/predict/{model_id}
     """
 
     model: str
@@ -94,3 +101,4 @@ class OutputStackModelData(BaseModel):
     r2_train: float
     r2_test: float
     r2_status: str
+    model_id: Optional[str] = None
@@ -1,5 +1,94 @@
-from typing import List, TypeAlias, Union
+from typing import Annotated, List, TypeAlias, Union
 
-Vector: TypeAlias = List[float]
-Matrix: TypeAlias = List[List[float]]
+import numpy as np
+from pydantic import WrapValidator
+
+
+def _keep_ndarray(value, handler):
+    # Mảng numpy đã được kiểm tra bằng to_matrix / to_vector (hoặc khi giải mã
+    # body nhị phân), không duyệt lại từng phần tử
+    if isinstance(value, np.ndarray):
+        return value
+    return handler(value)
+
+
+def to_array(v, name: str) -> np.ndarray:
+    """
+    Chuyển dữ liệu đầu vào thành mảng float64 trong một lần duy nhất
+
+    Param:
+    - v: List (lồng nhau) hoặc mảng numpy
+    - name: Tên trường, dùng trong thông báo lỗi
+
+    Raises:
+    - ValueError: Nếu rỗng, các hàng không cùng độ dài, có phần tử không phải số
+      hoặc có giá trị NaN / vô cực
+    """
+    try:
+        array = np.asarray(v)
+    except ValueError:
+        raise ValueError(f"Các hàng của {name} phải có cùng số phần tử")
+
+    if array.size == 0:
+        raise ValueError(f"{name} không được rỗng")
+
+    # Chuỗi, None, object... → không phải số (bool được chấp nhận như trước)
+    if array.dtype.kind not in "biuf":
+        raise ValueError(f"Tất cả phần tử trong {name} phải là số")
+
+    array = array.astype(np.float64, copy=False)
+
+    if not np.isfinite(array).all():
+        raise ValueError(f"{name} không được chứa NaN hoặc vô cực")
+
+    return array
+
+
+def to_matrix(v, name: str = "X_array/x0") -> np.ndarray:
+    """
+    Chuẩn hoá về ma trận 2D (vector 1D → ma trận cột)
+
+    Raises:
+    - ValueError: Nếu dữ liệu không hợp lệ hoặc có nhiều hơn 2 chiều
+    """
+    array = to_array(v, name)
+    if array.ndim == 1:
+        return array.reshape(-1, 1)
+    if array.ndim == 2:
+        return array
+    raise ValueError("Kiểu dữ liệu không hợp lệ cho ma trận")
+
+
+def to_vector(v, name: str = "Y_array") -> np.ndarray:
+    """
+    Chuẩn hoá về vector 1D (ma trận cột (n, 1) → vector)
+
+    Raises:
+    - ValueError: Nếu dữ liệu không hợp lệ hoặc không phải vector
+    """
+    array = to_array(v, name)
+    if array.ndim == 2 and array.shape[1] == 1:
+        return array.ravel()
+    if array.ndim == 1:
+        return array
+    raise ValueError(f"{name} phải là vector 1D")
+
+
+Vector: TypeAlias = Annotated[List[float], WrapValidator(_keep_ndarray)]
+Matrix: TypeAlias = Annotated[List[List[float]], WrapValidator(_keep_ndarray)]
 VectorOrMatrix: TypeAlias = Union[Vector, Matrix]
+
+
+def check_data_source(X, Y, dataset_id) -> None:
+    """
+    Dữ liệu huấn luyện phải đến từ đúng một nguồn: X_array + Y_array hoặc dataset_id
+
+    Raises:
+    - ValueError: Nếu thiếu cả hai, gửi cả hai hoặc thiếu một trong X_array, Y_array
+    """
+    if dataset_id is not None:
+        if X is not None or Y is not None:
+            raise ValueError("Chỉ gửi dataset_id hoặc X_array + Y_array, không gửi cả hai")
+        return
+    if X is None or Y is None:
+        raise ValueError("Cần X_array và Y_array (hoặc dataset_id)")
@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app import config
+from app.utils.machine_learning.control import Cancelled
+from app.utils.metrics import ADMISSION_CPU_IN_FLIGHT, ADMISSION_QUEUE_DEPTH
+
+
+class AdmissionRejected(Exception):
+    """Hàng đợi admission đã đầy, request bị từ chối."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Hàng đợi huấn luyện đã đầy, thử lại sau {retry_after} giây")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Giới hạn số việc huấn luyện chạy cùng lúc theo chi phí ước lượng
+
+    Param:
+    - cpu_seconds: Tổng số giây CPU ước lượng của các việc đang chạy (0 = tắt)
+    - memory_bytes: Tổng bộ nhớ ước lượng của các việc đang chạy
+    - queue_size: Số việc tối đa được chờ khi vượt ngân sách
+    - samples: Số việc đã xong gần nhất dùng để đo tốc độ xả hàng đợi
+
+    Note:
+    - Việc được nhận theo thứ tự đến (FIFO): việc lớn ở đầu hàng đợi không bị
+      các việc nhỏ đến sau vượt mặt
+    - Khi không có việc nào đang chạy, việc được nhận kể cả khi vượt ngân sách
+      (nếu không sẽ không bao giờ chạy được)
+    - Tốc độ xả (giây CPU ước lượng hoàn thành mỗi giây) = tổng chi phí / tổng
+      thời gian thực của các việc gần nhất, nhân số việc đang chạy
+    """
+
+    def __init__(
+        self, cpu_seconds: float, memory_bytes: int, queue_size: int, samples: int = 20
+    ):
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.queue_size = queue_size
+        self._cpu = 0.0
+        self._memory = 0
+        self._running = 0
+        self._waiters: deque = deque()
+        self._done: deque = deque(maxlen=samples)
+
+    @property
+    def enabled(self) -> bool:
+        return self.cpu_seconds > 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def cpu_in_flight(self) -> float:
+        return self._cpu
+
+    def _fits(self, cost: float, memory: int) -> bool:
+        return self._running == 0 or (
+            self._cpu + cost <= self.cpu_seconds
+            and self._memory + memory <= self.memory_bytes
+        )
+
+    def _grant(self, cost: float, memory: int):
+        self._cpu += cost
+        self._memory += memory
+        self._running += 1
+
+    def _release(self, cost: float, memory: int, seconds: float | None = None):
+        self._cpu -= cost
+        self._memory -= memory
+        self._running -= 1
+        if seconds is not None:
+            self._done.append((cost, seconds))
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            cost, memory, future = self._waiters[0]
+            if not self._fits(cost, memory):
+                break
+            self._waiters.popleft()
+            self._grant(cost, memory)
+            future.set_result(None)
+
+    def drain_rate(self) -> float:
+        """
+        Số giây CPU ước lượng được hoàn thành mỗi giây
+
+        Note:
+        - Chưa có việc nào xong thì coi ước lượng là đúng (1 giây CPU mỗi giây
+          cho mỗi việc đang chạy)
+        """
+        cost = sum(cost for cost, _ in self._done)
+        seconds = sum(seconds for _, seconds in self._done)
+        speed = cost / seconds if cost > 0 and seconds > 0 else 1.0
+        return speed * max(self._running, 1)
+
+    def retry_after(self) -> int:
+        """
+        Số giây ước lượng để xả hết các việc đang chạy và đang chờ
+        """
+        queued = sum(cost for cost, _, _ in self._waiters)
+        return max(1, math.ceil((self._cpu + queued) / self.drain_rate()))
+
+    @staticmethod
+    async def _wait(future: asyncio.Future, abandon: asyncio.Event | None):
+        if abandon is None:
+            await future
+            return
+
+        abandoned = asyncio.ensure_future(abandon.wait())
+        try:
+            await asyncio.wait(
+                {future, abandoned}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            abandoned.cancel()
+        if not future.done():
+            raise Cancelled()
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        cost: float,
+        memory: int,
+        bounded: bool = True,
+        abandon: asyncio.Event | None = None,
+    ):
+        """
+        Chờ tới lượt rồi giữ ngân sách cho một việc trong suốt khối with
+
+        Param:
+        - cost: Số giây CPU ước lượng
+        - memory: Số byte bộ nhớ ước lượng
+        - bounded: False = luôn được chờ (job đã có hàng đợi riêng)
+        - abandon: Event được set khi không cần chạy nữa (client ngắt kết nối);
+          set trong lúc chờ thì rời hàng đợi ngay
+
+        Raises:
+        - AdmissionRejected: Nếu phải chờ mà hàng đợi đã đầy
+        - Cancelled: Nếu abandon được set trong lúc chờ
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if not self._waiters and self._fits(cost, memory):
+            self._grant(cost, memory)
+        else:
+            if bounded and len(self._waiters) >= self.queue_size:
+                raise AdmissionRejected(self.retry_after())
+            waiter = (cost, memory, asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            try:
+                await self._wait(waiter[2], abandon)
+            except (asyncio.CancelledError, Cancelled):
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    # Việc bị huỷ có thể đang chặn các việc nhỏ hơn phía sau
+                    self._wake()
+                else:
+                    # Đã được nhận đúng lúc bị huỷ → trả lại ngân sách
+                    self._release(cost, memory)
+                raise
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(cost, memory, time.monotonic() - start)
+
+
+admission = AdmissionController(
+    cpu_seconds=config.ADMISSION_CPU_SECONDS,
+    memory_bytes=config.ADMISSION_MEMORY_BYTES,
+    queue_size=config.ADMISSION_QUEUE_SIZE,
+)
+ADMISSION_QUEUE_DEPTH.set_function(lambda: admission.queue_depth)
+ADMISSION_CPU_IN_FLIGHT.set_function(lambda: admission.cpu_in_flight)
@@ -0,0 +1,107 @@
+import io
+import json
+
+import numpy as np
+
+# Content-Type của các định dạng body nhị phân được hỗ trợ
+NPZ = "application/x-npz"
+ARROW = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack")
+
+
+class UnsupportedFormat(Exception):
+    """Thiếu thư viện để giải mã định dạng body (pyarrow / msgpack)."""
+
+
+def decode_npz(body: bytes) -> dict:
+    """
+    Giải mã body .npz (np.savez): mỗi trường là một file .npy trong archive
+
+    Note:
+    - X_array, Y_array, x0 là mảng; model, random_state là mảng 0 chiều
+    - Kiểu số, hình dạng... được kiểm tra bởi schema như với JSON
+    - Không cho phép pickle
+    """
+    data = {}
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        for name in archive.files:
+            value = archive[name]
+            data[name] = value.item() if value.ndim == 0 else value
+    return data
+
+
+def decode_arrow(body: bytes) -> dict:
+    """
+    Giải mã body Arrow IPC (stream)
+
+    Note:
+    - Cột Y_array là Y, các cột còn lại (theo thứ tự) là các cột của X
+    - x0, model, random_state nằm trong metadata của schema dưới dạng JSON
+
+    Raises:
+    - UnsupportedFormat: Nếu chưa cài pyarrow
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedFormat("Cần cài pyarrow để nhận body Arrow")
+
+    with pa.ipc.open_stream(body) as reader:
+        table = reader.read_all()
+
+    if "Y_array" not in table.column_names:
+        raise ValueError("Thiếu cột Y_array trong bảng Arrow")
+
+    features = [name for name in table.column_names if name != "Y_array"]
+    if not features:
+        raise ValueError("Bảng Arrow không có cột đặc trưng nào cho X_array")
+
+    data = {
+        "X_array": np.column_stack(
+            [table.column(name).to_numpy() for name in features]
+        ),
+        "Y_array": table.column("Y_array").to_numpy(),
+    }
+
+    for key, value in (table.schema.metadata or {}).items():
+        data[key.decode()] = json.loads(value)
+
+    return data
+
+
+def _msgpack_array(obj: dict):
+    # Mảng được gửi dưới dạng {"dtype", "shape", "data"} với data là bytes thô
+    if obj.keys() == {"dtype", "shape", "data"}:
+        dtype = np.dtype(obj["dtype"])
+        return np.frombuffer(obj["data"], dtype=dtype).reshape(obj["shape"])
+    return obj
+
+
+def decode_msgpack(body: bytes) -> dict:
+    """
+    Giải mã body MessagePack
+
+    Note:
+    - Mảng nên gửi dạng {"dtype": "<f8", "shape": [n, m], "data": <bin>}
+      để giải mã thẳng thành ndarray; list lồng nhau vẫn được chấp nhận
+
+    Raises:
+    - UnsupportedFormat: Nếu chưa cài msgpack
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedFormat("Cần cài msgpack để nhận body MessagePack")
+
+    data = msgpack.unpackb(body, object_hook=_msgpack_array)
+    if not isinstance(data, dict):
+        raise ValueError("Body MessagePack phải là một map")
+    return data
+
+
+DECODERS = {
+    NPZ: decode_npz,
+    ARROW: decode_arrow,
+    **{content_type: decode_msgpack for content_type in MSGPACK_ALIASES},
+}
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app import config
+
+
+def make_key(endpoint: str, params: dict, *arrays) -> str:
+    """
+    Tạo khóa cache từ nội dung các mảng và tham số của request
+
+    Param:
+    - endpoint: Tên endpoint (option, best_model, stack_model)
+    - params: Các tham số không phải mảng (model_name, random_state, race, ...)
+    - arrays: X, Y, x0 (x0 có thể là None)
+
+    Return:
+    - Chuỗi hex BLAKE2b của buffer các mảng và tham số
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(endpoint.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    for array in arrays:
+        if array is None:
+            digest.update(b"|none")
+            continue
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(f"|{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Cache kết quả huấn luyện theo nội dung request
+
+    - Tầng 1: LRU trong bộ nhớ (RESULT_CACHE_SIZE)
+    - Tầng 2: File pickle trên đĩa (RESULT_CACHE_DIR, tùy chọn)
+    - Mỗi kết quả hết hạn sau RESULT_CACHE_TTL_SECONDS
+    """
+
+    def __init__(self, max_size: int, ttl: float, directory: str = ""):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.directory = directory
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def _get_memory(self, key: str) -> dict | None:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            stored_at, result = item
+            if time.time() - stored_at > self.ttl:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return result
+
+    def _set_memory(self, key: str, result: dict, stored_at: float):
+        with self._lock:
+            self._memory[key] = (stored_at, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def _get_disk(self, key: str) -> tuple[float, dict] | None:
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if time.time() - stored_at > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as file:
+                return stored_at, pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _set_disk(self, key: str, result: dict):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as file:
+                pickle.dump(result, file)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Lỗi khi ghi cache ra đĩa: {e}")
+
+    async def get(self, key: str) -> dict | None:
+        """
+        Lấy kết quả đã cache (bản sao), hoặc None nếu không có / đã hết hạn
+        """
+        result = self._get_memory(key)
+        if result is not None:
+            self.hits += 1
+            return dict(result)
+
+        if self.directory:
+            item = await asyncio.to_thread(self._get_disk, key)
+            if item is not None:
+                stored_at, result = item
+                self._set_memory(key, result, stored_at)
+                self.disk_hits += 1
+                return dict(result)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: dict):
+        """
+        Lưu bản sao kết quả vào cache
+        """
+        result = dict(result)
+        self._set_memory(key, result, time.time())
+        if self.directory:
+            await asyncio.to_thread(self._set_disk, key, result)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._memory),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "disk": bool(self.directory),
+        }
+
+
+result_cache = ResultCache(
+    max_size=config.RESULT_CACHE_SIZE,
+    ttl=config.RESULT_CACHE_TTL_SECONDS,
+    directory=config.RESULT_CACHE_DIR,
+)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+from app import config
+from app.utils.timing import stage
+
+_META = "meta.json"
+_X = "X.npy"
+_Y = "Y.npy"
+
+
+class DatasetTooLarge(Exception):
+    """Dataset lớn hơn cả hạn mức DATASET_MAX_BYTES"""
+
+
+class DatasetNotFound(KeyError):
+    """Dataset không tồn tại, đã bị xoá hoặc dataset_id không hợp lệ"""
+
+
+def _directory(dataset_id: str) -> str:
+    """
+    Raises:
+    - DatasetNotFound: Nếu dataset_id không hợp lệ
+    """
+    if not dataset_id.isalnum():
+        raise DatasetNotFound(dataset_id)
+    return os.path.join(config.DATASET_DIR, dataset_id)
+
+
+def dataset_id_of(X: np.ndarray, Y: np.ndarray) -> str:
+    """
+    Mã dataset theo nội dung: upload lại cùng dữ liệu trả về cùng dataset_id
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (X, Y):
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(f"|{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def _column_stats(array: np.ndarray) -> dict:
+    # Y (1D) được coi như ma trận một cột
+    array = array.reshape(array.shape[0], -1)
+    return {
+        "mean": array.mean(axis=0).tolist(),
+        "std": array.std(axis=0).tolist(),
+        "min": array.min(axis=0).tolist(),
+        "max": array.max(axis=0).tolist(),
+    }
+
+
+def _mark_used(path: str):
+    # Đặt mtime theo đồng hồ ns: mtime do kernel ghi có thể thô hơn khoảng
+    # cách giữa hai request liên tiếp
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _touch(dataset_id: str) -> dict:
+    """
+    Đọc metadata và cập nhật thời điểm dùng gần nhất (LRU)
+
+    Raises:
+    - DatasetNotFound: Nếu dataset không tồn tại hoặc đã bị xoá
+    """
+    path = os.path.join(_directory(dataset_id), _META)
+    try:
+        with open(path, encoding="utf-8") as f:
+            meta = json.load(f)
+        _mark_used(path)
+    except FileNotFoundError:
+        raise DatasetNotFound(dataset_id)
+    return meta
+
+
+def _evict(keep: str):
+    """
+    Xoá các dataset ít được dùng nhất khi vượt quá số lượng hoặc dung lượng
+
+    Note:
+    - Thời điểm dùng gần nhất được lưu bằng mtime của meta.json
+    - Dataset vừa lưu (keep) không bị xoá
+    - Worker đang đọc dataset bị xoá vẫn đọc được (file đã mmap)
+    """
+    entries = []
+    with os.scandir(config.DATASET_DIR) as it:
+        for entry in it:
+            try:
+                mtime = os.stat(os.path.join(entry.path, _META)).st_mtime
+                with open(os.path.join(entry.path, _META), encoding="utf-8") as f:
+                    size = json.load(f)["bytes"]
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((entry.name == keep, mtime, size, entry.path))
+
+    # Dataset cần giữ được xếp cuối cùng
+    entries.sort()
+    total_bytes = sum(size for _, _, size, _ in entries)
+
+    while entries and not entries[0][0] and (
+        len(entries) > config.DATASET_MAX_ENTRIES
+        or total_bytes > config.DATASET_MAX_BYTES
+    ):
+        _, _, size, path = entries.pop(0)
+        shutil.rmtree(path, ignore_errors=True)
+        total_bytes -= size
+
+
+def save_dataset(X: np.ndarray, Y: np.ndarray) -> dict:
+    """
+    Lưu X, Y thành file .npy kèm thống kê theo cột
+
+    Param:
+    - X: Ma trận X (2D)
+    - Y: Vector Y (1D)
+
+    Return:
+    - Metadata: dataset_id, n_samples, n_features, bytes, stats
+
+    Raises:
+    - DatasetTooLarge: Nếu dataset lớn hơn DATASET_MAX_BYTES
+
+    Note:
+    - Ghi vào thư mục tạm rồi đổi tên: không ai đọc phải dataset dở dang
+    - Dataset đã có (cùng nội dung) chỉ được cập nhật thời điểm dùng
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    Y = np.ascontiguousarray(Y, dtype=np.float64)
+    size = X.nbytes + Y.nbytes
+    if size > config.DATASET_MAX_BYTES:
+        raise DatasetTooLarge(
+            f"Dataset ({size} byte) vượt quá hạn mức {config.DATASET_MAX_BYTES} byte"
+        )
+
+    dataset_id = dataset_id_of(X, Y)
+    try:
+        return _touch(dataset_id)
+    except DatasetNotFound:
+        pass
+
+    meta = {
+        "dataset_id": dataset_id,
+        "n_samples": X.shape[0],
+        "n_features": X.shape[1],
+        "bytes": size,
+        "stats": {"X": _column_stats(X), "Y": _column_stats(Y)},
+        "created": time.time(),
+    }
+
+    directory = _directory(dataset_id)
+    tmp_directory = f"{directory}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_directory)
+    try:
+        np.save(os.path.join(tmp_directory, _X), X)
+        np.save(os.path.join(tmp_directory, _Y), Y)
+        with open(os.path.join(tmp_directory, _META), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        _mark_used(os.path.join(tmp_directory, _META))
+        os.rename(tmp_directory, directory)
+    except OSError:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        # Request khác vừa lưu cùng dataset
+        if not os.path.isdir(directory):
+            raise
+
+    _evict(keep=dataset_id)
+    return meta
+
+
+def read_dataset_meta(dataset_id: str) -> dict:
+    """
+    Metadata của dataset (n_samples, n_features, stats, ...)
+
+    Raises:
+    - DatasetNotFound: Nếu dataset không tồn tại hoặc đã bị xoá
+    """
+    return _touch(dataset_id)
+
+
+def load_dataset(dataset_id: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mở X, Y của dataset qua memory map (chỉ đọc, không copy vào bộ nhớ)
+
+    Raises:
+    - DatasetNotFound: Nếu dataset không tồn tại hoặc đã bị xoá
+    """
+    _touch(dataset_id)
+    directory = _directory(dataset_id)
+    try:
+        X = np.load(os.path.join(directory, _X), mmap_mode="r")
+        Y = np.load(os.path.join(directory, _Y), mmap_mode="r")
+    except FileNotFoundError:
+        raise DatasetNotFound(dataset_id)
+    return X, Y
+
+
+def delete_dataset(dataset_id: str):
+    """
+    Xoá dataset
+
+    Raises:
+    - DatasetNotFound: Nếu dataset không tồn tại
+    """
+    directory = _directory(dataset_id)
+    if not os.path.isdir(directory):
+        raise DatasetNotFound(dataset_id)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def call_with_dataset(func, /, dataset_id: str, **kwargs):
+    """
+    Gọi func(X=..., Y=..., **kwargs) với X, Y mở từ dataset (dùng trong worker)
+
+    Note:
+    - Chỉ dataset_id được gửi sang worker, dữ liệu được đọc thẳng từ đĩa
+      (page cache dùng chung giữa các worker)
+
+    Raises:
+    - DatasetNotFound: Nếu dataset không tồn tại hoặc đã bị xoá
+    """
+    with stage("load"):
+        X, Y = load_dataset(dataset_id)
+    return func(X=X, Y=Y, **kwargs)
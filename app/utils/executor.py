@@ -0,0 +1,295 @@
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app import config
+from app.utils.metrics import STARTUP_SECONDS
+
+_pool: ProcessPoolExecutor | None = None
+_manager = None
+_manager_lock = threading.Lock()
+_warmup_task: asyncio.Task | None = None
+# Số task đã gửi vào pool hiện tại (thay pool sau WORKER_MAX_TASKS task mỗi worker)
+_submitted = 0
+# Các task warm-up pool mới (giữ tham chiếu để task không bị thu hồi)
+_background: set[asyncio.Task] = set()
+
+# Các module được nạp sẵn trong tiến trình forkserver trước khi fork worker
+# (tiến trình web không import các module này, xem app.utils.machine_learning)
+PRELOAD_MODULES = [
+    "numpy",
+    "sklearn",
+    "app.utils.machine_learning.run_option",
+    "app.utils.machine_learning.run_best_model",
+    "app.utils.machine_learning.run_stack_model",
+    "app.utils.machine_learning.run_stream",
+    "app.utils.machine_learning.run_session",
+]
+
+
+def warm_up_process():
+    """
+    Import sẵn các hàm huấn luyện và warm-up các mô hình WARMUP_MODELS
+    trong tiến trình hiện tại
+    """
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    from app.utils.machine_learning.model_training import warm_up
+
+    warm_up([name for name in config.WARMUP_MODELS.split(",") if name.strip()])
+
+
+def worker_n_jobs() -> int:
+    """
+    n_jobs của joblib trong mỗi worker: BEST_MODEL_N_JOBS nhưng không quá số
+    CPU chia đều cho WORKER_POOL_SIZE worker
+
+    Note:
+    - Không giới hạn thì pool đầy (mỗi worker chạy best-model với n_jobs = -1)
+      tạo WORKER_POOL_SIZE × số CPU tiến trình fit cùng lúc
+    """
+    cpus = os.cpu_count() or 1
+    n_jobs = config.BEST_MODEL_N_JOBS
+    if n_jobs < 0:
+        # Quy ước của joblib: -1 = mọi CPU, -2 = mọi CPU trừ một, ...
+        n_jobs = cpus + 1 + n_jobs
+    share = cpus // max(config.WORKER_POOL_SIZE, 1)
+    return max(1, min(n_jobs, share))
+
+
+def _init_worker(n_jobs: int):
+    """
+    Initializer của mỗi worker: giới hạn số tiến trình joblib và số thread BLAS
+    theo phần CPU của worker, rồi warm-up để task đầu tiên không phải trả chi
+    phí import / khởi tạo lần đầu
+
+    Param:
+    - n_jobs: Kết quả worker_n_jobs() của tiến trình web (config trong worker
+      không thấy giá trị được sửa lúc chạy)
+    """
+    from threadpoolctl import threadpool_limits
+
+    config.BEST_MODEL_N_JOBS = n_jobs
+    threadpool_limits(n_jobs)
+    if config.WORKER_WARMUP:
+        warm_up_process()
+
+
+def _ping() -> tuple[int, int]:
+    """
+    Task rỗng dùng để khởi tạo sẵn worker
+
+    Return:
+    - (pid, BEST_MODEL_N_JOBS) của worker
+    """
+    return os.getpid(), config.BEST_MODEL_N_JOBS
+
+
+def _mp_context():
+    """
+    Chọn start method cho pool
+
+    Note:
+    - "forkserver" cho phép preload sklearn một lần rồi fork worker từ đó
+    - Windows / macOS không có forkserver → dùng "spawn"
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(PRELOAD_MODULES)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _create_pool() -> ProcessPoolExecutor:
+    """
+    Tạo pool WORKER_POOL_SIZE worker
+
+    Note:
+    - Không dùng max_tasks_per_child: trên Python 3.11 worker nghỉ hưu có thể
+      không được thay thế và task sau bị treo. Worker được thay mới bằng cách
+      thay cả pool (xem run_in_pool)
+    """
+    global _submitted
+    _submitted = 0
+    return ProcessPoolExecutor(
+        max_workers=config.WORKER_POOL_SIZE,
+        mp_context=_mp_context(),
+        initializer=_init_worker,
+        initargs=(worker_n_jobs(),),
+    )
+
+
+async def _spawn_workers(pool: ProcessPoolExecutor) -> list[tuple[int, int]]:
+    """
+    Gửi task rỗng buộc pool tạo đủ worker; mỗi worker warm-up trong initializer
+
+    Return:
+    - Kết quả _ping của từng task
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(pool, _ping) for _ in range(config.WORKER_POOL_SIZE))
+    )
+
+
+def _replace_pool(pool: ProcessPoolExecutor, cancel_futures: bool = False):
+    """
+    Thay pool bằng pool mới (worker mới), warm-up pool mới trong nền
+
+    Param:
+    - pool: Pool cũ; task đang chạy trong đó vẫn chạy xong
+    - cancel_futures: Huỷ các task chưa chạy của pool cũ (pool bị hỏng)
+    """
+    global _pool
+    _pool = _create_pool()
+    pool.shutdown(wait=False, cancel_futures=cancel_futures)
+    if config.WORKER_WARMUP:
+        task = asyncio.create_task(_spawn_workers(_pool))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+
+async def _warm_up(pool: ProcessPoolExecutor | None):
+    """
+    Tạo sẵn và warm-up toàn bộ worker (hoặc tiến trình hiện tại nếu không có
+    pool), ghi thời gian vào STARTUP_SECONDS{phase="warmup"}
+
+    Note:
+    - Manager cũng được khởi tạo sẵn: mỗi request đồng bộ cần một Event huỷ
+      (create_cancel_event)
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(get_manager)
+        if pool is None:
+            await asyncio.to_thread(warm_up_process)
+        else:
+            await _spawn_workers(pool)
+    except Exception as e:
+        print(f"⚠️ Warm-up worker huấn luyện thất bại: {e}")
+        return
+
+    seconds = time.perf_counter() - start
+    STARTUP_SECONDS.set(seconds, phase="warmup")
+    print(f"✅ Đã warm-up worker huấn luyện ({seconds:.2f} s)")
+
+
+async def start_executor():
+    """
+    Khởi tạo process pool, warm-up worker trong nền (WORKER_WARMUP)
+
+    Note:
+    - WORKER_POOL_SIZE = 0 → không tạo pool, các task chạy trong thread
+    - Không chờ warm-up: server nhận request ngay, worker được tạo khi cần
+    """
+    global _pool, _warmup_task
+    if _pool is None and config.WORKER_POOL_SIZE > 0:
+        _pool = _create_pool()
+        print(f"✅ Đã khởi tạo pool {config.WORKER_POOL_SIZE} worker huấn luyện")
+
+    if config.WORKER_WARMUP and _warmup_task is None:
+        _warmup_task = asyncio.create_task(_warm_up(_pool))
+
+
+async def stop_executor():
+    """
+    Tắt process pool, huỷ các task chưa chạy
+    """
+    global _pool, _manager, _warmup_task
+    if _warmup_task is not None:
+        task, _warmup_task = _warmup_task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    for task in list(_background):
+        task.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
+
+    if _manager is not None:
+        manager, _manager = _manager, None
+        await asyncio.to_thread(manager.shutdown)
+
+    if _pool is None:
+        return
+
+    pool, _pool = _pool, None
+    await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+    print("🛑 Đã tắt các worker huấn luyện")
+
+
+def get_manager():
+    """
+    Lấy multiprocessing Manager dùng chung (khởi tạo khi cần)
+
+    Return:
+    - SyncManager để tạo Queue / Event chia sẻ được giữa các tiến trình
+
+    Note:
+    - Proxy của Manager pickle được, nên có thể truyền vào hàm chạy trong pool
+    - Có thể gọi từ thread khác (job runner khởi tạo Manager trong nền)
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = _mp_context().Manager()
+        return _manager
+
+
+async def create_cancel_event():
+    """
+    Tạo event dùng để huỷ việc huấn luyện của một request
+
+    Note:
+    - Event của Manager: worker trong process pool và tiến trình con của
+      joblib (pickle proxy) đều đọc được, kể cả khi chạy trong thread
+    """
+    return await asyncio.to_thread(lambda: get_manager().Event())
+
+
+async def run_in_pool(func, /, *args, **kwargs):
+    """
+    Chạy hàm CPU-bound trong process pool mà không chặn event loop
+
+    Param:
+    - func: Hàm cần chạy (phải pickle được, tức là hàm cấp module)
+    - args, kwargs: Tham số truyền cho hàm
+
+    Return:
+    - Kết quả của func
+
+    Note:
+    - Nếu pool chưa được khởi tạo (ví dụ khi test không chạy lifespan)
+      thì hàm được chạy trong thread
+    - Nếu một worker chết bất thường, pool được tạo lại cho các request sau
+    - Sau WORKER_MAX_TASKS task mỗi worker (tính trung bình), pool được thay
+      bằng pool mới để giải phóng bộ nhớ mà worker giữ lại
+    """
+    global _submitted
+    call = functools.partial(func, *args, **kwargs)
+
+    pool = _pool
+    if pool is None:
+        return await asyncio.to_thread(call)
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(pool, call)
+    _submitted += 1
+    limit = config.WORKER_MAX_TASKS * config.WORKER_POOL_SIZE
+    if limit and _submitted >= limit and _pool is pool:
+        # Task vừa gửi vẫn chạy trong pool cũ
+        _replace_pool(pool)
+
+    try:
+        return await future
+    except BrokenProcessPool:
+        # Chỉ request đầu tiên phát hiện lỗi mới tạo lại pool
+        if _pool is pool:
+            print("⚠️ Process pool bị hỏng, đang khởi tạo lại...")
+            _replace_pool(pool, cancel_futures=True)
+        raise
@@ -0,0 +1,7 @@
+from app.utils.jobs.runner import (
+    JobQueueFull,
+    get_job_runner,
+    start_job_runner,
+    stop_job_runner,
+)
+from app.utils.jobs.store import MemoryJobStore, SQLiteJobStore
@@ -0,0 +1,174 @@
+import asyncio
+import functools
+import traceback
+import uuid
+from datetime import datetime, timezone
+
+from app import config
+from app.utils.executor import get_manager
+from app.utils.jobs.store import (
+    DONE,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    JobStore,
+    create_job_store,
+    expiry_threshold,
+)
+from app.utils.metrics import JOB_QUEUE_DEPTH
+
+
+class JobQueueFull(Exception):
+    """Hàng đợi job đã đầy, không nhận thêm job mới."""
+
+
+def _put_progress(queue, job_id: str, info: dict):
+    """
+    Callback tiến độ chạy trong worker: đẩy (job_id, info) về tiến trình chính
+    """
+    queue.put((job_id, info))
+
+
+class JobRunner:
+    """
+    Thực thi các job huấn luyện trong nền với số worker giới hạn
+
+    Param:
+    - store: Nơi lưu trạng thái job
+    - workers: Số job được chạy đồng thời
+    - queue_size: Số job tối đa được phép chờ
+    """
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int):
+        self.store = store
+        self._workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Giữ chỗ trong hàng đợi từ lúc kiểm tra tới lúc đưa job vào: các lần
+        # submit đồng thời không cùng vượt qua kiểm tra full() trong lúc chờ store
+        self._submit_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._progress_queue: asyncio.Task | None = None
+
+    async def start(self):
+        # Queue của Manager để worker trong process pool gửi tiến độ về; tạo
+        # trong nền vì tiến trình Manager chờ forkserver nạp xong sklearn
+        self._progress_queue = asyncio.create_task(
+            asyncio.to_thread(lambda: get_manager().Queue())
+        )
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self._workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._drain_progress()))
+
+    async def stop(self):
+        try:
+            (await self._progress_queue).put(None)
+        except Exception:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.store.close()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, kind: str, work, on_done) -> str:
+        """
+        Đưa một job vào hàng đợi
+
+        Param:
+        - kind: Loại job (option, best_model, stack_model)
+        - work: Coroutine function nhận callback progress, trả về kết quả huấn luyện
+        - on_done: Coroutine nhận kết quả của work, trả về dict kết quả cuối cùng
+
+        Return:
+        - job_id
+
+        Raises:
+        - JobQueueFull: Nếu hàng đợi đã đầy
+
+        Note:
+        - Kiểm tra chỗ trống, ghi job vào store và đưa vào hàng đợi nằm trong
+          cùng một lock: job đã ghi vào store luôn được đưa vào hàng đợi
+        """
+        async with self._submit_lock:
+            if self._queue.full():
+                raise JobQueueFull()
+
+            await self.store.purge(expiry_threshold())
+
+            now = datetime.now(timezone.utc)
+            job_id = uuid.uuid4().hex
+            await self.store.create(
+                {
+                    "job_id": job_id,
+                    "kind": kind,
+                    "status": QUEUED,
+                    "progress": None,
+                    "result": None,
+                    "error": None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            # Worker chỉ lấy job ra khỏi hàng đợi nên chỗ trống vẫn còn
+            self._queue.put_nowait((job_id, work, on_done))
+        return job_id
+
+    async def _worker(self):
+        while True:
+            job_id, work, on_done = await self._queue.get()
+            try:
+                await self.store.update(job_id, status=RUNNING)
+                progress = functools.partial(
+                    _put_progress, await self._progress_queue, job_id
+                )
+                result = await work(progress)
+                result = await on_done(result)
+                await self.store.update(job_id, status=DONE, result=result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                await self.store.update(job_id, status=FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _drain_progress(self):
+        queue = await self._progress_queue
+        while True:
+            item = await asyncio.to_thread(queue.get)
+            if item is None:
+                return
+            job_id, info = item
+            await self.store.update(job_id, progress=info)
+
+
+_runner: JobRunner | None = None
+
+
+async def start_job_runner():
+    """
+    Khởi tạo job runner theo cấu hình (JOB_STORE, JOB_WORKERS, JOB_QUEUE_SIZE)
+    """
+    global _runner
+    _runner = JobRunner(create_job_store(), config.JOB_WORKERS, config.JOB_QUEUE_SIZE)
+    await _runner.start()
+    JOB_QUEUE_DEPTH.set_function(lambda: _runner.queue_depth if _runner else 0)
+    print(f"✅ Đã khởi động job runner ({config.JOB_STORE})")
+
+
+async def stop_job_runner():
+    global _runner
+    if _runner is not None:
+        runner, _runner = _runner, None
+        await runner.stop()
+        print("🛑 Đã dừng job runner")
+
+
+def get_job_runner() -> JobRunner:
+    if _runner is None:
+        raise RuntimeError("Job runner chưa được khởi động")
+    return _runner
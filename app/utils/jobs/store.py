@@ -0,0 +1,189 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app import config
+from app.utils.panic import Panic
+
+# Trạng thái của một job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED = (DONE, FAILED)
+
+
+class JobStore:
+    """
+    Interface lưu trạng thái job
+
+    Mỗi job là một dict với các khóa:
+    - job_id, kind, status, progress, result, error, created_at, updated_at
+    """
+
+    async def create(self, job: dict):
+        Panic.unimplemented()
+
+    async def get(self, job_id: str) -> dict | None:
+        Panic.unimplemented()
+
+    async def update(self, job_id: str, **fields):
+        Panic.unimplemented()
+
+    async def purge(self, older_than: datetime):
+        Panic.unimplemented()
+
+    async def close(self):
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """
+    Lưu job trong bộ nhớ của tiến trình (mất khi khởi động lại)
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+
+    async def create(self, job: dict):
+        self._jobs[job["job_id"]] = dict(job)
+
+    async def get(self, job_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id: str, **fields):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields, updated_at=datetime.now(timezone.utc))
+
+    async def purge(self, older_than: datetime):
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED and job["updated_at"] < older_than
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Lưu job trong file SQLite cục bộ (giữ được qua các lần khởi động lại
+    và dùng chung được giữa nhiều tiến trình uvicorn trên cùng máy)
+    """
+
+    _JSON_FIELDS = ("progress", "result")
+    _TIME_FIELDS = ("created_at", "updated_at")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _encode(self, fields: dict) -> dict:
+        encoded = {}
+        for key, value in fields.items():
+            if key in self._JSON_FIELDS:
+                value = json.dumps(value) if value is not None else None
+            elif key in self._TIME_FIELDS:
+                value = value.isoformat()
+            encoded[key] = value
+        return encoded
+
+    def _decode(self, row: sqlite3.Row) -> dict:
+        job = dict(row)
+        for key in self._JSON_FIELDS:
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        for key in self._TIME_FIELDS:
+            # Bản ghi cũ lưu giờ địa phương không có múi giờ → đổi sang UTC
+            job[key] = datetime.fromisoformat(job[key]).astimezone(timezone.utc)
+        return job
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._decode(row) if row is not None else None
+
+    async def create(self, job: dict):
+        fields = self._encode(job)
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        await asyncio.to_thread(
+            self._execute,
+            f"INSERT INTO jobs ({columns}) VALUES ({placeholders})",
+            tuple(fields.values()),
+        )
+
+    async def get(self, job_id: str) -> dict | None:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def update(self, job_id: str, **fields):
+        fields = self._encode({**fields, "updated_at": datetime.now(timezone.utc)})
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        await asyncio.to_thread(
+            self._execute,
+            f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+            (*fields.values(), job_id),
+        )
+
+    async def purge(self, older_than: datetime):
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (*FINISHED, older_than.isoformat()),
+        )
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store() -> JobStore:
+    """
+    Tạo job store theo cấu hình JOB_STORE
+
+    Raises:
+    - ValueError: Nếu JOB_STORE không hợp lệ
+    """
+    match config.JOB_STORE.lower():
+        case "memory":
+            return MemoryJobStore()
+        case "sqlite":
+            return SQLiteJobStore(config.JOB_STORE_PATH)
+        case _:
+            raise ValueError(f"JOB_STORE không hợp lệ: {config.JOB_STORE}")
+
+
+def expiry_threshold() -> datetime:
+    """
+    Mốc thời gian mà các job kết thúc trước đó sẽ bị xoá
+    """
+    return datetime.now(timezone.utc) - timedelta(seconds=config.JOB_TTL_SECONDS)
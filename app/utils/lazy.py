@@ -0,0 +1,33 @@
+import importlib
+
+
+class LazyImport:
+    """
+    Hàm / class chỉ được import ở lần gọi đầu tiên
+
+    Param:
+    - module: Tên module chứa đối tượng
+    - name: Tên đối tượng trong module
+
+    Note:
+    - Pickle theo (module, name) nên truyền được sang process pool: tiến
+      trình chính không phải import module nặng (sklearn) chỉ để gửi task
+    """
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self.__name__ = name
+
+    def resolve(self):
+        # import_module trả ngay module đã có trong sys.modules
+        return getattr(importlib.import_module(self.module), self.name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return LazyImport, (self.module, self.name)
+
+    def __repr__(self) -> str:
+        return f"LazyImport({self.module}.{self.name})"
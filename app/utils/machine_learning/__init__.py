@@ -1,3 +1,22 @@
-from app.utils.machine_learning.run_option import run_option_model
-from app.utils.machine_learning.run_best_model import run_best_model
-from app.utils.machine_learning.run_stack_model import run_stack_model
+from app.utils.lazy import LazyImport
+
+# Hàm huấn luyện: chỉ import (kéo theo sklearn) khi được gọi, để tiến trình
+# web khởi động nhanh; việc huấn luyện chạy trong process pool
+run_option_model = LazyImport(
+    "app.utils.machine_learning.run_option", "run_option_model"
+)
+run_best_model = LazyImport(
+    "app.utils.machine_learning.run_best_model", "run_best_model"
+)
+run_stack_model = LazyImport(
+    "app.utils.machine_learning.run_stack_model", "run_stack_model"
+)
+run_stream_model = LazyImport(
+    "app.utils.machine_learning.run_stream", "run_stream_model"
+)
+create_session_model = LazyImport(
+    "app.utils.machine_learning.run_session", "create_session_model"
+)
+append_session_model = LazyImport(
+    "app.utils.machine_learning.run_session", "append_session_model"
+)
@@ -1,21 +1,19 @@
 import numpy as np
 import pandas as pd
 
-def classify(X: np.ndarray, x0: np.ndarray):
+def classify_stats(X: np.ndarray):
     """
-    Phân loại mỗi dòng trong x0 theo meta-logic (stacking, voting, elastic, decision_tree).
-    
+    Tính các thống kê của X dùng cho classify
+
     Parameters
     ----------
     X : np.ndarray
         Dữ liệu gốc (n_samples, n_features)
-    x0 : np.ndarray
-        Dữ liệu mới cần phân loại (m_samples, n_features)
-    
+
     Returns
     -------
-    labels : list[str]
-        Nhãn (tên mô hình) cho mỗi dòng trong x0
+    stats : tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Q1, Q2, Q3 và ngưỡng "gần" (0.5 * std) cho từng feature
     """
 
     # Tính Q1, Q2, Q3 và std cho từng feature
@@ -27,61 +25,76 @@ def classify(X: np.ndarray, x0: np.ndarray):
     # Ngưỡng "gần"
     thresh = 0.5 * std
 
-    labels = []
-    for row in x0:
-        near_Q2, near_Q13, far = 0, 0, 0
-
-        for j, val in enumerate(row):
-            if abs(val - Q2[j]) <= thresh[j]:
-                near_Q2 += 1
-            elif abs(val - Q1[j]) <= thresh[j] or abs(val - Q3[j]) <= thresh[j]:
-                near_Q13 += 1
-            else:
-                far += 1
-
-        n_feat = row.shape[0]
-
-        # Logic phân loại
-        if n_feat == 1:
-            if near_Q2 == 1:
-                labels.append("stacking")
-            elif near_Q13 == 1:
-                labels.append("voting")
-            else:
-                labels.append("elastic")
-
-        elif n_feat == 2:
-            if near_Q2 == 2:
-                labels.append("stacking")
-            elif near_Q2 == 1 and near_Q13 == 1:
-                labels.append("stacking")
-            elif near_Q13 == 2:
-                labels.append("voting")
-            elif near_Q2 == 1 and far == 1:
-                labels.append("voting")
-            elif near_Q13 == 1 and far == 1:
-                labels.append("elastic")
-            else:  # far == 2
-                labels.append("elastic")
-
-        else:  # n_feat >= 3
-            if near_Q2 >= (2 * n_feat // 3):
-                labels.append("stacking")
-            elif near_Q2 >= (n_feat // 3) and near_Q13 >= (n_feat // 3):
-                labels.append("stacking")
-            elif near_Q13 >= (2 * n_feat // 3):
-                labels.append("voting")
-            elif near_Q2 >= (n_feat // 3) and far >= (n_feat // 3):
-                labels.append("voting")
-            elif near_Q13 >= (n_feat // 3) and far >= (n_feat // 3):
-                labels.append("decision_tree")
-            elif far >= (2 * n_feat // 3):
-                labels.append("elastic")
-            else:
-                if near_Q2 >= near_Q13 and near_Q2 >= far:
-                    labels.append("stacking")
-                elif near_Q13 >= near_Q2 and near_Q13 >= far:
-                    labels.append("voting")
-                else:
-                    labels.append("elastic")
-    return labels
+    return Q1, Q2, Q3, thresh
+
+
+def classify(X: np.ndarray, x0: np.ndarray, stats=None):
+    """
+    Phân loại mỗi dòng trong x0 theo meta-logic (stacking, voting, elastic, decision_tree).
+    
+    Parameters
+    ----------
+    X : np.ndarray
+        Dữ liệu gốc (n_samples, n_features)
+    x0 : np.ndarray
+        Dữ liệu mới cần phân loại (m_samples, n_features)
+    stats : tuple, optional
+        Kết quả classify_stats(X) đã tính sẵn (khi đó X có thể là None)
+    
+    Returns
+    -------
+    labels : list[str]
+        Nhãn (tên mô hình) cho mỗi dòng trong x0
+
+    Notes
+    -----
+    Tính trên toàn bộ x0 bằng phép toán mảng, không lặp từng dòng
+    """
+
+    Q1, Q2, Q3, thresh = stats if stats is not None else classify_stats(X)
+
+    x0 = np.asarray(x0)
+    n_feat = x0.shape[1]
+
+    # Đếm số feature gần Q2, gần Q1/Q3 và xa của mọi dòng cùng lúc
+    is_near_Q2 = np.abs(x0 - Q2) <= thresh
+    is_near_Q13 = ~is_near_Q2 & (
+        (np.abs(x0 - Q1) <= thresh) | (np.abs(x0 - Q3) <= thresh)
+    )
+    near_Q2 = is_near_Q2.sum(axis=1)
+    near_Q13 = is_near_Q13.sum(axis=1)
+    far = n_feat - near_Q2 - near_Q13
+
+    # Logic phân loại (điều kiện đứng trước được ưu tiên)
+    if n_feat == 1:
+        rules = [
+            (near_Q2 == 1, "stacking"),
+            (near_Q13 == 1, "voting"),
+        ]
+        default = "elastic"
+
+    elif n_feat == 2:
+        rules = [
+            (near_Q2 == 2, "stacking"),
+            ((near_Q2 == 1) & (near_Q13 == 1), "stacking"),
+            (near_Q13 == 2, "voting"),
+            ((near_Q2 == 1) & (far == 1), "voting"),
+        ]
+        default = "elastic"  # near_Q13 == 1 và far == 1, hoặc far == 2
+
+    else:  # n_feat >= 3
+        third, two_thirds = n_feat // 3, 2 * n_feat // 3
+        rules = [
+            (near_Q2 >= two_thirds, "stacking"),
+            ((near_Q2 >= third) & (near_Q13 >= third), "stacking"),
+            (near_Q13 >= two_thirds, "voting"),
+            ((near_Q2 >= third) & (far >= third), "voting"),
+            ((near_Q13 >= third) & (far >= third), "decision_tree"),
+            (far >= two_thirds, "elastic"),
+            ((near_Q2 >= near_Q13) & (near_Q2 >= far), "stacking"),
+            ((near_Q13 >= near_Q2) & (near_Q13 >= far), "voting"),
+        ]
+        default = "elastic"
+
+    conditions, choices = zip(*rules)
+    return np.select(conditions, choices, default=default).tolist()
@@ -0,0 +1,81 @@
+from contextvars import ContextVar
+
+
+class Cancelled(Exception):
+    """Request đã bị huỷ (client ngắt kết nối), dừng huấn luyện."""
+
+
+# Event huỷ của request đang huấn luyện, None = không huỷ được
+_cancel: ContextVar = ContextVar("cancel", default=None)
+
+
+def report_progress(progress, **info):
+    """
+    Gửi thông tin tiến độ huấn luyện cho người gọi (nếu có)
+
+    Param:
+    - progress: Callable nhận một dict, hoặc None
+    - info: Thông tin tiến độ (stage, model, ...)
+
+    Note:
+    - Lỗi khi gửi tiến độ không được làm hỏng quá trình huấn luyện
+    """
+    if progress is None:
+        return
+
+    try:
+        progress(info)
+    except Exception as e:
+        print(f"Lỗi khi gửi tiến độ: {e}")
+
+
+def call_with_cancel(cancel, func, /, *args, **kwargs):
+    """
+    Gọi func với event huỷ cancel (dùng trong process pool / joblib)
+
+    Param:
+    - cancel: Event (Manager Event hoặc threading.Event), None = không huỷ được
+    - func, args, kwargs: Hàm huấn luyện và tham số
+
+    Note:
+    - Code huấn luyện kiểm tra event ở ranh giới mô hình / fold bằng
+      check_cancelled(); tiến trình con (joblib) phải được gọi lại qua
+      call_with_cancel(current_cancel(), ...) để thấy event
+    """
+    token = _cancel.set(cancel)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _cancel.reset(token)
+
+
+def current_cancel():
+    return _cancel.get()
+
+
+def is_cancelled() -> bool:
+    """
+    Request hiện tại đã bị huỷ hay chưa
+
+    Note:
+    - Lỗi khi đọc event (vd: Manager đã tắt) được coi là chưa huỷ
+    """
+    cancel = _cancel.get()
+    if cancel is None:
+        return False
+    try:
+        return cancel.is_set()
+    except (OSError, EOFError) as e:
+        print(f"Lỗi khi đọc trạng thái huỷ: {e}")
+        return False
+
+
+def check_cancelled():
+    """
+    Dừng huấn luyện nếu request đã bị huỷ (gọi ở ranh giới mô hình / fold)
+
+    Raises:
+    - Cancelled: Nếu request đã bị huỷ
+    """
+    if is_cancelled():
+        raise Cancelled()
@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+
+from app.utils.panic import Panic
+
+# Các mô hình ứng viên của best-model
+CANDIDATE_MODELS = ["linear", "elastic", "decision_tree", "random_forest", "svr", "knn"]
+
+# Ước lượng số giây huấn luyện đầy đủ (gồm cả search) của từng mô hình theo số
+# dòng n và số cột p, đo trên một máy tham chiếu. Dùng để xếp ứng viên rẻ trước,
+# đoán ứng viên còn kịp chạy khi có time_budget_ms và để admission control
+# ước lượng chi phí request
+MODEL_COST = {
+    "linear": lambda n, p: 1e-3 + 1e-9 * n * p * p,
+    "ridge": lambda n, p: 5e-3 + 1e-9 * n * p * p,
+    "lasso": lambda n, p: 0.015 + 1e-8 * n * p * p,
+    "elastic": lambda n, p: 0.03 + 1e-8 * n * p * p,
+    "bayesian": lambda n, p: 2e-3 + 1e-9 * n * p * p,
+    "huber": lambda n, p: 5e-3 + 1e-9 * n * p * p,
+    "ransac": lambda n, p: 0.02 + 1e-4 * p * p,
+    "theilsen": lambda n, p: 2.2e-3 * n**0.7 * p**0.45,
+    "decision_tree": lambda n, p: 0.1 + 1.5e-6 * n * np.log2(n) * p,
+    "extra_tree": lambda n, p: 0.1 + 2e-7 * n * np.log2(n) * p,
+    "random_forest": lambda n, p: 1.4 + 3e-5 * n * np.log2(n) * np.sqrt(p),
+    "svr": lambda n, p: 0.1 + 3e-7 * n * n * p,
+    "nu_svr": lambda n, p: 0.1 + 7e-7 * n * n * p,
+    "knn": lambda n, p: 0.1 + 1.7e-6 * n**1.5 * np.sqrt(p),
+}
+
+# Bộ nhớ (byte) cần thêm ngoài dữ liệu: cache kernel của SVR / NuSVR
+# (cache_size mặc định 200 MB)
+MODEL_MEMORY = {
+    "svr": lambda n, p: min(8 * n * n, 200 * 1024**2),
+    "nu_svr": lambda n, p: min(8 * n * n, 200 * 1024**2),
+}
+
+# Số bản sao dữ liệu mà worker giữ cùng lúc (bản nhận từ request, train/test,
+# các fold)
+DATA_COPIES = 4
+
+# Tốc độ (byte/giây) đọc và học CSV của huấn luyện streaming
+STREAM_BYTES_PER_SECOND = 2e7
+
+
+def model_key(model_name: str) -> str:
+    """
+    Tên mô hình trong MODELS ứng với tên mô hình người dùng gửi
+
+    Raises:
+    - Panic: Nếu không có mô hình này
+    """
+    match model_name.lower():
+        case "linear" | "linear_regression" | "":
+            return "linear"
+        case "lasso" | "lasso_regression":
+            return "lasso"
+        case "ridge" | "ridge_regression":
+            return "ridge"
+        case "elastic" | "elastic_regression":
+            return "elastic"
+        case "polynomial" | "polynomial_regression":
+            return "linear"
+        case "bayesian":
+            return "bayesian"
+        case "decision_tree":
+            return "decision_tree"
+        case "extra_tree":
+            return "extra_tree"
+        case "random_forest":
+            return "random_forest"
+        case "svm":
+            return "svr"
+        case "nu_svm":
+            return "nu_svr"
+        case "knn":
+            return "knn"
+        case "huber":
+            return "huber"
+        case "ransac":
+            return "ransac"
+        case "theilsen" | "theil_sen":
+            return "theilsen"
+        case _:
+            Panic.unreachable("Không có mô hình này")
+
+
+def model_cost(model_name: str, n_samples: int, n_features: int) -> float:
+    """
+    Số giây ước lượng để huấn luyện đầy đủ một mô hình (MODEL_COST)
+
+    Param:
+    - model_name: Tên mô hình trong MODELS (tên người dùng gửi phải qua model_key)
+
+    Note:
+    - Mô hình không có trong bảng được ước lượng như linear
+    """
+    cost = MODEL_COST.get(model_name, MODEL_COST["linear"])
+    return float(cost(max(n_samples, 2), max(n_features, 1)))
+
+
+def request_cost(
+    kind: str,
+    n_samples: int,
+    n_features: int,
+    model_name: str | None = None,
+    time_budget_ms: int | None = None,
+    n_bytes: int = 0,
+) -> tuple[float, int]:
+    """
+    Ước lượng chi phí của một request huấn luyện
+
+    Param:
+    - kind: Loại request (option, best_model, stack_model, stream, session)
+    - n_samples, n_features: Kích thước X
+    - model_name: Tên mô hình người dùng gửi (option, session), như model_key
+    - time_budget_ms: Ngân sách thời gian của best-model (tùy chọn)
+    - n_bytes: Kích thước file CSV (stream)
+
+    Return:
+    - (số giây CPU, số byte bộ nhớ) ước lượng
+
+    Note:
+    - best-model huấn luyện mọi ứng viên: chi phí là tổng, bị chặn bởi
+      time_budget_ms nhân số CPU nếu có ngân sách
+    - stack-model fit elastic và cây quyết định (không search) trên mỗi fold
+      của stacking (log2(n) fold) và một lần trên toàn bộ dữ liệu
+    - stream học theo từng khối: bộ nhớ không phụ thuộc kích thước file
+    """
+    n, p = max(n_samples, 2), max(n_features, 1)
+    memory = DATA_COPIES * 8 * n * p
+
+    if kind == "stream":
+        return n_bytes / STREAM_BYTES_PER_SECOND, 0
+
+    if kind == "best_model":
+        seconds = sum(model_cost(name, n, p) for name in CANDIDATE_MODELS)
+        if time_budget_ms is not None:
+            seconds = min(seconds, time_budget_ms / 1000 * (os.cpu_count() or 1))
+        memory += max(
+            MODEL_MEMORY[name](n, p)
+            for name in CANDIDATE_MODELS
+            if name in MODEL_MEMORY
+        )
+        return seconds, memory
+
+    if kind == "stack_model":
+        per_fold = model_cost("elastic", n, p) + model_cost("decision_tree", n, p) / 12
+        return (2 + np.log2(n)) * per_fold, memory
+
+    # Tên người dùng gửi ("svm", "Theil_Sen", ...) → tên trong bảng ("svr", ...);
+    # tên không hợp lệ sẽ bị từ chối khi huấn luyện, ở đây ước lượng như linear
+    try:
+        key = model_key(model_name or "")
+    except Panic:
+        key = "linear"
+    if key in MODEL_MEMORY:
+        memory += MODEL_MEMORY[key](n, p)
+    return model_cost(key, n, p), memory
@@ -32,14 +32,15 @@ def prepare_input(
     - x0: Mảng dự đoán đã chuẩn bị (nếu x0 không phải None)
     """
 
-    X = np.array(X, dtype=float)
-    Y = np.array(Y, dtype=float).ravel()  # luôn là 1D
+    # asarray: không copy nếu đã là mảng float (body nhị phân)
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float).ravel()  # luôn là 1D
 
     if X.ndim == 1:
         X = X.reshape(-1, 1)
 
     if x0 is not None:
-        x0 = np.array(x0, dtype=float)
+        x0 = np.asarray(x0, dtype=float)
 
         if x0.ndim == 1:
             x0 = x0.reshape(1, -1)
@@ -55,7 +56,31 @@ def prepare_input(
 # --------------------------------
 # Phân chia mô hình
 # --------------------------------
-def splitting_data(X: np.ndarray, Y: np.ndarray):
+def holdout_fraction(n_samples: int) -> float | None:
+    """
+    Tỉ lệ dữ liệu dành cho tập kiểm tra theo số dòng (xem splitting_data)
+
+    Return:
+    - Tỉ lệ tập kiểm tra, hoặc None nếu không chia (dưới 10 dòng)
+
+    Raises:
+    - Panic: Nếu số dòng không thuộc nhánh nào (không nên xảy ra)
+    """
+    if n_samples < 10:
+        return None
+    elif 10 <= n_samples <= 100:
+        return min(5 / n_samples, 0.2)
+    elif 100 <= n_samples <= 500:
+        return 0.1
+    elif 500 <= n_samples <= 1000:
+        return 0.15
+    elif 1000 <= n_samples:
+        return 0.2
+    else:
+        Panic.unreachable("Không nên tới nhánh else trong holdout_fraction")
+
+
+def splitting_data(X: np.ndarray, Y: np.ndarray, random_state: int | None = None):
     """
     Hàm dùng để phân chia dữ liệu theo tiêu chí:
     - Nếu dữ liệu chỉ có 10 dòng: Training data 100%, Testing data 0%
@@ -67,6 +92,7 @@ def splitting_data(X: np.ndarray, Y: np.ndarray):
     Param:
     - X: Mảng X
     - Y: Mảng Y
+    - random_state: Seed cho việc chia dữ liệu (None = ngẫu nhiên mỗi lần gọi)
 
     Return:
     - X_train: Mảng X huấn luyện
@@ -84,16 +110,7 @@ def splitting_data(X: np.ndarray, Y: np.ndarray):
         X = X.reshape(-1, 1)
 
     # Phân chia dữ liệu
-    if Y.shape[0] < 10:
+    fraction = holdout_fraction(Y.shape[0])
+    if fraction is None:
         return X, X, Y, Y
-    elif 10 <= Y.shape[0] <= 100:
-        return train_test_split(X, Y, train_size=1 - min(5 / Y.shape[0], 0.2))
-    elif 100 <= Y.shape[0] <= 500:
-        return train_test_split(X, Y, train_size=0.9)
-    elif 500 <= Y.shape[0] <= 1000:
-        return train_test_split(X, Y, train_size=0.85)
-    elif 1000 <= Y.shape[0]:
-        return train_test_split(X, Y, train_size=0.8)
-    else:
-        Panic.unreachable("Không nên tới nhánh else trong splitting_data")
-    
\ No newline at end of file
+    return train_test_split(X, Y, train_size=1 - fraction, random_state=random_state)
@@ -0,0 +1,204 @@
+import time
+from functools import cached_property
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+
+from app.utils.machine_learning.control import check_cancelled
+from app.utils.machine_learning.linear_path import LINEAR_FAMILY, LinearFamily
+
+
+class FoldPlan:
+    """
+    Kế hoạch chia fold dùng chung cho mọi mô hình trong một request
+
+    Param:
+    - X_train: Mảng X huấn luyện (2D)
+    - Y_train: Mảng Y huấn luyện (1D)
+    - n_splits: Số fold (mặc định 3, giống cv=3 của sklearn)
+
+    Note:
+    - Fold giống hệt KFold(n_splits) không xáo trộn mà cv=3 của sklearn dùng
+      cho mô hình hồi quy, nên chỉ số đánh giá không đổi
+    - Các mảng của từng fold được copy (liền bộ nhớ) một lần duy nhất,
+      mọi mô hình và mọi bộ tham số dùng lại chung
+    """
+
+    def __init__(self, X_train: np.ndarray, Y_train: np.ndarray, n_splits: int = 3):
+        self.X = X_train
+        self.Y = Y_train
+        self.n_splits = n_splits
+        self.splits = list(KFold(n_splits=n_splits).split(X_train))
+
+    def __len__(self) -> int:
+        return self.n_splits
+
+    def matches(self, X, Y) -> bool:
+        """
+        Kiểm tra X, Y có đúng là dữ liệu mà kế hoạch được tạo từ đó
+        """
+        return (X is self.X and Y is self.Y) or (
+            np.shape(X) == self.X.shape
+            and np.array_equal(X, self.X)
+            and np.array_equal(Y, self.Y)
+        )
+
+    @cached_property
+    def folds(self) -> list[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Các mảng (X_train, Y_train, X_val, Y_val) liền bộ nhớ của từng fold
+        """
+        return [
+            (
+                np.ascontiguousarray(self.X[train]),
+                np.ascontiguousarray(self.Y[train]),
+                np.ascontiguousarray(self.X[val]),
+                np.ascontiguousarray(self.Y[val]),
+            )
+            for train, val in self.splits
+        ]
+
+    @cached_property
+    def linear_family(self) -> LinearFamily:
+        """
+        Thống kê Gram (XᵀX, Xᵀy) của từng fold cho linear, ridge, lasso, elastic
+        """
+        return LinearFamily(self)
+
+    def prepare(self, models) -> "FoldPlan":
+        """
+        Tính sẵn các mảng fold (và thống kê Gram nếu có mô hình họ tuyến tính)
+        trước khi gửi kế hoạch sang các tiến trình khác
+
+        Param:
+        - models: Tên các mô hình sẽ dùng kế hoạch này
+
+        Return:
+        - Chính kế hoạch này
+
+        Note:
+        - folds và linear_family là cached_property được pickle cùng kế hoạch:
+          tính một lần ở đây thay vì mỗi tiến trình ứng viên tự tính lại
+        """
+        # Đọc cached_property để tính và lưu lại trong kế hoạch
+        self.folds
+        if any(name in LINEAR_FAMILY for name in models):
+            self.linear_family
+        return self
+
+
+def _fit_and_score(estimator, params, X_train, Y_train, X_val, Y_val) -> float:
+    # Request bị huỷ thì dừng trước fold tiếp theo
+    check_cancelled()
+    # Lỗi của một bộ tham số được coi là điểm kém nhất (giống error_score=nan)
+    try:
+        model = clone(estimator).set_params(**params).fit(X_train, Y_train)
+        return r2_score(Y_val, model.predict(X_val))
+    except Exception as e:
+        print(f"Lỗi khi fit {type(estimator).__name__} với {params}: {e}")
+        return np.nan
+
+
+class FoldSearchCV(RegressorMixin, BaseEstimator):
+    """
+    Tìm tham số tốt nhất trên các fold của FoldPlan (thay cho GridSearchCV /
+    RandomizedSearchCV khi có kế hoạch fold dùng chung)
+
+    Param:
+    - estimator: Mô hình gốc
+    - plan: FoldPlan của request
+    - param_grid: Lưới tham số (như GridSearchCV)
+    - param_distributions, n_iter: Phân phối tham số (như RandomizedSearchCV)
+    - random_state: Seed lấy mẫu tham số
+    - n_jobs: Số tiến trình chạy song song các (tham số, fold)
+    - deadline: Thời điểm (time.time()) phải dừng thử bộ tham số mới (tùy chọn)
+
+    Note:
+    - Chọn tham số có R² trung bình cao nhất, bằng nhau thì lấy bộ đứng trước
+      (giống rank_test_score của sklearn), rồi fit lại trên toàn bộ dữ liệu
+    - Có deadline: các bộ tham số được thử lần lượt, dừng khi bộ tiếp theo
+      (ước lượng theo thời gian trung bình của các bộ đã thử) cùng lần fit lại
+      không còn kịp; luôn thử ít nhất một bộ. cut_short_ = True nếu dừng sớm
+    """
+
+    def __init__(
+        self,
+        estimator,
+        plan: FoldPlan,
+        param_grid=None,
+        param_distributions=None,
+        n_iter=10,
+        random_state=None,
+        n_jobs=None,
+        deadline=None,
+    ):
+        self.estimator = estimator
+        self.plan = plan
+        self.param_grid = param_grid
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.deadline = deadline
+
+    def _candidate_params(self) -> list[dict]:
+        if self.param_grid is not None:
+            return list(ParameterGrid(self.param_grid))
+        return list(
+            ParameterSampler(
+                self.param_distributions, self.n_iter, random_state=self.random_state
+            )
+        )
+
+    def _score(self, candidates: list[dict]) -> np.ndarray:
+        """
+        R² của từng (bộ tham số, fold), dạng (số bộ tham số, số fold)
+        """
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(self.estimator, params, *fold)
+            for params in candidates
+            for fold in self.plan.folds
+        )
+        return np.asarray(scores, dtype=float).reshape(len(candidates), -1)
+
+    def _score_until_deadline(self, candidates: list[dict]) -> np.ndarray:
+        start = time.time()
+        scores = []
+        for params in candidates:
+            if scores:
+                # Mỗi fold train trên (k-1)/k số dòng: lần fit lại trên toàn bộ
+                # dữ liệu tốn khoảng một fold
+                per_params = (time.time() - start) / len(scores)
+                refit = per_params / len(self.plan)
+                if time.time() + per_params + refit > self.deadline:
+                    break
+            scores.extend(self._score([params]))
+        return np.asarray(scores, dtype=float)
+
+    def fit(self, X, Y):
+        if not self.plan.matches(X, Y):
+            raise ValueError("FoldSearchCV chỉ fit được trên dữ liệu của FoldPlan")
+
+        candidates = self._candidate_params()
+        if self.deadline is None:
+            scores = self._score(candidates)
+        else:
+            scores = self._score_until_deadline(candidates)
+        self.cut_short_ = len(scores) < len(candidates)
+        candidates = candidates[: len(scores)]
+        mean_scores = scores.mean(axis=1)
+
+        best = int(np.argmax(np.where(np.isnan(mean_scores), -np.inf, mean_scores)))
+        self.cv_scores_ = scores
+        self.best_params_ = candidates[best]
+        self.best_score_ = mean_scores[best]
+        self.best_estimator_ = (
+            clone(self.estimator).set_params(**self.best_params_).fit(X, Y)
+        )
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
@@ -0,0 +1,430 @@
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import enet_path
+
+# Các mô hình được giải từ ma trận Gram dùng chung
+LINEAR_FAMILY = ("linear", "ridge", "lasso", "elastic")
+
+# Ngưỡng λ_min / λ_max của XᵀX: dưới ngưỡng này giải qua Gram mất chính xác
+# (số điều kiện bị bình phương) nên quay về mô hình sklearn gốc
+_MIN_EIGEN_RATIO = 1e-8
+
+
+def _block_stats(X_block: np.ndarray, Y_block: np.ndarray) -> dict:
+    return {
+        "n": X_block.shape[0],
+        "x": X_block.sum(axis=0),
+        "y": Y_block.sum(),
+        "xx": X_block.T @ X_block,
+        "xy": X_block.T @ Y_block,
+        "yy": Y_block @ Y_block,
+    }
+
+
+def _centered(stats: dict) -> tuple:
+    """
+    Gram, Xᵀy, yᵀy đã căn giữa theo trung bình của chính tập dữ liệu đó
+
+    Return:
+    - (gram, xy, yy, x_mean, y_mean)
+    """
+    n = stats["n"]
+    x_mean = stats["x"] / n
+    y_mean = stats["y"] / n
+    gram = stats["xx"] - n * np.outer(x_mean, x_mean)
+    xy = stats["xy"] - n * x_mean * y_mean
+    yy = stats["yy"] - n * y_mean**2
+    return gram, xy, yy, x_mean, y_mean
+
+
+def _gram_path(gram, xy, yy, n_samples, alphas, l1_ratio, max_iter):
+    """
+    Coordinate descent theo đường alpha trên ma trận Gram đã tính sẵn
+
+    Return:
+    - Ma trận hệ số (n_features, n_alphas) theo thứ tự alphas giảm dần
+
+    Note:
+    - Với precompute là ma trận Gram, enet_path chỉ dùng X để lấy kích thước
+      và y để lấy ‖y‖² (dung sai, dual gap), nên truyền X rỗng (broadcast,
+      không cấp phát) và y một phần tử có cùng chuẩn thay cho dữ liệu thật
+    """
+    n_features = gram.shape[0]
+    X_shape_only = np.broadcast_to(np.float64(0.0), (n_samples, n_features))
+    y_norm_only = np.array([np.sqrt(max(yy, 0.0))])
+
+    _, coefs, _ = enet_path(
+        X_shape_only,
+        y_norm_only,
+        l1_ratio=l1_ratio,
+        alphas=alphas,
+        precompute=np.ascontiguousarray(gram),
+        Xy=np.ascontiguousarray(xy),
+        check_input=False,
+        max_iter=max_iter,
+        tol=1e-4,
+    )
+    return coefs
+
+
+class LinearFamily:
+    """
+    Thống kê đủ (XᵀX, Xᵀy, ...) của một FoldPlan cho nhóm mô hình tuyến tính
+
+    Param:
+    - plan: FoldPlan của request
+
+    Note:
+    - Tính một lần cho mỗi request: thống kê của từng khối validation, thống kê
+      của tập train trong mỗi fold = tổng - khối đó (không copy lại X)
+    - Dữ liệu được dời về trung bình của tập train trước khi tính để giảm sai số
+    - linear và ridge dùng chung một lần phân rã trị riêng của XᵀX
+    - lasso và elastic chạy coordinate descent trên Gram của từng fold
+    """
+
+    def __init__(self, plan):
+        X, Y = plan.X, plan.Y
+        self.n_samples, self.n_features = X.shape
+        self.X_mean = X.mean(axis=0)
+        self.Y_mean = Y.mean()
+        self._plan = plan
+
+        # KFold không xáo trộn: các khối validation là các đoạn liên tiếp
+        self.blocks = []
+        for _, val in plan.splits:
+            block = slice(val[0], val[-1] + 1)
+            self.blocks.append(
+                _block_stats(X[block] - self.X_mean, Y[block] - self.Y_mean)
+            )
+
+        self.total = {
+            key: sum(block[key] for block in self.blocks) for key in self.blocks[0]
+        }
+        self.gram, self.xy, self.yy, _, _ = _centered(self.total)
+        self.eigvals, self.eigvecs = np.linalg.eigh(self.gram)
+
+    @property
+    def applicable(self) -> bool:
+        """
+        Dữ liệu cao-gầy và XᵀX đủ điều kiện để giải qua Gram
+        """
+        top = self.eigvals[-1]
+        return (
+            self.n_samples > self.n_features
+            and top > 0
+            and self.eigvals[0] / top > _MIN_EIGEN_RATIO
+        )
+
+    def _train_stats(self, fold: int) -> dict:
+        return {key: self.total[key] - self.blocks[fold][key] for key in self.total}
+
+    def _intercept(self, coef: np.ndarray) -> float:
+        return self.Y_mean - self.X_mean @ coef
+
+    def linear(self) -> tuple[np.ndarray, dict]:
+        """
+        Bình phương tối thiểu: w = (XᵀX)⁻¹ Xᵀy qua phân rã trị riêng
+        """
+        coef = self.eigvecs @ ((self.eigvecs.T @ self.xy) / self.eigvals)
+        return coef, {}
+
+    def ridge(self, alphas) -> tuple[np.ndarray, dict]:
+        """
+        Ridge cho mọi alpha, chọn alpha theo leave-one-out (GCV) như RidgeCV
+
+        Note:
+        - Với Q = X V: ŷ(α) = Q diag(1/(λ+α)) Qᵀy, h_ii(α) = Σ Q_ij²/(λ_j+α) + 1/n
+        """
+        X, Y = self._plan.X, self._plan.Y
+        V, eigvals = self.eigvecs, self.eigvals
+        # Căn giữa X trước khi nhân: X @ V - mean @ V mất chính xác khi cột có
+        # trung bình lớn so với độ lệch chuẩn
+        Q = (X - self.X_mean) @ V
+        Q_squared = Q**2
+        Y_centered = Y - self.Y_mean
+        Qy = Q.T @ Y_centered
+
+        best_alpha, best_mse = None, np.inf
+        for alpha in alphas:
+            d = 1.0 / (eigvals + alpha)
+            hat = Q_squared @ d + 1.0 / self.n_samples
+            loo = (Y_centered - Q @ (d * Qy)) / (1.0 - hat)
+            mse = np.mean(loo**2)
+            if mse < best_mse:
+                best_alpha, best_mse = alpha, mse
+
+        coef = V @ ((V.T @ self.xy) / (eigvals + best_alpha))
+        return coef, {"alpha_": best_alpha}
+
+    def elastic(self, alphas, l1_ratios, max_iter) -> tuple[np.ndarray, dict]:
+        """
+        Elastic-net / lasso: chọn (l1_ratio, alpha) theo MSE trung bình trên
+        các fold như ElasticNetCV / LassoCV, rồi fit lại trên toàn bộ tập train
+
+        Note:
+        - MSE của khối validation tính từ thống kê của khối, không cần X_val
+        """
+        alphas = np.sort(np.asarray(alphas, dtype=float))[::-1]
+        l1_ratios = np.atleast_1d(l1_ratios)
+        mean_mse = np.zeros((len(l1_ratios), len(alphas)))
+
+        for fold, block in enumerate(self.blocks):
+            train = self._train_stats(fold)
+            gram, xy, yy, x_mean, y_mean = _centered(train)
+
+            for i, l1_ratio in enumerate(l1_ratios):
+                W = _gram_path(gram, xy, yy, train["n"], alphas, l1_ratio, max_iter)
+                c = y_mean - x_mean @ W
+                sse = (
+                    block["yy"]
+                    - 2 * (block["xy"] @ W)
+                    - 2 * c * block["y"]
+                    + np.einsum("ia,ij,ja->a", W, block["xx"], W)
+                    + 2 * c * (block["x"] @ W)
+                    + block["n"] * c**2
+                )
+                mean_mse[i] += sse / block["n"] / len(self.blocks)
+
+        best_l1, best_alpha = np.unravel_index(np.argmin(mean_mse), mean_mse.shape)
+        coef = _gram_path(
+            self.gram,
+            self.xy,
+            self.yy,
+            self.n_samples,
+            alphas[best_alpha : best_alpha + 1],
+            l1_ratios[best_l1],
+            max_iter,
+        )[:, 0]
+        return coef, {"alpha_": alphas[best_alpha], "l1_ratio_": l1_ratios[best_l1]}
+
+    def solve(self, name: str, params: dict) -> tuple[np.ndarray, float, dict]:
+        """
+        Giải một mô hình của nhóm tuyến tính
+
+        Param:
+        - name: linear, ridge, lasso hoặc elastic
+        - params: Tham số trong PARAMS của mô hình đó
+
+        Return:
+        - (coef, intercept, thông tin thêm như alpha_, l1_ratio_)
+        """
+        match name:
+            case "linear":
+                coef, info = self.linear()
+            case "ridge":
+                coef, info = self.ridge(params["alphas"])
+            case "lasso":
+                coef, info = self.elastic(
+                    params["alphas"], 1.0, params.get("max_iter", 1000)
+                )
+                # LassoCV không có l1_ratio_
+                info.pop("l1_ratio_")
+            case "elastic":
+                coef, info = self.elastic(
+                    params["alphas"],
+                    params.get("l1_ratio", 0.5),
+                    params.get("max_iter", 1000),
+                )
+            case _:
+                raise ValueError(f"{name} không thuộc nhóm mô hình tuyến tính")
+
+        return coef, self._intercept(coef), info
+
+
+class GramLinearRegressor(RegressorMixin, BaseEstimator):
+    """
+    Mô hình tuyến tính (linear, ridge, lasso, elastic) giải từ LinearFamily
+    của FoldPlan thay vì quét lại dữ liệu
+
+    Param:
+    - name: Tên mô hình trong LINEAR_FAMILY
+    - params: Tham số của mô hình (PARAMS[name])
+    - plan: FoldPlan của request
+
+    Note:
+    - Chỉ fit được trên đúng dữ liệu của plan
+    - plan không được pickle cùng mô hình (registry chỉ lưu hệ số)
+    """
+
+    def __init__(self, name: str, params: dict, plan=None):
+        self.name = name
+        self.params = params
+        self.plan = plan
+
+    def fit(self, X, Y):
+        if self.plan is None or not self.plan.matches(X, Y):
+            raise ValueError(
+                "GramLinearRegressor chỉ fit được trên dữ liệu của FoldPlan"
+            )
+
+        self.coef_, self.intercept_, info = self.plan.linear_family.solve(
+            self.name, self.params
+        )
+        for key, value in info.items():
+            setattr(self, key, value)
+        self.n_features_in_ = self.coef_.shape[0]
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["plan"] = None
+        return state
+
+
+class RunningGram:
+    """
+    Thống kê đủ (XᵀX, Xᵀy, ...) cộng dồn theo từng khối dòng, cho các mô hình
+    tuyến tính khi không giữ được (hoặc không muốn đọc lại) toàn bộ dữ liệu
+
+    Param:
+    - x_shift, y_shift: Điểm dời dữ liệu trước khi cộng (mặc định: trung bình
+      của khối đầu tiên); các RunningGram cùng điểm dời gộp được với nhau
+
+    Note:
+    - Dời dữ liệu để giảm sai số (như LinearFamily dời về trung bình tập train)
+    - Bộ nhớ O(p²), không phụ thuộc số dòng
+    """
+
+    def __init__(self, x_shift=None, y_shift: float = 0.0):
+        self.stats: dict | None = None
+        self.x_shift = x_shift
+        self.y_shift = y_shift
+
+    @property
+    def n_samples(self) -> int:
+        return 0 if self.stats is None else self.stats["n"]
+
+    def add(self, X: np.ndarray, Y: np.ndarray):
+        """
+        Cộng thêm một khối dòng (X: (k, p), Y: (k,)) trong O(k·p²)
+        """
+        if X.shape[0] == 0:
+            return
+
+        if self.x_shift is None:
+            self.x_shift = X.mean(axis=0)
+            self.y_shift = Y.mean()
+
+        block = _block_stats(X - self.x_shift, Y - self.y_shift)
+        if self.stats is None:
+            self.stats = block
+            return
+
+        for key in self.stats:
+            self.stats[key] = self.stats[key] + block[key]
+
+    @classmethod
+    def combine(cls, grams) -> "RunningGram":
+        """
+        Gộp các RunningGram có cùng điểm dời (vd: các fold của cùng dữ liệu)
+        """
+        grams = [gram for gram in grams if gram.stats is not None]
+        combined = cls(grams[0].x_shift, grams[0].y_shift) if grams else cls()
+        for gram in grams:
+            if combined.stats is None:
+                combined.stats = dict(gram.stats)
+                continue
+            for key in combined.stats:
+                combined.stats[key] = combined.stats[key] + gram.stats[key]
+        return combined
+
+    def centered(self) -> tuple:
+        """
+        Gram, Xᵀy, yᵀy đã căn giữa, cùng trung bình của X và Y (đơn vị gốc)
+
+        Return:
+        - (gram, xy, yy, x_mean, y_mean)
+        """
+        gram, xy, yy, x_mean, y_mean = _centered(self.stats)
+        return gram, xy, yy, x_mean + self.x_shift, y_mean + self.y_shift
+
+    def solve(self, alpha: float = 0.0) -> tuple[np.ndarray, float]:
+        """
+        Bình phương tối thiểu (alpha = 0) hoặc ridge trên các dòng đã cộng
+
+        Return:
+        - (coef, intercept)
+
+        Note:
+        - XᵀX suy biến (cột trùng nhau, ít dòng) → nghiệm có chuẩn nhỏ nhất
+        """
+        gram, xy, _, x_mean, y_mean = self.centered()
+        if alpha > 0:
+            coef = np.linalg.solve(gram + alpha * np.eye(gram.shape[0]), xy)
+        else:
+            coef = np.linalg.lstsq(gram, xy, rcond=None)[0]
+        return coef, y_mean - x_mean @ coef
+
+    def bayesian(
+        self,
+        max_iter: int = 300,
+        tol: float = 1e-3,
+        alpha_1: float = 1e-6,
+        alpha_2: float = 1e-6,
+        lambda_1: float = 1e-6,
+        lambda_2: float = 1e-6,
+    ) -> tuple[np.ndarray, float, dict]:
+        """
+        BayesianRidge (cùng tham số mặc định của sklearn) giải từ thống kê đủ
+
+        Return:
+        - (coef, intercept, {"alpha_": ..., "lambda_": ...})
+
+        Note:
+        - Phân rã trị riêng của XᵀX thay cho SVD của X: cùng trị riêng S²,
+          SSE = yᵀy - 2 wᵀXᵀy + wᵀXᵀXw
+        """
+        gram, xy, yy, x_mean, y_mean = self.centered()
+        n = self.n_samples
+        eigvals, eigvecs = np.linalg.eigh(gram)
+        eigvals = np.clip(eigvals, 0.0, None)
+        Vy = eigvecs.T @ xy
+
+        def update(alpha, lambda_):
+            coef = eigvecs @ (Vy / (eigvals + lambda_ / alpha))
+            sse = max(yy - 2 * coef @ xy + coef @ gram @ coef, 0.0)
+            return coef, sse
+
+        alpha = 1.0 / (yy / n + np.finfo(np.float64).eps)
+        lambda_ = 1.0
+        coef_old = None
+        for iteration in range(max_iter):
+            coef, sse = update(alpha, lambda_)
+            gamma = np.sum((alpha * eigvals) / (lambda_ + alpha * eigvals))
+            lambda_ = (gamma + 2 * lambda_1) / (np.sum(coef**2) + 2 * lambda_2)
+            alpha = (n - gamma + 2 * alpha_1) / (sse + 2 * alpha_2)
+            if iteration != 0 and np.sum(np.abs(coef_old - coef)) < tol:
+                break
+            coef_old = coef
+
+        coef, _ = update(alpha, lambda_)
+        return coef, y_mean - x_mean @ coef, {"alpha_": alpha, "lambda_": lambda_}
+
+    def sse(self, coef: np.ndarray, intercept: float) -> float:
+        """
+        Tổng bình phương sai số của mô hình tuyến tính trên các dòng đã cộng,
+        tính trong O(p²) mà không đọc lại dòng nào
+        """
+        stats = self.stats
+        # Hệ số chặn trong hệ toạ độ đã dời
+        c = intercept + self.x_shift @ coef - self.y_shift
+        sse = (
+            stats["yy"]
+            - 2 * (stats["xy"] @ coef)
+            - 2 * c * stats["y"]
+            + coef @ stats["xx"] @ coef
+            + 2 * c * (stats["x"] @ coef)
+            + stats["n"] * c**2
+        )
+        return max(float(sse), 0.0)
+
+    def sst(self) -> float:
+        """
+        Tổng bình phương của Y quanh trung bình
+        """
+        return max(
+            float(self.stats["yy"] - self.stats["y"] ** 2 / self.stats["n"]), 0.0
+        )
@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
 
 
 def status_of_model(
@@ -133,6 +132,8 @@ def predicting_result(
     - delta: Sai số từ các chỉ số RMSE và R^2
     - status: Trạng thái mô hình
     """
+    # Import khi dùng: tiến trình web chỉ cần to_float_round, không cần sklearn
+    from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
 
     data_size = X_train.shape[0] + X_test.shape[0]
     rmse_train = root_mean_squared_error(Y_train, Y_train_predicted)
@@ -141,6 +142,29 @@ def predicting_result(
     r2_train = r2_score(Y_train, Y_train_predicted)
     r2_test = r2_score(Y_test, Y_test_predicted)
 
+    return metrics_result(
+        model, data_size, rmse_train, rmse_test, mae, r2_train, r2_test, x0, y0
+    )
+
+
+def metrics_result(
+    model: str,
+    data_size: int,
+    rmse_train,
+    rmse_test,
+    mae,
+    r2_train,
+    r2_test,
+    x0=None,
+    y0=None,
+) -> dict:
+    """
+    Dictionary kết quả từ các chỉ số đã tính sẵn (xem predicting_result)
+
+    Note:
+    - Dùng cho chế độ streaming: các chỉ số được cộng dồn theo từng khối,
+      không có đủ mảng Y trong bộ nhớ
+    """
     result = {
         "model": model,
         "data_size": data_size,
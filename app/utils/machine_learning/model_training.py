@@ -1,22 +1,34 @@
+import time
+
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import (
-    BayesianRidge,
-    ElasticNetCV,
-    HuberRegressor,
-    LassoCV,
-    LinearRegression,
-    RANSACRegressor,
-    RidgeCV,
-    TheilSenRegressor,
-)
 from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.svm import SVR, NuSVR
-from sklearn.tree import DecisionTreeRegressor, ExtraTreeRegressor
 
+from app import config
+from app.utils.machine_learning.folds import FoldPlan, FoldSearchCV
+from app.utils.machine_learning.linear_path import GramLinearRegressor
+from app.utils.lazy import LazyImport
 from app.utils.panic import Panic
 
+# Estimator theo từng họ mô hình: module sklearn tương ứng chỉ được import khi
+# mô hình được tạo lần đầu (warm_up import sẵn các mô hình hay dùng)
+RandomForestRegressor = LazyImport("sklearn.ensemble", "RandomForestRegressor")
+BayesianRidge = LazyImport("sklearn.linear_model", "BayesianRidge")
+ElasticNetCV = LazyImport("sklearn.linear_model", "ElasticNetCV")
+HuberRegressor = LazyImport("sklearn.linear_model", "HuberRegressor")
+LassoCV = LazyImport("sklearn.linear_model", "LassoCV")
+LinearRegression = LazyImport("sklearn.linear_model", "LinearRegression")
+RANSACRegressor = LazyImport("sklearn.linear_model", "RANSACRegressor")
+RidgeCV = LazyImport("sklearn.linear_model", "RidgeCV")
+TheilSenRegressor = LazyImport("sklearn.linear_model", "TheilSenRegressor")
+KNeighborsRegressor = LazyImport("sklearn.neighbors", "KNeighborsRegressor")
+SVR = LazyImport("sklearn.svm", "SVR")
+NuSVR = LazyImport("sklearn.svm", "NuSVR")
+DecisionTreeRegressor = LazyImport("sklearn.tree", "DecisionTreeRegressor")
+ExtraTreeRegressor = LazyImport("sklearn.tree", "ExtraTreeRegressor")
+
+# n_jobs của các search; song song hoá chính nằm ở mức ứng viên (run_all_model)
+SEARCH_N_JOBS = config.SEARCH_N_JOBS
+
 # Bảng định nghĩa các tham số của mô hình
 PARAMS = {
     "linear": {},
@@ -81,46 +93,178 @@ PARAMS = {
 }
 
 
+def _grid_search(estimator, param_grid, cv):
+    """
+    GridSearchCV, hoặc FoldSearchCV nếu cv là FoldPlan dùng chung của request
+    """
+    if isinstance(cv, FoldPlan):
+        return FoldSearchCV(estimator, cv, param_grid=param_grid, n_jobs=SEARCH_N_JOBS)
+    return GridSearchCV(
+        estimator, param_grid, cv=cv, scoring="r2", n_jobs=SEARCH_N_JOBS
+    )
+
+
+def _randomized_search(estimator, param_distributions, n_iter, cv):
+    """
+    RandomizedSearchCV, hoặc FoldSearchCV nếu cv là FoldPlan dùng chung của request
+    """
+    if isinstance(cv, FoldPlan):
+        return FoldSearchCV(
+            estimator,
+            cv,
+            param_distributions=param_distributions,
+            n_iter=n_iter,
+            random_state=42,
+            n_jobs=SEARCH_N_JOBS,
+        )
+    return RandomizedSearchCV(
+        estimator,
+        param_distributions=param_distributions,
+        n_iter=n_iter,
+        cv=cv,
+        scoring="r2",
+        n_jobs=SEARCH_N_JOBS,
+        random_state=42,
+    )
+
+
+def _splits(cv):
+    # LassoCV / ElasticNetCV nhận trực tiếp danh sách (train, val) của FoldPlan
+    return cv.splits if isinstance(cv, FoldPlan) else cv
+
+
+def _linear_family(name, cv, build):
+    """
+    Mô hình giải từ Gram của FoldPlan (linear, ridge, lasso, elastic), hoặc
+    mô hình sklearn gốc nếu không có FoldPlan / dữ liệu không phù hợp
+    """
+    if isinstance(cv, FoldPlan) and cv.linear_family.applicable:
+        return GramLinearRegressor(name, PARAMS[name], cv)
+    return build()
+
+
 # MODELS: callable khởi tạo mô hình
+# cv: số fold (mặc định 3) hoặc FoldPlan dùng chung cho mọi mô hình của request
 MODELS = {
-    "linear": lambda: LinearRegression(),
-    "ridge": lambda: RidgeCV(**PARAMS["ridge"]),
-    "lasso": lambda: LassoCV(**PARAMS["lasso"]),
-    "elastic": lambda: ElasticNetCV(**PARAMS["elastic"]),
-    "bayesian": lambda: BayesianRidge(),
-    "svr": lambda: GridSearchCV(
-        SVR(), PARAMS["svr"]["param_grid"], cv=3, scoring="r2", n_jobs=1
+    "linear": lambda cv=3: _linear_family("linear", cv, LinearRegression),
+    "ridge": lambda cv=3: _linear_family(
+        "ridge", cv, lambda: RidgeCV(**PARAMS["ridge"])
     ),
-    "nu_svr": lambda: GridSearchCV(
-        NuSVR(), PARAMS["nu_svr"]["param_grid"], cv=3, scoring="r2", n_jobs=1
+    "lasso": lambda cv=3: _linear_family(
+        "lasso", cv, lambda: LassoCV(**{**PARAMS["lasso"], "cv": _splits(cv)})
     ),
-    "decision_tree": lambda: GridSearchCV(
-        DecisionTreeRegressor(),
-        PARAMS["decision_tree"]["param_grid"],
-        cv=3,
-        scoring="r2",
-        n_jobs=1,
+    "elastic": lambda cv=3: _linear_family(
+        "elastic", cv, lambda: ElasticNetCV(**{**PARAMS["elastic"], "cv": _splits(cv)})
     ),
-    "extra_tree": lambda: GridSearchCV(
-        ExtraTreeRegressor(),
-        PARAMS["extra_tree"]["param_grid"],
-        cv=3,
-        scoring="r2",
-        n_jobs=1,
+    "bayesian": lambda cv=3: BayesianRidge(),
+    "svr": lambda cv=3: _grid_search(SVR(), PARAMS["svr"]["param_grid"], cv),
+    "nu_svr": lambda cv=3: _grid_search(NuSVR(), PARAMS["nu_svr"]["param_grid"], cv),
+    "decision_tree": lambda cv=3: _grid_search(
+        DecisionTreeRegressor(), PARAMS["decision_tree"]["param_grid"], cv
+    ),
+    "extra_tree": lambda cv=3: _grid_search(
+        ExtraTreeRegressor(), PARAMS["extra_tree"]["param_grid"], cv
     ),
-    "random_forest": lambda: RandomizedSearchCV(
+    "random_forest": lambda cv=3: _randomized_search(
         RandomForestRegressor(),
-        param_distributions=PARAMS["random_forest"]["param_distributions"],
-        n_iter=PARAMS["random_forest"]["n_iter"],
-        cv=3,
-        scoring="r2",
-        n_jobs=1,
-        random_state=42,
+        PARAMS["random_forest"]["param_distributions"],
+        PARAMS["random_forest"]["n_iter"],
+        cv,
     ),
-    "knn": lambda: GridSearchCV(
-        KNeighborsRegressor(), PARAMS["knn"]["param_grid"], cv=3, scoring="r2", n_jobs=1
+    "knn": lambda cv=3: _grid_search(
+        KNeighborsRegressor(), PARAMS["knn"]["param_grid"], cv
     ),
-    "huber": lambda: HuberRegressor(**PARAMS["huber"]),
-    "ransac": lambda: RANSACRegressor(**PARAMS["ransac"]),
-    "theilsen": lambda: TheilSenRegressor(**PARAMS["theilsen"]),
+    "huber": lambda cv=3: HuberRegressor(**PARAMS["huber"]),
+    "ransac": lambda cv=3: RANSACRegressor(**PARAMS["ransac"]),
+    "theilsen": lambda cv=3: TheilSenRegressor(**PARAMS["theilsen"]),
 }
+
+
+# Mô hình có search hoặc cross-validation: chỉ các mô hình này dùng FoldPlan
+CROSS_VALIDATED = (
+    "ridge",
+    "lasso",
+    "elastic",
+    "svr",
+    "nu_svr",
+    "decision_tree",
+    "extra_tree",
+    "random_forest",
+    "knn",
+)
+
+
+def build_model(name: str, X_train, Y_train):
+    """
+    Tạo mô hình cho một lần huấn luyện đơn lẻ (option, phiên)
+
+    Param:
+    - name: Tên mô hình trong MODELS
+    - X_train, Y_train: Dữ liệu sẽ dùng để fit
+
+    Note:
+    - Mô hình không cross-validate (linear, bayesian, huber, ...) không cần
+      FoldPlan và fit được cả khi chỉ có 2 dòng
+    - Ít dòng hơn số fold thì KFold báo lỗi khi tạo FoldPlan: dùng cv=3 như
+      sklearn (search sẽ tự báo lỗi nếu thật sự không đủ dòng)
+    """
+    if name in CROSS_VALIDATED and len(Y_train) >= 3:
+        return MODELS[name](FoldPlan(X_train, Y_train))
+    return MODELS[name]()
+
+
+def seed_model(model, random_state: int | None):
+    """
+    Cố định seed cho mô hình (và mô hình bên trong search) nếu có tham số random_state
+
+    Param:
+    - model: Mô hình tạo từ MODELS
+    - random_state: Seed (None = giữ nguyên mô hình)
+
+    Return:
+    - Chính mô hình đó
+    """
+    if random_state is None:
+        return model
+
+    params = model.get_params()
+    seeds = {
+        key: random_state
+        for key in ("random_state", "estimator__random_state")
+        if key in params
+    }
+    return model.set_params(**seeds)
+
+
+# Số dòng của dữ liệu giả dùng để warm-up
+WARMUP_SAMPLES = 60
+
+
+def warm_up(names) -> dict[str, float]:
+    """
+    Import và fit thử các mô hình trên dữ liệu nhỏ để request đầu tiên không
+    phải trả chi phí lần đầu (import họ mô hình, nạp extension, khởi tạo BLAS)
+
+    Param:
+    - names: Tên các mô hình trong MODELS
+
+    Return:
+    - Dict {tên mô hình: số giây}
+
+    Note:
+    - Lỗi của một mô hình chỉ được in ra, không làm hỏng worker
+    """
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(WARMUP_SAMPLES, 3))
+    Y = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(scale=0.1, size=WARMUP_SAMPLES)
+    plan = FoldPlan(X, Y)
+
+    seconds = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            MODELS[name](plan).fit(X, Y).predict(X[:1])
+        except Exception as e:
+            print(f"Lỗi khi warm-up {name}: {e}")
+        seconds[name] = time.perf_counter() - start
+    return seconds
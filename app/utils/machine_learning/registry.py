@@ -0,0 +1,161 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+from app import config
+
+_SUFFIX = ".joblib"
+
+# Cache LRU các mô hình đã nạp trong tiến trình hiện tại
+_cache: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _path(model_id: str) -> str:
+    return os.path.join(config.MODEL_REGISTRY_DIR, model_id + _SUFFIX)
+
+
+def _remember(model_id: str, entry: dict):
+    with _lock:
+        _cache[model_id] = entry
+        _cache.move_to_end(model_id)
+        while len(_cache) > config.MODEL_REGISTRY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _evict():
+    """
+    Xoá các mô hình ít được dùng nhất khi vượt quá số lượng hoặc dung lượng
+
+    Note:
+    - Thời điểm dùng gần nhất được lưu bằng mtime của file
+    """
+    entries = []
+    with os.scandir(config.MODEL_REGISTRY_DIR) as it:
+        for file in it:
+            if file.name.endswith(_SUFFIX):
+                stat = file.stat()
+                entries.append((stat.st_mtime, stat.st_size, file.path))
+
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+
+    while entries and (
+        len(entries) > config.MODEL_REGISTRY_MAX_ENTRIES
+        or total_bytes > config.MODEL_REGISTRY_MAX_BYTES
+    ):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+
+
+def register_model(model, name: str, n_features: int) -> str | None:
+    """
+    Lưu mô hình đã huấn luyện vào registry
+
+    Param:
+    - model: Mô hình đã fit (có phương thức predict)
+    - name: Tên mô hình
+    - n_features: Số cột của X khi huấn luyện
+
+    Return:
+    - model_id, hoặc None nếu registry bị tắt / không ghi được
+
+    Note:
+    - Nếu model là GridSearchCV / RandomizedSearchCV thì chỉ lưu best_estimator_
+    """
+    if not config.MODEL_REGISTRY_DIR:
+        return None
+
+    model = getattr(model, "best_estimator_", model)
+    model_id = uuid.uuid4().hex
+    entry = {"model": model, "name": name, "n_features": n_features}
+
+    try:
+        os.makedirs(config.MODEL_REGISTRY_DIR, exist_ok=True)
+        # Ghi ra file tạm rồi đổi tên để tiến trình khác không đọc file dở dang
+        tmp_path = _path(model_id) + ".tmp"
+        joblib.dump(entry, tmp_path)
+        os.replace(tmp_path, _path(model_id))
+        _evict()
+    except OSError as e:
+        print(f"Lỗi khi lưu mô hình vào registry: {e}")
+        return None
+
+    _remember(model_id, entry)
+    return model_id
+
+
+def load_model(model_id: str) -> dict:
+    """
+    Nạp mô hình từ registry
+
+    Param:
+    - model_id: Mã mô hình
+
+    Return:
+    - Dict gồm model, name, n_features
+
+    Raises:
+    - KeyError: Nếu mô hình không tồn tại hoặc đã bị xoá
+    """
+    if not model_id.isalnum():
+        raise KeyError(model_id)
+
+    path = _path(model_id)
+    with _lock:
+        entry = _cache.get(model_id)
+        if entry is not None:
+            _cache.move_to_end(model_id)
+
+    if entry is None:
+        try:
+            entry = joblib.load(path)
+        except FileNotFoundError:
+            raise KeyError(model_id)
+        _remember(model_id, entry)
+
+    # Cập nhật thời điểm dùng gần nhất cho LRU trên đĩa
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        with _lock:
+            _cache.pop(model_id, None)
+        raise KeyError(model_id)
+
+    return entry
+
+
+def predict_with_model(model_id: str, x0) -> tuple[str, np.ndarray]:
+    """
+    Dự đoán với mô hình đã lưu, không cần huấn luyện lại
+
+    Param:
+    - model_id: Mã mô hình
+    - x0: Mảng dự đoán (2D)
+
+    Return:
+    - Tên mô hình và mảng kết quả dự đoán
+
+    Raises:
+    - KeyError: Nếu mô hình không tồn tại
+    - ValueError: Nếu số cột của x0 không khớp với dữ liệu huấn luyện
+    """
+    entry = load_model(model_id)
+    x0 = np.asarray(x0, dtype=float)
+    if x0.ndim == 1:
+        x0 = x0.reshape(1, -1)
+
+    if x0.shape[1] != entry["n_features"]:
+        raise ValueError(
+            f"Số cột của x0 ({x0.shape[1]}) phải bằng số cột của X ({entry['n_features']})"
+        )
+
+    return entry["name"], entry["model"].predict(x0)
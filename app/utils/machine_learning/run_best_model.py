@@ -1,34 +1,97 @@
+import time
+
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterGrid
 
+from app import config
+from app.utils.machine_learning.control import (
+    Cancelled,
+    call_with_cancel,
+    check_cancelled,
+    current_cancel,
+    is_cancelled,
+    report_progress,
+)
+from app.utils.machine_learning.cost import CANDIDATE_MODELS, model_cost
 from app.utils.machine_learning.data_preprocessing import prepare_input, splitting_data
+from app.utils.machine_learning.folds import FoldPlan
 from app.utils.machine_learning.model_index import predicting_result
-from app.utils.machine_learning.model_training import MODELS
+from app.utils.machine_learning.model_training import MODELS, PARAMS, seed_model
+from app.utils.machine_learning.registry import register_model
 from app.utils.panic import Panic
+from app.utils.profiling import profile_active
+from app.utils.timing import add_concurrent_stages, call_with_stages, stage
 
 
-def run_all_model(X_train, Y_train, X_test, Y_test, x0=None):
+def _search_size(model_name: str) -> int:
     """
-    Chạy tất cả mô hình với dữ liệu đã chia sẵn
+    Số bộ tham số mà search của ứng viên thử (1 nếu không phải search)
+    """
+    params = PARAMS.get(model_name, {})
+    if "param_grid" in params:
+        return len(ParameterGrid(params["param_grid"]))
+    if "param_distributions" in params:
+        return params["n_iter"]
+    return 1
+
+
+def minimum_cost(model_name: str, n_samples: int, n_features: int) -> float:
+    """
+    Số giây ước lượng cho phần việc ít nhất của một ứng viên: search bị cắt
+    ngắn vẫn thử một bộ tham số trên mọi fold rồi fit lại trên toàn bộ dữ liệu
+
+    Note:
+    - Với k bộ tham số và 3 fold, toàn bộ search tốn khoảng (k + 1/3) lần
+      một bộ tham số, phần ít nhất tốn (1 + 1/3) lần
+    """
+    size = _search_size(model_name)
+    return model_cost(model_name, n_samples, n_features) * (4 / 3) / (size + 1 / 3)
+
+
+def fit_candidate(
+    model_name,
+    X_train,
+    Y_train,
+    X_test,
+    Y_test,
+    x0=None,
+    random_state=None,
+    plan=None,
+    deadline=None,
+):
+    """
+    Huấn luyện và đánh giá một mô hình ứng viên
 
     Param:
-    - X_train: Mảng X huấn luyện
-    - Y_train: Mảng Y huấn luyện
-    - X_test: Mảng X kiểm tra
-    - Y_test: Mảng Y kiểm tra
+    - model_name: Tên mô hình trong MODELS
+    - X_train, Y_train, X_test, Y_test: Dữ liệu đã chia sẵn
     - x0: Mảng dự đoán
+    - random_state: Seed cố định cho mô hình (tùy chọn)
+    - plan: FoldPlan dùng chung cho các search (tùy chọn, mặc định cv=3)
+    - deadline: Thời điểm (time.time()) search phải dừng thử bộ tham số mới (tùy chọn)
 
     Return:
-    - List kết quả dự đoán từ tất cả mô hình
-    """
+    - Kết quả từ predicting_result kèm mô hình đã fit (khóa estimator) và
+      cut_short (search dừng sớm vì hết thời gian), hoặc None nếu mô hình bị lỗi
+
+    Raises:
+    - Cancelled: Nếu request bị huỷ giữa chừng
 
-    model_names = ["linear", "elastic", "decision_tree", "random_forest", "svr", "knn"]
-    result = []
+    Note:
+    - Lỗi của một ứng viên không ảnh hưởng tới các ứng viên khác
+    """
 
-    for model_name in model_names:
-        try:
-            model = MODELS[model_name]()
+    try:
+        model = MODELS[model_name](plan) if plan is not None else MODELS[model_name]()
+        model = seed_model(model, random_state)
+        if deadline is not None and "deadline" in model.get_params():
+            model.set_params(deadline=deadline)
+        with stage("fit"):
             model.fit(X_train, Y_train)
 
+        with stage("predict"):
             Y_train_predicted = model.predict(X_train)
             Y_test_predicted = model.predict(X_test)
 
@@ -42,25 +105,325 @@ def run_all_model(X_train, Y_train, X_test, Y_test, x0=None):
             else:
                 y0 = None
 
-            result.append(
-                predicting_result(
-                    model=model_name,
-                    X_train=X_train,
-                    Y_train=Y_train,
-                    Y_train_predicted=Y_train_predicted,
-                    X_test=X_test,
-                    Y_test=Y_test,
-                    Y_test_predicted=Y_test_predicted,
-                    x0=x0,
-                    y0=y0,
-                )
+        with stage("result"):
+            record = predicting_result(
+                model=model_name,
+                X_train=X_train,
+                Y_train=Y_train,
+                Y_train_predicted=Y_train_predicted,
+                X_test=X_test,
+                Y_test=Y_test,
+                Y_test_predicted=Y_test_predicted,
+                x0=x0,
+                y0=y0,
+            )
+        record["estimator"] = model
+        record["cut_short"] = bool(getattr(model, "cut_short_", False))
+        return record
+
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"[{model_name}] lỗi khi huấn luyện hoặc đánh giá: {e}")
+        return None
+
+
+def _fit_candidate_named(model_name, *args):
+    """
+    Giống fit_candidate nhưng trả kèm tên mô hình để ghép kết quả
+    khi các ứng viên hoàn thành không theo thứ tự, và thời gian các giai đoạn
+    (đo trong tiến trình con nên phải gửi về)
+    """
+    return model_name, *call_with_stages(fit_candidate, model_name, *args)
+
+
+def _parallel_n_jobs(n_samples: int, n_candidates: int) -> int:
+    """
+    Số tiến trình dùng để huấn luyện song song các ứng viên
+
+    Note:
+    - Đang profile: chạy tuần tự trong tiến trình hiện tại để cProfile thấy
+      các hàm fit của sklearn
+    """
+    if n_samples < config.BEST_MODEL_PARALLEL_MIN_SAMPLES or profile_active():
+        return 1
+    return min(n_candidates, effective_n_jobs(config.BEST_MODEL_N_JOBS))
+
+
+def run_candidates(
+    X_train,
+    Y_train,
+    X_test,
+    Y_test,
+    x0=None,
+    random_state=None,
+    progress=None,
+    candidates=None,
+    deadline=None,
+):
+    """
+    Chạy các ứng viên với dữ liệu đã chia sẵn, dừng khởi chạy ứng viên mới khi
+    không còn kịp trước deadline
+
+    Param:
+    - X_train, Y_train, X_test, Y_test: Dữ liệu đã chia sẵn
+    - x0: Mảng dự đoán
+    - random_state: Seed cố định cho các mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+    - candidates: Danh sách ứng viên (mặc định CANDIDATE_MODELS)
+    - deadline: Thời điểm (time.time()) phải xong (tùy chọn)
+
+    Return:
+    - (List kết quả của các ứng viên chạy xong, list ứng viên bị bỏ qua)
+
+    Raises:
+    - Cancelled: Nếu request bị huỷ; không ứng viên mới nào được khởi chạy,
+      các ứng viên đang chạy dừng ở fold tiếp theo
+
+    Note:
+    - Các ứng viên được huấn luyện song song trên nhiều CPU (BEST_MODEL_N_JOBS)
+    - Kết quả luôn theo thứ tự candidates, không phụ thuộc thứ tự hoàn thành
+    - Các search dùng chung một FoldPlan (fold và mảng của fold chỉ tạo một lần)
+    - Có deadline: ứng viên rẻ chạy trước (model_cost); một ứng viên chỉ
+      được khởi chạy nếu phần việc ít nhất của nó (minimum_cost, nhân với tỉ
+      lệ thời gian thực / ước lượng của các ứng viên đã xong) còn kịp. Ứng
+      viên rẻ nhất luôn được chạy để có kết quả
+    """
+    candidates = candidates or CANDIDATE_MODELS
+    n_samples, n_features = X_train.shape
+    n_jobs = _parallel_n_jobs(n_samples, len(candidates))
+
+    # Chia fold một lần cho mọi ứng viên
+    plan = FoldPlan(X_train, Y_train).prepare(candidates)
+
+    order = list(candidates)
+    if deadline is not None:
+        order.sort(key=lambda name: model_cost(name, n_samples, n_features))
+
+    cancel = current_cancel()
+    records = {}
+    launched = []
+    # Tổng số giây thực tế / ước lượng của các ứng viên đã chạy đủ
+    elapsed = {"actual": 0.0, "estimated": 0.0}
+
+    def affordable(model_name) -> bool:
+        if deadline is None or not launched:
+            return True
+        speed = 1.0
+        if elapsed["estimated"] > 0:
+            speed = elapsed["actual"] / elapsed["estimated"]
+        cost = speed * minimum_cost(model_name, n_samples, n_features)
+        return time.time() + cost <= deadline
+
+    def tasks():
+        # Được joblib đọc dần mỗi khi có tiến trình rảnh: ứng viên được quyết
+        # định chạy hay bỏ qua đúng lúc khởi chạy
+        for model_name in order:
+            if is_cancelled():
+                return
+            if not affordable(model_name):
+                continue
+            launched.append(model_name)
+            # Tiến trình con của joblib không thấy event huỷ của tiến trình này
+            yield delayed(call_with_cancel)(
+                cancel,
+                _fit_candidate_named,
+                model_name,
+                X_train,
+                Y_train,
+                X_test,
+                Y_test,
+                x0,
+                random_state,
+                plan,
+                deadline,
             )
 
-        except Exception as e:
-            print(f"[{model_name}] lỗi khi huấn luyện hoặc đánh giá: {e}")
+    report_progress(
+        progress,
+        stage="training",
+        completed=0,
+        total=len(candidates),
+        running=order[:n_jobs],
+    )
+
+    candidate_stages = []
+    for model_name, record, stages in Parallel(
+        n_jobs=n_jobs,
+        return_as="generator_unordered",
+        pre_dispatch="n_jobs",
+        batch_size=1,
+    )(tasks()):
+        records[model_name] = record
+        candidate_stages.append(stages)
+        check_cancelled()
+        if record is not None and not record["cut_short"]:
+            elapsed["actual"] += sum(stages.values())
+            elapsed["estimated"] += model_cost(model_name, n_samples, n_features)
+        report_progress(
+            progress,
+            stage="training",
+            completed=len(records),
+            total=len(candidates),
+            running=[name for name in launched if name not in records],
+        )
+
+    add_concurrent_stages(candidate_stages, n_jobs)
+    check_cancelled()
+    results = [
+        records[model_name]
+        for model_name in candidates
+        if records.get(model_name) is not None
+    ]
+    skipped = [model_name for model_name in candidates if model_name not in launched]
+    return results, skipped
+
+
+def run_all_model(
+    X_train,
+    Y_train,
+    X_test,
+    Y_test,
+    x0=None,
+    random_state=None,
+    progress=None,
+    candidates=None,
+):
+    """
+    Chạy tất cả mô hình với dữ liệu đã chia sẵn
+
+    Param:
+    - X_train: Mảng X huấn luyện
+    - Y_train: Mảng Y huấn luyện
+    - X_test: Mảng X kiểm tra
+    - Y_test: Mảng Y kiểm tra
+    - x0: Mảng dự đoán
+    - random_state: Seed cố định cho các mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+    - candidates: Danh sách ứng viên (mặc định CANDIDATE_MODELS)
+
+    Return:
+    - List kết quả dự đoán từ tất cả mô hình (xem run_candidates)
+    """
+    records, _ = run_candidates(
+        X_train, Y_train, X_test, Y_test, x0, random_state, progress, candidates
+    )
+    return records
+
+
+def score_candidate(model_name, X_train, Y_train, X_val, Y_val, random_state=None):
+    """
+    Fit nhanh một ứng viên và trả về R² trên tập kiểm định (dùng cho vòng loại)
+
+    Return:
+    - (model_name, R²), R² = -inf nếu mô hình bị lỗi
+    """
+    try:
+        model = seed_model(MODELS[model_name](), random_state)
+        with stage("fit"):
+            model.fit(X_train, Y_train)
+        with stage("predict"):
+            return model_name, r2_score(Y_val, model.predict(X_val))
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"[{model_name}] lỗi ở vòng loại: {e}")
+        return model_name, -np.inf
+
+
+def race_candidates(
+    X_train,
+    Y_train,
+    random_state=None,
+    progress=None,
+    deadline=None,
+):
+    """
+    Loại dần ứng viên theo successive halving trên các mẫu con của tập train
+
+    Param:
+    - X_train, Y_train: Tập train (không dùng tập test)
+    - random_state: Seed cố định cho việc lấy mẫu con và các mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+    - deadline: Thời điểm (time.time()) không chạy thêm vòng loại nào (tùy chọn)
+
+    Return:
+    - (Danh sách ứng viên còn lại, số vòng đã chạy, danh sách ứng viên bị loại)
+
+    Raises:
+    - Cancelled: Nếu request bị huỷ (kiểm tra trước mỗi vòng)
+
+    Note:
+    - Mỗi vòng giữ lại nửa ứng viên có R² cao nhất và gấp đôi cỡ mẫu,
+      vòng cuối dùng n / 2 dòng; dừng khi còn RACE_SURVIVORS ứng viên
+    - Dữ liệu nhỏ (mẫu vòng đầu < RACE_MIN_SAMPLES) thì không loại ứng viên nào
+    - Chấm điểm trên nửa sau của tập train (đã xáo), phần không vòng nào fit:
+      tập test chỉ dùng để báo chỉ số của mô hình thắng, không dùng để chọn
+      nên chỉ số đó không bị lệch lạc quan
+    """
+    n_samples = X_train.shape[0]
+    candidates = list(CANDIDATE_MODELS)
+    survivors = max(1, config.RACE_SURVIVORS)
+
+    # Số vòng cần để còn survivors ứng viên khi mỗi vòng giữ lại một nửa
+    n_rounds = 0
+    remaining = len(candidates)
+    while remaining > survivors:
+        remaining = max(survivors, -(-remaining // 2))
+        n_rounds += 1
+
+    # Mẫu con vòng r có n / 2^(n_rounds - r) dòng
+    order = np.random.default_rng(random_state).permutation(n_samples)
+    # Mẫu con lớn nhất là n / 2 dòng đầu: nửa còn lại làm tập kiểm định
+    validation = order[n_samples >> 1 :]
+    X_val, Y_val = X_train[validation], Y_train[validation]
+    eliminated = []
+    rounds_run = 0
+
+    for round_index in range(n_rounds):
+        sample_size = n_samples >> (n_rounds - round_index)
+        if sample_size < config.RACE_MIN_SAMPLES:
             continue
+        if deadline is not None and time.time() >= deadline:
+            break
+        check_cancelled()
+
+        rows = order[:sample_size]
+        report_progress(
+            progress,
+            stage="racing",
+            round=rounds_run + 1,
+            sample_size=int(sample_size),
+            candidates=list(candidates),
+        )
+
+        n_jobs = _parallel_n_jobs(sample_size, len(candidates))
+        scores = {}
+        candidate_stages = []
+        for (model_name, score), stages in Parallel(n_jobs=n_jobs)(
+            delayed(call_with_stages)(
+                score_candidate,
+                model_name,
+                X_train[rows],
+                Y_train[rows],
+                X_val,
+                Y_val,
+                random_state,
+            )
+            for model_name in candidates
+        ):
+            scores[model_name] = score
+            candidate_stages.append(stages)
+        add_concurrent_stages(candidate_stages, n_jobs)
 
-    return result
+        keep = max(survivors, -(-len(candidates) // 2))
+        ranked = sorted(candidates, key=lambda name: scores[name], reverse=True)
+        eliminated.extend(ranked[keep:])
+        # Giữ thứ tự gốc của CANDIDATE_MODELS cho các ứng viên còn lại
+        candidates = [name for name in candidates if name in ranked[:keep]]
+        rounds_run += 1
+
+    return candidates, rounds_run, eliminated
 
 
 def fallback_to_linear(records):
@@ -81,21 +444,74 @@ def fallback_to_linear(records):
     return None
 
 
-def run_best_model(X, Y, x0):
+def run_best_model(
+    X, Y, x0, random_state=None, progress=None, race=False, time_budget_ms=None
+):
     """
     Tìm mô hình tốt nhất từ tất cả mô hình với dữ liệu X, Y và dự đoán x0
     Dựa trên R²_test cao, RMSE_test thấp, generalization_error thấp.
+
+    Param:
+    - random_state: Seed cố định cho việc chia dữ liệu và các mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+    - race: Nếu True, loại dần ứng viên trên mẫu con trước khi huấn luyện đầy đủ
+    - time_budget_ms: Thời gian tối đa (ms) cho việc tìm mô hình (tùy chọn)
+
+    Return:
+    - Kết quả của mô hình tốt nhất, kèm model_id của mô hình đó trong registry
+      (và race_rounds, eliminated khi race=True; skipped, cut_short khi có
+      time_budget_ms)
+
+    Raises:
+    - Cancelled: Nếu request bị huỷ (client ngắt kết nối)
+
+    Note:
+    - Với time_budget_ms, kết quả là mô hình tốt nhất trong các ứng viên kịp
+      chạy (xem run_candidates). Có thể vượt ngân sách tối đa khoảng một bộ
+      tham số của ứng viên đang chạy (search chỉ dừng giữa các bộ tham số)
     """
-    X, Y, x0 = prepare_input(X, Y, x0)
-    X_train, X_test, Y_train, Y_test = splitting_data(X, Y)
+    deadline = None
+    if time_budget_ms is not None:
+        deadline = time.time() + time_budget_ms / 1000
+
+    with stage("prepare"):
+        X, Y, x0 = prepare_input(X, Y, x0)
+    with stage("split"):
+        X_train, X_test, Y_train, Y_test = splitting_data(X, Y, random_state)
 
     best_model = ""
     best_r2 = -np.inf
     best_rmse = np.inf
     best_generalization_error = np.inf
     best_result = None
+    best_estimator = None
+
+    candidates = CANDIDATE_MODELS
+    race_info = {}
+    if race:
+        candidates, rounds, eliminated = race_candidates(
+            X_train, Y_train, random_state, progress, deadline
+        )
+        race_info = {"race_rounds": rounds, "eliminated": eliminated}
 
-    records = run_all_model(X_train, Y_train, X_test, Y_test, x0)
+    records, skipped = run_candidates(
+        X_train,
+        Y_train,
+        X_test,
+        Y_test,
+        x0,
+        random_state,
+        progress,
+        candidates,
+        deadline,
+    )
+
+    budget_info = {}
+    if deadline is not None:
+        budget_info = {
+            "skipped": skipped,
+            "cut_short": [record["model"] for record in records if record["cut_short"]],
+        }
 
     for record in records:
         r2 = record["r2_test"]
@@ -110,7 +526,8 @@ def run_best_model(X, Y, x0):
             best_r2 = r2
             best_rmse = rmse
             best_generalization_error = gen_err
-            best_result = record["y0"]
+            best_result = record.get("y0")
+            best_estimator = record["estimator"]
 
     # Nếu x0 được cung cấp nhưng best_result không có, fallback về linear
     if x0 is not None and best_result is None:
@@ -119,10 +536,18 @@ def run_best_model(X, Y, x0):
                 best_result = record["y0"]
                 break
 
+    model_id = None
+    if best_estimator is not None:
+        with stage("registry"):
+            model_id = register_model(best_estimator, best_model, X.shape[1])
+
     return {
         "best_model": best_model,
         "best_r2_test": best_r2,
         "best_rmse_test": best_rmse,
         "best_generalization_error": best_generalization_error,
         "best_result": best_result,
+        "model_id": model_id,
+        **race_info,
+        **budget_info,
     }
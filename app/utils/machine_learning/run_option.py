@@ -1,10 +1,13 @@
+from app.utils.machine_learning.control import check_cancelled, report_progress
+from app.utils.machine_learning.cost import model_key
 from app.utils.machine_learning.data_preprocessing import prepare_input, splitting_data
 from app.utils.machine_learning.model_index import predicting_result
-from app.utils.machine_learning.model_training import MODELS
-from app.utils.panic import Panic
+from app.utils.machine_learning.model_training import build_model, seed_model
+from app.utils.machine_learning.registry import register_model
+from app.utils.timing import stage
 
 
-def run_option_model(X, Y, x0, model_name):
+def run_option_model(X, Y, x0, model_name, random_state=None, progress=None):
     """
     Chạy mô hình từ dữ liệu và tên mô hình người dùng chỉ định
 
@@ -13,63 +16,50 @@ def run_option_model(X, Y, x0, model_name):
     - Y: Mảng Y
     - x0: Mảng dự đoán
     - model_name: Tên mô hình
+    - random_state: Seed cố định cho việc chia dữ liệu và mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+
+    Return:
+    - Kết quả từ predicting_result, kèm model_id của mô hình đã lưu trong registry
     """
-    X, Y, x0 = prepare_input(X, Y, x0)
-    X_train, X_test, Y_train, Y_test = splitting_data(X, Y)
+    with stage("prepare"):
+        X, Y, x0 = prepare_input(X, Y, x0)
+    with stage("split"):
+        X_train, X_test, Y_train, Y_test = splitting_data(X, Y, random_state)
+
+    model = build_model(model_key(model_name), X_train, Y_train)
+    seed_model(model, random_state)
+
+    check_cancelled()
+    report_progress(progress, stage="training", model=model_name)
+    with stage("fit"):
+        model.fit(X_train, Y_train)
 
-    model = None
-    match model_name.lower():
-        case "linear" | "linear_regression" | "":
-            model = MODELS["linear"]()
-        case "lasso" | "lasso_regression":
-            model = MODELS["lasso"]()
-        case "ridge" | "ridge_regression":
-            model = MODELS["ridge"]()
-        case "elastic" | "elastic_regression":
-            model = MODELS["elastic"]()
-        case "polynomial" | "polynomial_regression":
-            model = MODELS["linear"]()
-        case "bayesian":
-            model = MODELS["bayesian"]()
-        case "decision_tree":
-            model = MODELS["decision_tree"]()
-        case "extra_tree":
-            model = MODELS["extra_tree"]()
-        case "random_forest":
-            model = MODELS["random_forest"]()
-        case "svm":
-            model = MODELS["svr"]()
-        case "nu_svm":
-            model = MODELS["nu_svr"]()
-        case "knn":
-            model = MODELS["knn"]()
-        case "huber":
-            model = MODELS["huber"]()
-        case "ransac":
-            model = MODELS["ransac"]()
-        case "theilsen" | "theil_sen":
-            model = MODELS["theilsen"]()
-        case _:
-            Panic.unreachable("Không có mô hình này")
+    check_cancelled()
+    report_progress(progress, stage="predicting", model=model_name)
+    with stage("predict"):
+        Y_train_predicted = model.predict(X_train)
+        Y_test_predicted = model.predict(X_test)
 
-    model.fit(X_train, Y_train)
-    Y_train_predicted = model.predict(X_train)
-    Y_test_predicted = model.predict(X_test)
+        try:
+            y0 = model.predict(x0) if x0 is not None else None
+        except Exception as e:
+            print(f"Lỗi khi predict với {model_name}: {e}")
+            y0 = None
 
-    try:
-        y0 = model.predict(x0) if x0 is not None else None
-    except Exception as e:
-        print(f"Lỗi khi predict với {model_name}: {e}")
-        y0 = None
+    with stage("result"):
+        result = predicting_result(
+            model=model_name,
+            X_train=X_train,
+            Y_train=Y_train,
+            Y_train_predicted=Y_train_predicted,
+            X_test=X_test,
+            Y_test=Y_test,
+            Y_test_predicted=Y_test_predicted,
+            x0=x0,
+            y0=y0,
+        )
+    with stage("registry"):
+        result["model_id"] = register_model(model, model_name, X.shape[1])
 
-    return predicting_result(
-        model=model_name,
-        X_train=X_train,
-        Y_train=Y_train,
-        Y_train_predicted=Y_train_predicted,
-        X_test=X_test,
-        Y_test=Y_test,
-        Y_test_predicted=Y_test_predicted,
-        x0=x0,
-        y0=y0,
-    )
+    return result
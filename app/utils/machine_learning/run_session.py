@@ -0,0 +1,115 @@
+import shutil
+
+from app.utils.machine_learning.control import report_progress
+from app.utils.machine_learning.cost import model_key
+from app.utils.machine_learning.data_preprocessing import prepare_input
+from app.utils.machine_learning.model_index import metrics_result
+from app.utils.machine_learning.registry import register_model
+from app.utils.machine_learning.session import DatasetSession, load_session
+from app.utils.machine_learning.session_store import session_lock
+from app.utils.timing import stage
+
+
+def _update(session: DatasetSession, X, Y, x0, progress) -> dict:
+    """
+    Thêm dòng vào phiên, cập nhật mô hình, lưu phiên và trả kết quả
+    """
+    with stage("split"):
+        session.append(X, Y)
+
+    report_progress(progress, stage="training", model=session.model_name)
+    with stage("fit"):
+        update = session.fit()
+
+    report_progress(progress, stage="predicting", model=session.model_name)
+    with stage("predict"):
+        metrics = session.metrics()
+
+        try:
+            y0 = session.model.predict(x0) if x0 is not None else None
+        except Exception as e:
+            print(f"Lỗi khi predict với {session.model_name}: {e}")
+            y0 = None
+
+    with stage("result"):
+        result = metrics_result(
+            session.model_name, session.n_rows, x0=x0, y0=y0, **metrics
+        )
+        result["session_id"] = session.session_id
+        result["update"] = update
+
+    with stage("registry"):
+        result["model_id"] = register_model(
+            session.model, session.model_name, session.n_features
+        )
+    with stage("save"):
+        session.save(result)
+
+    return result
+
+
+def create_session_model(X, Y, x0, model_name, random_state=None, progress=None):
+    """
+    Tạo phiên dữ liệu từ X, Y ban đầu và huấn luyện mô hình
+
+    Param:
+    - X: Mảng X
+    - Y: Mảng Y
+    - x0: Mảng dự đoán (tùy chọn)
+    - model_name: Tên mô hình (như run_option_model)
+    - random_state: Seed cố định cho việc chia dữ liệu và mô hình (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+
+    Return:
+    - Kết quả như run_option_model, kèm session_id và update
+    """
+    with stage("prepare"):
+        X, Y, x0 = prepare_input(X, Y, x0)
+        session = DatasetSession(
+            model_name, model_key(model_name), X.shape[1], random_state
+        )
+
+    try:
+        return _update(session, X, Y, x0, progress)
+    except BaseException:
+        # Phiên chưa được lưu: xoá dữ liệu đã ghi để không bị bỏ sót trên đĩa
+        shutil.rmtree(session.directory, ignore_errors=True)
+        raise
+
+
+def append_session_model(session_id, X, Y, x0=None, progress=None):
+    """
+    Thêm dòng vào phiên đã có rồi cập nhật mô hình
+
+    Param:
+    - session_id: Mã phiên trả về khi tạo phiên
+    - X: Các dòng X mới
+    - Y: Các giá trị Y mới
+    - x0: Mảng dự đoán (tùy chọn)
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+
+    Return:
+    - Kết quả trên toàn bộ dữ liệu của phiên; update = "incremental" với
+      linear, ridge, bayesian (giải từ thống kê đủ), "full" với mô hình khác
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại hoặc đã bị xoá
+    - ValueError: Nếu số cột của X hoặc x0 khác với phiên
+
+    Note:
+    - Giữ session_lock từ lúc nạp tới lúc lưu phiên: hai lần thêm dòng ở hai
+      worker / hai instance khác nhau không ghi đè lên nhau
+    """
+    with stage("prepare"):
+        X, Y, x0 = prepare_input(X, Y, x0)
+
+    with session_lock(session_id):
+        with stage("prepare"):
+            session = load_session(session_id)
+            if X.shape[1] != session.n_features:
+                raise ValueError(
+                    f"Số cột của X ({X.shape[1]}) phải bằng số cột của phiên"
+                    f" ({session.n_features})"
+                )
+
+        return _update(session, X, Y, x0, progress)
@@ -1,17 +1,131 @@
 import numpy as np
-from sklearn.ensemble import StackingRegressor, GradientBoostingRegressor, VotingRegressor
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, ElasticNetCV, ElasticNet
+from sklearn.model_selection import check_cv, cross_val_predict
 from sklearn.tree import DecisionTreeRegressor
 
-from app.utils.machine_learning.classify import classify
+from app.utils.machine_learning.classify import classify, classify_stats
+from app.utils.machine_learning.control import check_cancelled, report_progress
 from app.utils.machine_learning.data_preprocessing import prepare_input, splitting_data
 from app.utils.machine_learning.model_index import predicting_result
+from app.utils.machine_learning.registry import register_model
 from app.utils.panic import Panic
+from app.utils.timing import stage
+
+
+STACK_MODEL_NAME = "Stacking + Voting + Elastic + DecisionTree"
+
+
+class StackingEnsemble:
+    """
+    Stacking dựng từ các mô hình cơ sở đã fit sẵn (tương đương StackingRegressor)
 
-
-def run_stack_model(X, Y, x0=None):
-    X, Y, x0 = prepare_input(X, Y, x0)
-    X_train, X_test, Y_train, Y_test = splitting_data(X, Y)
+    Param:
+    - estimators: Danh sách (tên, mô hình cơ sở) đã fit trên toàn bộ dữ liệu
+    - final_estimator: Mô hình cuối đã fit trên dự đoán out-of-fold của chúng
+    """
+
+    def __init__(self, estimators, final_estimator):
+        self.estimators = estimators
+        self.final_estimator = final_estimator
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        meta = np.column_stack([model.predict(X) for _, model in self.estimators])
+        return self.final_estimator.predict(meta)
+
+
+class VotingEnsemble:
+    """
+    Trung bình dự đoán của các mô hình cơ sở đã fit (tương đương VotingRegressor)
+    """
+
+    def __init__(self, estimators):
+        self.estimators = estimators
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        predictions = [model.predict(X) for _, model in self.estimators]
+        return np.column_stack(predictions).mean(axis=1)
+
+
+def fit_stacking(estimators, final_estimator, X, Y, cv) -> StackingEnsemble:
+    """
+    Fit stacking mà không fit lại các mô hình cơ sở trên toàn bộ dữ liệu
+
+    Param:
+    - estimators: Danh sách (tên, mô hình cơ sở) đã fit trên (X, Y)
+    - final_estimator: Mô hình cuối (chưa fit)
+    - X, Y: Dữ liệu huấn luyện
+    - cv: Số fold như tham số cv của StackingRegressor (None = 5)
+
+    Return:
+    - StackingEnsemble đã fit
+
+    Raises:
+    - Cancelled: Nếu request bị huỷ (kiểm tra trước mỗi mô hình cơ sở)
+
+    Note:
+    - Mỗi mô hình cơ sở chỉ được fit thêm một lần trên mỗi fold để lấy dự đoán
+      out-of-fold, giống hệt cross_val_predict bên trong StackingRegressor
+    """
+    folds = check_cv(cv, Y, classifier=False)
+    predictions = []
+    for _, model in estimators:
+        check_cancelled()
+        predictions.append(cross_val_predict(clone(model), X, Y, cv=folds))
+    meta = np.column_stack(predictions)
+    return StackingEnsemble(estimators, clone(final_estimator).fit(meta, Y))
+
+
+class StackPredictor:
+    """
+    Bộ dự đoán của stack-model: chọn mô hình cho từng dòng x0 theo classify
+
+    Param:
+    - stats: Thống kê của X từ classify_stats
+    - stacking_model, voting_model, decision_tree_model, elastic_net_model:
+      Các mô hình đã fit
+
+    Note:
+    - Chỉ lưu thống kê của X (không lưu X) nên có thể lưu vào registry
+    """
+
+    def __init__(
+        self,
+        stats,
+        stacking_model,
+        voting_model,
+        decision_tree_model,
+        elastic_net_model,
+    ):
+        self.stats = stats
+        self.models = {
+            "stacking": stacking_model,
+            "voting": voting_model,
+            "decision_tree": decision_tree_model,
+            "elastic": elastic_net_model,
+        }
+
+    def predict(self, x0: np.ndarray) -> list[float]:
+        x0_classify = np.asarray(classify(None, x0, stats=self.stats))
+        y0 = np.empty(x0.shape[0])
+
+        # Mỗi nhãn chỉ gọi predict một lần cho mọi dòng mang nhãn đó,
+        # kết quả được đặt lại đúng vị trí ban đầu
+        for label in np.unique(x0_classify):
+            if label not in self.models:
+                Panic.unreachable()
+            rows = x0_classify == label
+            y0[rows] = self.models[label].predict(x0[rows])
+
+        return y0.tolist()
+
+
+def run_stack_model(X, Y, x0=None, random_state=None, progress=None):
+    with stage("prepare"):
+        X, Y, x0 = prepare_input(X, Y, x0)
+    with stage("split"):
+        X_train, X_test, Y_train, Y_test = splitting_data(X, Y, random_state)
     
 
     # Xác định số lượng CV dựa vào số lượng records
@@ -45,70 +159,64 @@ def run_stack_model(X, Y, x0=None):
     n_features = X.shape[1]
 
     if n_features <= 3:
-        stacking_model = StackingRegressor(
-            estimators=[MODELS_IN_THIS_FEATURE[0]],
-            final_estimator=LinearRegression(),
-            cv=cv_splits
-        )
-
-        voting_model = VotingRegressor(
-            estimators=[MODELS_IN_THIS_FEATURE[0]]
-        )
-
+        base_models = MODELS_IN_THIS_FEATURE[:1]
+        final_estimator = LinearRegression()
     else:
-        stacking_model = StackingRegressor(
-            estimators=MODELS_IN_THIS_FEATURE,
-            final_estimator=GradientBoostingRegressor(n_estimators=100, random_state=42),
-            cv=cv_splits
+        base_models = MODELS_IN_THIS_FEATURE
+        final_estimator = GradientBoostingRegressor(n_estimators=100, random_state=42)
+
+
+
+    # Fit mỗi mô hình cơ sở đúng một lần trên toàn bộ tập train; stacking chỉ
+    # fit thêm trên từng fold, voting dùng lại các mô hình đã fit
+    with stage("fit"):
+        check_cancelled()
+        report_progress(progress, stage="training", model="decision_tree")
+        decision_tree_model.fit(X_train, Y_train)
+        check_cancelled()
+        report_progress(progress, stage="training", model="elastic")
+        elastic_net_model.fit(X_train, Y_train)
+        check_cancelled()
+        report_progress(progress, stage="training", model="stacking")
+        stacking_model = fit_stacking(
+            base_models, final_estimator, X_train, Y_train, cv_splits
         )
-
-        voting_model = VotingRegressor(
-            estimators=MODELS_IN_THIS_FEATURE
+        voting_model = VotingEnsemble(base_models)
+
+    check_cancelled()
+    report_progress(progress, stage="predicting")
+
+    with stage("predict"):
+        # Dự đoán train/test bằng stacking để đánh giá
+        Y_train_predicted = stacking_model.predict(X_train)
+        Y_test_predicted = stacking_model.predict(X_test)
+
+        predictor = StackPredictor(
+            stats=classify_stats(X),
+            stacking_model=stacking_model,
+            voting_model=voting_model,
+            decision_tree_model=decision_tree_model,
+            elastic_net_model=elastic_net_model,
         )
 
+        # Phân loại mỗi x0
+        y0 = None
+        if x0 is not None:
+            y0 = predictor.predict(x0)
+
+    with stage("result"):
+        result = predicting_result(
+            model=STACK_MODEL_NAME,
+            X_train=X_train,
+            Y_train=Y_train,
+            Y_train_predicted=Y_train_predicted,
+            X_test=X_test,
+            Y_test=Y_test,
+            Y_test_predicted=Y_test_predicted,
+            x0=x0,
+            y0=np.array(y0),
+        )
+    with stage("registry"):
+        result["model_id"] = register_model(predictor, STACK_MODEL_NAME, n_features)
 
-
-    # Fit tất cả các mô hình
-    stacking_model.fit(X_train, Y_train)
-    voting_model.fit(X_train, Y_train)
-    decision_tree_model.fit(X_train, Y_train)
-    elastic_net_model.fit(X_train, Y_train)
-
-    # Dự đoán train/test bằng stacking để đánh giá
-    Y_train_predicted = stacking_model.predict(X_train)
-    Y_test_predicted = stacking_model.predict(X_test)
-    
-    # Phân loại mỗi x0
-    y0 = None
-    if x0 is not None:
-        x0_classify = classify(X, x0)
-        y0 = []
-
-        for i in range(x0.shape[0]):
-            x_input = x0[i].reshape(1, -1)  # luôn reshape về (1, n_features)
-            label = x0_classify[i]
-
-            match label:
-                case "elastic":
-                    y0.append(elastic_net_model.predict(x_input)[0])
-                case "decision_tree":
-                    y0.append(decision_tree_model.predict(x_input)[0])
-                case "voting":
-                    y0.append(voting_model.predict(x_input)[0])
-                case "stacking":
-                    y0.append(stacking_model.predict(x_input)[0])
-                case _:
-                    Panic.unreachable()
-
-
-    return predicting_result(
-        model="Stacking + Voting + Elastic + DecisionTree",
-        X_train=X_train,
-        Y_train=Y_train,
-        Y_train_predicted=Y_train_predicted,
-        X_test=X_test,
-        Y_test=Y_test,
-        Y_test_predicted=Y_test_predicted,
-        x0=x0,
-        y0=np.array(y0),
-    )
+    return result
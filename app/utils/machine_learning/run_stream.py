@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from app import config
+from app.utils.machine_learning.control import report_progress
+from app.utils.machine_learning.data_preprocessing import holdout_fraction
+from app.utils.machine_learning.model_index import metrics_result
+from app.utils.machine_learning.registry import register_model
+from app.utils.machine_learning.streaming import (
+    RunningMetrics,
+    StreamingRegressor,
+    csv_to_binary,
+    read_chunks,
+)
+from app.utils.timing import stage
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def run_stream_model(
+    source,
+    model_name,
+    x0=None,
+    random_state=None,
+    target=-1,
+    header=False,
+    progress=None,
+):
+    """
+    Huấn luyện mô hình trên file CSV lớn hơn bộ nhớ, đọc theo từng khối dòng
+
+    Param:
+    - source: File CSV (bị xoá khi hàm kết thúc)
+    - model_name: sgd, passive_aggressive hoặc linear (StreamingRegressor)
+    - x0: Mảng dự đoán (tùy chọn)
+    - random_state: Seed cho việc chia dữ liệu và mô hình (tùy chọn)
+    - target: Vị trí cột Y trong CSV (mặc định cột cuối)
+    - header: Dòng đầu tiên của CSV là tên cột
+    - progress: Callable nhận tiến độ huấn luyện (tùy chọn)
+
+    Return:
+    - Kết quả cùng dạng với run_option_model (OutputOptionData), kèm model_id
+
+    Raises:
+    - ValueError: Nếu CSV hoặc x0 không hợp lệ
+
+    Note:
+    - Mỗi dòng thuộc tập kiểm tra với xác suất holdout_fraction(số dòng),
+      chọn bằng seed nên mọi lượt đọc chia giống nhau
+    - Bộ nhớ tối đa khoảng STREAM_CHUNK_ROWS dòng, không phụ thuộc số dòng
+    """
+    chunk_rows = config.STREAM_CHUNK_ROWS
+    data = source + ".f64"
+
+    try:
+        with stage("prepare"):
+            n_samples, n_features = csv_to_binary(
+                source, data, target, header, chunk_rows
+            )
+            _remove(source)
+
+            if x0 is not None:
+                x0 = np.asarray(x0, dtype=float)
+                if x0.ndim == 1:
+                    x0 = x0.reshape(1, -1)
+                if x0.shape[1] != n_features:
+                    raise ValueError(
+                        f"Số cột của x0 ({x0.shape[1]}) phải bằng số cột của X"
+                        f" ({n_features})"
+                    )
+
+        fraction = holdout_fraction(n_samples)
+        seed = random_state
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+
+        def chunks():
+            return read_chunks(data, n_features, chunk_rows, seed, fraction)
+
+        model = StreamingRegressor(model_name, random_state)
+        if model.needs_scaling:
+            with stage("scale"):
+                x_scaler, y_scaler = StandardScaler(), StandardScaler()
+                for X_train, Y_train, _, _ in chunks():
+                    if X_train.shape[0] > 0:
+                        x_scaler.partial_fit(X_train)
+                        y_scaler.partial_fit(Y_train.reshape(-1, 1))
+                if not hasattr(x_scaler, "mean_"):
+                    raise ValueError("Tập huấn luyện không có dòng nào")
+                model.set_scaling(x_scaler, y_scaler)
+
+        # linear giải chính xác sau một lượt; mô hình học dần cần nhiều lượt
+        epochs = config.STREAM_EPOCHS if model.needs_scaling else 1
+        with stage("fit"):
+            for epoch in range(epochs):
+                report_progress(
+                    progress,
+                    stage="training",
+                    model=model_name,
+                    epoch=epoch + 1,
+                    epochs=epochs,
+                )
+                order = np.random.default_rng([seed, epoch])
+                for X_train, Y_train, _, _ in chunks():
+                    # Xáo trộn trong khối: dữ liệu có thể đã được sắp xếp
+                    shuffled = order.permutation(X_train.shape[0])
+                    model.partial_fit(X_train[shuffled], Y_train[shuffled])
+
+        report_progress(progress, stage="predicting", model=model_name)
+        with stage("predict"):
+            train, test = RunningMetrics(), RunningMetrics()
+            for X_train, Y_train, X_test, Y_test in chunks():
+                if X_train.shape[0] > 0:
+                    train.add(Y_train, model.predict(X_train))
+                if X_test.shape[0] > 0:
+                    test.add(Y_test, model.predict(X_test))
+
+            if train.n == 0:
+                raise ValueError("Tập huấn luyện không có dòng nào")
+            if test.n == 0:
+                # Quá ít dòng để có dòng kiểm tra: như splitting_data khi < 10 dòng
+                test = train
+
+            try:
+                y0 = model.predict(x0) if x0 is not None else None
+            except Exception as e:
+                print(f"Lỗi khi predict với {model_name}: {e}")
+                y0 = None
+
+        with stage("result"):
+            result = metrics_result(
+                model=model_name,
+                data_size=n_samples,
+                rmse_train=train.rmse,
+                rmse_test=test.rmse,
+                mae=test.mae,
+                r2_train=train.r2,
+                r2_test=test.r2,
+                x0=x0,
+                y0=y0,
+            )
+    finally:
+        _remove(source)
+        _remove(data)
+
+    with stage("registry"):
+        result["model_id"] = register_model(model, model_name, n_features)
+
+    return result
@@ -0,0 +1,326 @@
+import json
+import os
+import uuid
+
+import joblib
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+
+from app import config
+from app.utils.machine_learning.data_preprocessing import holdout_fraction
+from app.utils.machine_learning.linear_path import RunningGram
+from app.utils.machine_learning.model_training import PARAMS, build_model, seed_model
+from app.utils.machine_learning.session_store import (
+    META_FILE,
+    RESULT_FILE,
+    STATE_FILE,
+    TEST_FILE,
+    TRAIN_FILE,
+    evict_sessions,
+    session_directory,
+)
+from app.utils.machine_learning.streaming import RunningMetrics, read_chunks
+
+# Các mô hình cập nhật được từ thống kê đủ, không cần đọc lại dòng cũ
+SUFFICIENT_MODELS = ("linear", "ridge", "bayesian")
+
+# Số fold (chia ngẫu nhiên theo dòng) để chọn alpha của ridge
+_FOLDS = 3
+
+
+class SessionLinearRegressor(RegressorMixin, BaseEstimator):
+    """
+    Mô hình tuyến tính (linear, ridge, bayesian) có hệ số giải từ thống kê đủ
+    của một phiên, lưu được vào registry như mô hình sklearn
+    """
+
+    def __init__(self, name: str = "linear"):
+        self.name = name
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
+
+
+def _append_rows(path: str, X: np.ndarray, Y: np.ndarray, n_before: int):
+    """
+    Ghi thêm các dòng (X | Y, float64) vào cuối file
+
+    Note:
+    - Cắt file về đúng n_before dòng trước khi ghi: bỏ phần dở dang của lần
+      ghi trước nếu trạng thái phiên chưa kịp được lưu
+    """
+    row_bytes = (X.shape[1] + 1) * 8
+    with open(path, "ab") as f:
+        f.truncate(n_before * row_bytes)
+        np.column_stack([X, Y]).astype(np.float64).tofile(f)
+
+
+def _read_rows(path: str, n_features: int, n_rows: int):
+    rows = np.fromfile(path, dtype=np.float64, count=n_rows * (n_features + 1))
+    rows = rows.reshape(-1, n_features + 1)
+    return rows[:, :-1], rows[:, -1]
+
+
+def _r2(sse: float, sst: float) -> float:
+    # Quy ước như sklearn khi Y không đổi
+    if sst == 0:
+        return 1.0 if sse == 0 else 0.0
+    return 1.0 - sse / sst
+
+
+class DatasetSession:
+    """
+    Phiên dữ liệu tăng dần: thêm dòng mới rồi cập nhật mô hình mà không gửi lại
+    toàn bộ X, Y
+
+    Param:
+    - model_name: Tên mô hình người dùng gửi
+    - key: Tên mô hình trong MODELS
+    - n_features: Số cột X
+    - random_state: Seed chia train/test và khởi tạo mô hình (tùy chọn)
+
+    Note:
+    - Mỗi dòng mới thuộc tập kiểm tra với xác suất holdout_fraction(tổng số
+      dòng), dòng train được chia ngẫu nhiên vào _FOLDS fold
+    - linear, ridge, bayesian (SUFFICIENT_MODELS): mỗi fold train và tập kiểm
+      tra giữ XᵀX, Xᵀy, tổng, tổng bình phương (RunningGram); thêm k dòng tốn
+      O(k·p²), mô hình, chỉ số train, RMSE và R² kiểm tra được giải lại từ
+      thống kê trong O(p³), không đọc lại dòng cũ
+    - MAE kiểm tra của SUFFICIENT_MODELS là MAE cộng dồn: mỗi dòng kiểm tra
+      được chấm một lần, bằng mô hình ngay sau lần thêm dòng đưa nó vào
+      (|sai số| không cộng được từ thống kê đủ)
+    - Mô hình khác (cây, kernel, ...): huấn luyện lại trên toàn bộ dòng train,
+      chỉ số kiểm tra đọc lại test.f64 (rẻ hơn lần huấn luyện lại)
+    - Mọi dòng được ghi thêm vào file (train.f64, test.f64) trong thư mục phiên:
+      mô hình khác cần dữ liệu để fit và tính chỉ số
+    """
+
+    def __init__(self, model_name: str, key: str, n_features: int, random_state=None):
+        self.session_id = uuid.uuid4().hex
+        self.model_name = model_name
+        self.key = key
+        self.n_features = n_features
+        self.random_state = random_state
+        self.seed = (
+            random_state
+            if random_state is not None
+            else np.random.SeedSequence().entropy
+        )
+        self.n_rows = 0
+        self.n_train = 0
+        self.n_test = 0
+        self.folds: list[RunningGram] | None = None
+        self.test: RunningGram | None = None
+        # Tổng |sai số| cộng dồn trên tập kiểm tra (SUFFICIENT_MODELS)
+        self.test_sae = 0.0
+        # Các dòng kiểm tra vừa thêm, chờ fit() chấm điểm
+        self._new_test = None
+        self.model = None
+
+    @property
+    def incremental(self) -> bool:
+        return self.key in SUFFICIENT_MODELS
+
+    @property
+    def directory(self) -> str:
+        return session_directory(self.session_id)
+
+    def append(self, X: np.ndarray, Y: np.ndarray):
+        """
+        Chia k dòng mới vào train / test, cộng vào thống kê đủ và ghi xuống đĩa
+        """
+        k = X.shape[0]
+        fraction = holdout_fraction(self.n_rows + k)
+        # Seed theo số dòng đã có: cùng dữ liệu, cùng thứ tự thêm → cùng cách chia
+        rng = np.random.default_rng([self.seed, self.n_rows])
+        test = rng.random(k) < fraction if fraction is not None else np.zeros(k, bool)
+        fold = rng.integers(0, _FOLDS, size=k)
+        train = ~test
+
+        if self.folds is None:
+            x_shift, y_shift = X.mean(axis=0), Y.mean()
+            self.folds = [RunningGram(x_shift, y_shift) for _ in range(_FOLDS)]
+            if self.incremental:
+                self.test = RunningGram(x_shift, y_shift)
+
+        for i, gram in enumerate(self.folds):
+            rows = train & (fold == i)
+            gram.add(X[rows], Y[rows])
+        if self.incremental:
+            self.test.add(X[test], Y[test])
+            self._new_test = X[test], Y[test]
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, TRAIN_FILE)
+        _append_rows(path, X[train], Y[train], self.n_train)
+        path = os.path.join(self.directory, TEST_FILE)
+        _append_rows(path, X[test], Y[test], self.n_test)
+
+        self.n_rows += k
+        self.n_train += int(train.sum())
+        self.n_test += int(test.sum())
+
+    def _ridge_alpha(self) -> float:
+        """
+        Chọn alpha của ridge theo MSE trung bình trên các fold, tính từ thống kê
+        (như LinearFamily.elastic), không cần dữ liệu của fold
+
+        Note:
+        - Khi chưa có fold nào dùng được (quá ít dòng): alpha nhỏ nhất
+        """
+        alphas = PARAMS["ridge"]["alphas"]
+        mean_mse = np.zeros(len(alphas))
+        used = 0
+
+        for i, block in enumerate(self.folds):
+            train = RunningGram.combine(
+                gram for j, gram in enumerate(self.folds) if j != i
+            )
+            if block.n_samples == 0 or train.n_samples == 0:
+                continue
+            used += 1
+            for a, alpha in enumerate(alphas):
+                coef, intercept = train.solve(alpha)
+                mean_mse[a] += block.sse(coef, intercept) / block.n_samples
+
+        return float(alphas[np.argmin(mean_mse)] if used else alphas[0])
+
+    def fit(self) -> str:
+        """
+        Cập nhật mô hình sau khi thêm dòng
+
+        Return:
+        - "incremental" nếu giải từ thống kê đủ, "full" nếu huấn luyện lại
+        """
+        if not self.incremental:
+            X_train, Y_train = _read_rows(
+                os.path.join(self.directory, TRAIN_FILE), self.n_features, self.n_train
+            )
+            model = build_model(self.key, X_train, Y_train)
+            seed_model(model, self.random_state)
+            self.model = model.fit(X_train, Y_train)
+            return "full"
+
+        total = RunningGram.combine(self.folds)
+        info = {}
+        match self.key:
+            case "linear":
+                coef, intercept = total.solve()
+            case "ridge":
+                alpha = self._ridge_alpha()
+                coef, intercept = total.solve(alpha)
+                info["alpha_"] = alpha
+            case "bayesian":
+                coef, intercept, info = total.bayesian()
+
+        model = SessionLinearRegressor(self.key)
+        model.coef_, model.intercept_ = coef, float(intercept)
+        model.n_features_in_ = self.n_features
+        for key, value in info.items():
+            setattr(model, key, value)
+        self.model = model
+
+        if self._new_test is not None:
+            X_test, Y_test = self._new_test
+            if X_test.shape[0] > 0:
+                self.test_sae += float(np.abs(Y_test - model.predict(X_test)).sum())
+            self._new_test = None
+        return "incremental"
+
+    def _scan(self, name: str, n_rows: int) -> RunningMetrics:
+        metrics = RunningMetrics()
+        if n_rows == 0:
+            return metrics
+
+        path = os.path.join(self.directory, name)
+        for X, Y, _, _ in read_chunks(path, self.n_features, config.STREAM_CHUNK_ROWS):
+            metrics.add(Y, self.model.predict(X))
+        return metrics
+
+    def metrics(self) -> dict:
+        """
+        RMSE, R² trên tập train và tập kiểm tra, MAE trên tập kiểm tra
+
+        Note:
+        - SUFFICIENT_MODELS: tính từ thống kê đủ và MAE cộng dồn, O(p²), không
+          đọc lại dòng nào
+        - Mô hình khác: đọc file train, test theo khối
+        - Chưa có dòng kiểm tra (quá ít dòng): dùng tập train, như splitting_data
+        """
+        if self.incremental:
+            coef, intercept = self.model.coef_, self.model.intercept_
+            total = RunningGram.combine(self.folds)
+            sse = total.sse(coef, intercept)
+            rmse_train = float(np.sqrt(sse / total.n_samples))
+            r2_train = _r2(sse, total.sst())
+            if self.n_test > 0:
+                sse = self.test.sse(coef, intercept)
+                return {
+                    "rmse_train": rmse_train,
+                    "r2_train": r2_train,
+                    "rmse_test": float(np.sqrt(sse / self.n_test)),
+                    "r2_test": _r2(sse, self.test.sst()),
+                    "mae": self.test_sae / self.n_test,
+                }
+        else:
+            train = self._scan(TRAIN_FILE, self.n_train)
+            rmse_train, r2_train = train.rmse, train.r2
+
+        if self.n_test > 0:
+            test = self._scan(TEST_FILE, self.n_test)
+        else:
+            test = self._scan(TRAIN_FILE, self.n_train)
+
+        return {
+            "rmse_train": rmse_train,
+            "r2_train": r2_train,
+            "rmse_test": test.rmse,
+            "r2_test": test.r2,
+            "mae": test.mae,
+        }
+
+    def save(self, result: dict):
+        """
+        Lưu trạng thái phiên và kết quả mới nhất, xoá phiên cũ khi vượt quá
+        SESSION_MAX_ENTRIES
+
+        Note:
+        - result và kích thước phiên (dùng để ước lượng chi phí lần thêm dòng
+          sau) được lưu riêng ra JSON: đọc lại không cần nạp sklearn
+        """
+        meta = {
+            "model_name": self.model_name,
+            "n_features": self.n_features,
+            "n_rows": self.n_rows,
+            "n_train": self.n_train,
+        }
+        for name, content in (
+            (STATE_FILE, self),
+            (RESULT_FILE, result),
+            (META_FILE, meta),
+        ):
+            path = os.path.join(self.directory, name)
+            # Ghi ra file tạm rồi đổi tên để không ai đọc phải file dở dang
+            tmp_path = path + ".tmp"
+            if name == STATE_FILE:
+                joblib.dump(content, tmp_path)
+            else:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(content, f)
+            os.replace(tmp_path, path)
+
+        evict_sessions()
+
+
+def load_session(session_id: str) -> DatasetSession:
+    """
+    Nạp phiên từ đĩa
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại hoặc đã bị xoá
+    """
+    path = os.path.join(session_directory(session_id), STATE_FILE)
+    try:
+        return joblib.load(path)
+    except FileNotFoundError:
+        raise KeyError(session_id)
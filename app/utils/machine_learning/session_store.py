@@ -0,0 +1,124 @@
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+from app import config
+
+# Các file trong thư mục của một phiên (SESSION_DIR/{session_id})
+STATE_FILE = "state.joblib"
+RESULT_FILE = "result.json"
+META_FILE = "meta.json"
+TRAIN_FILE = "train.f64"
+TEST_FILE = "test.f64"
+LOCK_FILE = "lock"
+
+
+def session_directory(session_id: str) -> str:
+    """
+    Thư mục của phiên
+
+    Raises:
+    - KeyError: Nếu session_id không hợp lệ
+    """
+    if not session_id.isalnum():
+        raise KeyError(session_id)
+    return os.path.join(config.SESSION_DIR, session_id)
+
+
+@contextmanager
+def session_lock(session_id: str):
+    """
+    Khoá độc quyền một phiên giữa mọi process (mọi worker, mọi instance cùng
+    SESSION_DIR): các lần thêm dòng / xoá phiên được chạy lần lượt
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại hoặc đã bị xoá
+
+    Note:
+    - fcntl.flock trên LOCK_FILE trong thư mục phiên; khoá tự nhả khi process
+      chết nên không bị kẹt
+    - Phiên bị xoá trong lúc chờ khoá: người giữ khoá tiếp theo sẽ không đọc
+      được file trạng thái (KeyError khi load_session)
+    """
+    path = os.path.join(session_directory(session_id), LOCK_FILE)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except FileNotFoundError:
+        raise KeyError(session_id)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def evict_sessions():
+    """
+    Xoá các phiên ít được dùng nhất khi vượt quá SESSION_MAX_ENTRIES
+
+    Note:
+    - Thời điểm dùng gần nhất là mtime của file trạng thái; thư mục chưa có
+      file trạng thái (lần tạo bị lỗi giữa chừng) dùng mtime của chính nó để
+      cuối cùng vẫn bị xoá
+    """
+    entries = []
+    with os.scandir(config.SESSION_DIR) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            try:
+                mtime = os.stat(os.path.join(entry.path, STATE_FILE)).st_mtime
+            except FileNotFoundError:
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+            entries.append((mtime, entry.path))
+
+    entries.sort()
+    for _, path in entries[: max(len(entries) - config.SESSION_MAX_ENTRIES, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def read_session_result(session_id: str) -> dict:
+    """
+    Kết quả mới nhất của phiên (đọc JSON, không nạp mô hình / sklearn)
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại hoặc đã bị xoá
+    """
+    path = os.path.join(session_directory(session_id), RESULT_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise KeyError(session_id)
+
+
+def read_session_meta(session_id: str) -> dict:
+    """
+    Thông tin kích thước của phiên: model_name, n_features, n_rows, n_train
+    (đọc JSON, không nạp mô hình / sklearn)
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại hoặc đã bị xoá
+    """
+    path = os.path.join(session_directory(session_id), META_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise KeyError(session_id)
+
+
+def delete_session(session_id: str):
+    """
+    Xoá phiên cùng dữ liệu của nó
+
+    Raises:
+    - KeyError: Nếu phiên không tồn tại
+    """
+    with session_lock(session_id):
+        shutil.rmtree(session_directory(session_id), ignore_errors=True)
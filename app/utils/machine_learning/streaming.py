@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import PassiveAggressiveRegressor, SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+from app.utils.machine_learning.linear_path import RunningGram
+
+# --------------------------------
+# Đọc dữ liệu theo khối
+# --------------------------------
+def csv_to_binary(
+    source: str,
+    destination: str,
+    target: int = -1,
+    header: bool = False,
+    chunk_rows=10000,
+) -> tuple[int, int]:
+    """
+    Đọc file CSV theo từng khối dòng, ghi ra file nhị phân float64 (cột Y ở cuối)
+
+    Param:
+    - source: File CSV, mỗi dòng là một mẫu, chỉ gồm số
+    - destination: File nhị phân cần ghi
+    - target: Vị trí cột Y (mặc định cột cuối, chấp nhận chỉ số âm)
+    - header: Dòng đầu tiên là tên cột
+    - chunk_rows: Số dòng mỗi khối
+
+    Return:
+    - (n_samples, n_features)
+
+    Raises:
+    - ValueError: Nếu file rỗng, có giá trị không phải số / thiếu / vô hạn,
+      có ít hơn 2 cột hoặc target không hợp lệ
+
+    Note:
+    - CSV chỉ được phân tích một lần: các lượt sau đọc lại file nhị phân
+    - Bộ nhớ tối đa là một khối, không phụ thuộc kích thước file
+    """
+    n_samples, n_columns, order = 0, None, None
+
+    try:
+        reader = pd.read_csv(
+            source,
+            header=0 if header else None,
+            chunksize=chunk_rows,
+            dtype=np.float64,
+            skipinitialspace=True,
+        )
+        with reader, open(destination, "wb") as f:
+            for chunk in reader:
+                values = chunk.to_numpy(dtype=np.float64)
+
+                if n_columns is None:
+                    n_columns = values.shape[1]
+                    if n_columns < 2:
+                        raise ValueError("CSV phải có ít nhất 2 cột (X và Y)")
+                    if not -n_columns <= target < n_columns:
+                        raise ValueError(
+                            f"target ({target}) nằm ngoài {n_columns} cột của CSV"
+                        )
+                    column = target % n_columns
+                    order = [i for i in range(n_columns) if i != column] + [column]
+
+                if not np.isfinite(values).all():
+                    raise ValueError(
+                        f"Dòng {n_samples + 1}..{n_samples + len(values)} có giá trị"
+                        " thiếu hoặc không hữu hạn"
+                    )
+
+                values[:, order].tofile(f)
+                n_samples += values.shape[0]
+    except pd.errors.EmptyDataError:
+        raise ValueError("CSV không có dữ liệu")
+    except pd.errors.ParserError as e:
+        raise ValueError(f"CSV không hợp lệ: {e}")
+
+    if n_samples == 0:
+        raise ValueError("CSV không có dữ liệu")
+
+    return n_samples, n_columns - 1
+
+
+def read_chunks(
+    path: str,
+    n_features: int,
+    chunk_rows: int,
+    seed=None,
+    fraction: float | None = None,
+):
+    """
+    Đọc lại file nhị phân của csv_to_binary theo từng khối, chia train/test
+
+    Param:
+    - path: File nhị phân
+    - n_features: Số cột X
+    - chunk_rows: Số dòng mỗi khối
+    - seed: Seed chọn dòng kiểm tra (cùng seed → cùng cách chia ở mọi lượt đọc)
+    - fraction: Tỉ lệ dòng kiểm tra (None = tập kiểm tra là toàn bộ dữ liệu)
+
+    Yield:
+    - (X_train, Y_train, X_test, Y_test) của mỗi khối
+    """
+    n_columns = n_features + 1
+    rng = np.random.default_rng(seed)
+
+    with open(path, "rb") as f:
+        while True:
+            block = np.fromfile(f, dtype=np.float64, count=chunk_rows * n_columns)
+            if block.size == 0:
+                return
+
+            block = block.reshape(-1, n_columns)
+            X, Y = block[:, :-1], block[:, -1]
+            if fraction is None:
+                yield X, Y, X, Y
+                continue
+
+            test = rng.random(X.shape[0]) < fraction
+            yield X[~test], Y[~test], X[test], Y[test]
+
+
+# --------------------------------
+# Chỉ số cộng dồn
+# --------------------------------
+class RunningMetrics:
+    """
+    RMSE, MAE, R² cộng dồn theo từng khối dòng
+
+    Note:
+    - Tổng bình phương của Y quanh trung bình được gộp theo công thức của
+      Chan (ổn định số học, không cần lượt đọc thứ hai)
+    - Quy ước như sklearn khi Y không đổi: R² = 1 nếu dự đoán đúng hết, ngược lại 0
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+
+    def add(self, Y: np.ndarray, Y_predicted: np.ndarray):
+        k = Y.shape[0]
+        if k == 0:
+            return
+
+        residual = Y - Y_predicted
+        self.sse += float(residual @ residual)
+        self.sae += float(np.abs(residual).sum())
+
+        block_mean = float(Y.mean())
+        block_m2 = float(((Y - block_mean) ** 2).sum())
+        delta = block_mean - self.y_mean
+        total = self.n + k
+        self.y_mean += delta * k / total
+        self.y_m2 += block_m2 + delta**2 * self.n * k / total
+        self.n = total
+
+    @property
+    def rmse(self) -> float:
+        return float(np.sqrt(self.sse / self.n))
+
+    @property
+    def mae(self) -> float:
+        return self.sae / self.n
+
+    @property
+    def r2(self) -> float:
+        if self.y_m2 == 0:
+            return 1.0 if self.sse == 0 else 0.0
+        return 1.0 - self.sse / self.y_m2
+
+
+# --------------------------------
+# Mô hình học dần
+# --------------------------------
+class StreamingRegressor(RegressorMixin, BaseEstimator):
+    """
+    Mô hình hồi quy học theo từng khối dòng (partial_fit)
+
+    Param:
+    - name: sgd, passive_aggressive hoặc linear
+    - random_state: Seed của sgd / passive_aggressive
+
+    Note:
+    - sgd, passive_aggressive: X và Y được chuẩn hoá bằng thống kê của tập
+      train (set_scaling) trước khi partial_fit, dự đoán được đổi lại đơn vị của Y
+    - linear: cộng dồn XᵀX, Xᵀy (RunningGram) rồi giải bình phương tối thiểu,
+      kết quả như LinearRegression trên toàn bộ các dòng đã học
+    """
+
+    def __init__(self, name: str = "sgd", random_state=None):
+        self.name = name
+        self.random_state = random_state
+
+    @property
+    def needs_scaling(self) -> bool:
+        return self.name != "linear"
+
+    def set_scaling(self, x_scaler: StandardScaler, y_scaler: StandardScaler):
+        """
+        Gắn thống kê chuẩn hoá (StandardScaler đã partial_fit trên tập train)
+        """
+        self.x_scaler_ = x_scaler
+        self.y_mean_ = float(y_scaler.mean_[0])
+        self.y_scale_ = float(y_scaler.scale_[0])
+        return self
+
+    def _estimator(self):
+        match self.name:
+            case "sgd":
+                return SGDRegressor(random_state=self.random_state)
+            case "passive_aggressive":
+                return PassiveAggressiveRegressor(
+                    C=0.01, random_state=self.random_state
+                )
+            case _:
+                raise ValueError(f"Không có mô hình streaming {self.name}")
+
+    def partial_fit(self, X, Y):
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        self.n_features_in_ = X.shape[1]
+
+        if self.name == "linear":
+            if not hasattr(self, "gram_"):
+                self.gram_ = RunningGram()
+            self.gram_.add(X, Y)
+            self.coef_ = None
+            return self
+
+        if not hasattr(self, "estimator_"):
+            self.estimator_ = self._estimator()
+        if X.shape[0] > 0:
+            self.estimator_.partial_fit(
+                self.x_scaler_.transform(X), (Y - self.y_mean_) / self.y_scale_
+            )
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+
+        if self.name == "linear":
+            # Chỉ giải khi cần: partial_fit không phải giải lại sau mỗi khối
+            if self.coef_ is None:
+                self.coef_, self.intercept_ = self.gram_.solve()
+            return X @ self.coef_ + self.intercept_
+
+        scaled = self.estimator_.predict(self.x_scaler_.transform(X))
+        return scaled * self.y_scale_ + self.y_mean_
@@ -0,0 +1,178 @@
+import threading
+
+# Mốc (giây) của histogram thời gian các giai đoạn
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """
+    Histogram theo định dạng Prometheus (bucket cộng dồn, _sum, _count)
+
+    Param:
+    - name, documentation: Tên và mô tả của metric
+    - labelnames: Tên các nhãn
+    - buckets: Các mốc trên (không gồm +Inf)
+    """
+
+    def __init__(
+        self, name: str, documentation: str, labelnames=(), buckets=STAGE_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            # [số lần theo từng bucket..., tổng, số lần]
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        for key, values in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, values):
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {values[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Gauge theo định dạng Prometheus: đặt trực tiếp (inc / dec / set) hoặc lấy từ hàm
+
+    Param:
+    - name, documentation: Tên và mô tả của metric
+    - labelnames: Tên các nhãn (chỉ dùng với set)
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._value = 0.0
+        self._series: dict[tuple, float] = {}
+        self._function = None
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._series[key] = value
+
+    def set_function(self, function):
+        """
+        Lấy giá trị từ function() mỗi lần xuất metrics (None = dùng giá trị đã đặt)
+        """
+        self._function = function
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return 0.0
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._series.get(key, self._value)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        if not self.labelnames:
+            lines.append(f"{self.name} {_format_value(self.value())}")
+            return lines
+
+        with self._lock:
+            series = dict(self._series)
+        for key, value in sorted(series.items()):
+            labels = _format_labels(dict(zip(self.labelnames, key)))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "regression_stage_seconds",
+    "Thời gian từng giai đoạn xử lý request (giây)",
+    labelnames=("endpoint", "model", "stage"),
+)
+TRAININGS_IN_FLIGHT = Gauge(
+    "regression_trainings_in_flight", "Số lượt huấn luyện đang chạy"
+)
+JOB_QUEUE_DEPTH = Gauge("regression_job_queue_depth", "Số job đang chờ trong hàng đợi")
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "regression_admission_queue_depth", "Số lượt huấn luyện đang chờ admission"
+)
+ADMISSION_CPU_IN_FLIGHT = Gauge(
+    "regression_admission_cpu_seconds_in_flight",
+    "Tổng số giây CPU ước lượng của các lượt huấn luyện đang chạy",
+)
+STARTUP_SECONDS = Gauge(
+    "regression_startup_seconds",
+    "Thời gian khởi động theo giai đoạn (import, database, executor, warmup, ...)",
+    labelnames=("phase",),
+)
+
+
+def observe_stages(stages: dict[str, float], endpoint: str, model: str = ""):
+    """
+    Ghi thời gian các giai đoạn của một request vào STAGE_SECONDS
+    """
+    for name, seconds in stages.items():
+        STAGE_SECONDS.observe(seconds, endpoint=endpoint, model=model, stage=name)
+
+
+def render_metrics() -> str:
+    """
+    Toàn bộ metrics theo định dạng text của Prometheus
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
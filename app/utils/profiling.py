@@ -0,0 +1,232 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from app import config
+
+# Chỉ liệt kê hàm của các thư viện tính toán và code huấn luyện của app
+# (scipy là backend đại số tuyến tính của sklearn)
+HOT_PACKAGES = ("sklearn", "numpy", "scipy", "app/utils/machine_learning")
+
+_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class Profile:
+    """
+    Yêu cầu profile của một request
+
+    Note:
+    - used = True khi request thực sự huấn luyện (không trúng cache) và
+      profile được ghi ra PROFILE_DIR với tên id
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.used = False
+
+
+# Profile của request hiện tại, None = không profile
+_profile: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+# True trong lúc call_with_profile đang chạy (ở tiến trình / thread hiện tại)
+_active: ContextVar[bool] = ContextVar("profile_active", default=False)
+
+
+def profile_active() -> bool:
+    """
+    Việc huấn luyện hiện tại có đang chạy dưới cProfile hay không
+
+    Note:
+    - cProfile chỉ đo tiến trình gọi: khi đang profile, phần việc song song
+      (ứng viên của best-model) phải chạy ngay trong tiến trình này
+    """
+    return _active.get()
+
+
+def should_profile(requested: bool) -> bool:
+    """
+    Quyết định có profile request hay không
+
+    Param:
+    - requested: Request có bật cờ profile (header / query) hay không
+
+    Note:
+    - Cờ của request chỉ có tác dụng khi PROFILE_ENABLED; ngoài ra một tỉ lệ
+      PROFILE_SAMPLE_RATE request được chọn ngẫu nhiên
+    """
+    if requested and config.PROFILE_ENABLED:
+        return True
+    return (
+        config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+    )
+
+
+@contextmanager
+def profiling(profile: Profile | None):
+    """
+    Gắn profile cho ngữ cảnh hiện tại (None = không profile)
+    """
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+def current_profile() -> Profile | None:
+    return _profile.get()
+
+
+def _short_path(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    if "site-packages/" in path:
+        return path.rsplit("site-packages/", 1)[1]
+    if "/app/" in path:
+        return "app/" + path.rsplit("/app/", 1)[1]
+    return path
+
+
+def _is_hot(filename: str, function: str) -> bool:
+    # Hàm C (vd: <method 'dot' of 'numpy.ndarray' objects>) có filename "~"
+    if filename == "~":
+        return any(package in function for package in HOT_PACKAGES)
+    path = filename.replace("\\", "/")
+    return any(f"/{package}/" in path for package in HOT_PACKAGES)
+
+
+def hot_functions(stats: pstats.Stats, top_n: int) -> list[dict]:
+    """
+    top_n hàm tốn thời gian nhất (thời gian tự thân) trong HOT_PACKAGES
+
+    Return:
+    - List dict gồm function, calls, self_ms, cumulative_ms
+    """
+    rows = [
+        (tottime, cumtime, calls, filename, line, function)
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in (
+            stats.stats.items()
+        )
+        if _is_hot(filename, function)
+    ]
+    rows.sort(reverse=True)
+
+    return [
+        {
+            "function": (
+                function
+                if filename == "~"
+                else f"{_short_path(filename)}:{line}({function})"
+            ),
+            "calls": calls,
+            "self_ms": round(tottime * 1000, 3),
+            "cumulative_ms": round(cumtime * 1000, 3),
+        }
+        for tottime, cumtime, calls, filename, line, function in rows[:top_n]
+    ]
+
+
+def _path(profile_id: str, suffix: str) -> str:
+    return os.path.join(config.PROFILE_DIR, profile_id + suffix)
+
+
+def _evict():
+    """
+    Xoá các profile cũ nhất khi vượt quá PROFILE_MAX_ENTRIES
+    """
+    entries = []
+    with os.scandir(config.PROFILE_DIR) as it:
+        for file in it:
+            if file.name.endswith(".json"):
+                entries.append((file.stat().st_mtime, file.name[: -len(".json")]))
+
+    entries.sort()
+    for _, profile_id in entries[: max(0, len(entries) - config.PROFILE_MAX_ENTRIES)]:
+        for suffix in (".json", ".prof"):
+            try:
+                os.remove(_path(profile_id, suffix))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profile_id: str, profiler: cProfile.Profile, wall_seconds: float):
+    """
+    Ghi profile ra PROFILE_DIR: {id}.prof (đọc bằng pstats / snakeviz) và
+    {id}.json (tóm tắt các hàm tốn thời gian nhất)
+    """
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(_path(profile_id, ".prof"))
+
+    summary = {
+        "profile_id": profile_id,
+        "time": datetime.now().isoformat(),
+        "wall_ms": round(wall_seconds * 1000, 3),
+        "total_calls": stats.total_calls,
+        "top": hot_functions(stats, config.PROFILE_TOP_N),
+    }
+    # Ghi file tạm rồi đổi tên: người đọc không thấy file ghi dở
+    tmp = _path(profile_id, ".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp, _path(profile_id, ".json"))
+
+    _evict()
+
+
+def call_with_profile(profile_id: str, func, /, *args, **kwargs):
+    """
+    Gọi func dưới cProfile rồi ghi kết quả với tên profile_id (dùng trong
+    process pool, nơi thực sự huấn luyện)
+
+    Return:
+    - Kết quả của func
+
+    Note:
+    - Chỉ đo thread / tiến trình gọi func; trong lúc profile, profile_active()
+      là True để best-model chạy các ứng viên tuần tự trong tiến trình này
+      (nếu không, profile chỉ thấy joblib gửi việc và chờ)
+    - Lỗi ghi profile không làm hỏng request
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    token = _active.set(True)
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        _active.reset(token)
+        try:
+            save_profile(profile_id, profiler, time.perf_counter() - start)
+        except OSError as e:
+            print(f"Không ghi được profile {profile_id}: {e}")
+
+
+def profile_path(profile_id: str, suffix: str) -> str | None:
+    """
+    Đường dẫn file của profile (suffix: ".json" hoặc ".prof"), None nếu không tồn tại
+    """
+    if not _ID_PATTERN.fullmatch(profile_id):
+        return None
+    path = _path(profile_id, suffix)
+    return path if os.path.exists(path) else None
+
+
+def read_profile(profile_id: str) -> dict | None:
+    """
+    Bản tóm tắt của profile, None nếu không tồn tại (hoặc chưa chạy xong)
+    """
+    path = profile_path(profile_id, ".json")
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
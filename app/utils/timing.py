@@ -0,0 +1,124 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Timings(dict):
+    """
+    Thời gian (giây) cộng dồn theo tên giai đoạn, kèm nhãn (endpoint, model)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels: dict[str, str] = {}
+
+
+# Lần đo hiện tại, None = không đo
+_stages: ContextVar[Timings | None] = ContextVar("stages", default=None)
+
+
+@contextmanager
+def record_stages(timings: Timings | None = None):
+    """
+    Bắt đầu đo thời gian các giai đoạn trong ngữ cảnh hiện tại
+
+    Param:
+    - timings: Đo tiếp vào Timings có sẵn (mặc định tạo mới)
+
+    Return:
+    - Timings {tên giai đoạn: số giây}, được điền dần khi các stage() kết thúc
+
+    Note:
+    - Chỉ ghi nhận stage() chạy trong cùng ngữ cảnh (cùng thread / task, hoặc
+      task con tạo ra sau đó); tiến trình con phải gửi lại kết quả của
+      call_with_stages để cộng vào bằng add_stages
+    """
+    timings = Timings() if timings is None else timings
+    token = _stages.set(timings)
+    try:
+        yield timings
+    finally:
+        _stages.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Đo thời gian một giai đoạn (fit, predict, ...) nếu đang có record_stages()
+
+    Param:
+    - name: Tên giai đoạn, các lần đo cùng tên được cộng dồn
+    """
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def add_stages(stages: dict[str, float]):
+    """
+    Cộng thời gian các giai đoạn đo ở nơi khác (vd: worker) vào lần đo hiện tại
+    """
+    current = _stages.get()
+    if current is None:
+        return
+    for name, seconds in stages.items():
+        current[name] = current.get(name, 0.0) + seconds
+
+
+def add_concurrent_stages(stages: list[dict[str, float]], n_jobs: int):
+    """
+    Cộng thời gian các giai đoạn của những việc chạy song song (trên n_jobs
+    tiến trình) vào lần đo hiện tại
+
+    Param:
+    - stages: Thời gian các giai đoạn của từng việc (kết quả call_with_stages)
+    - n_jobs: Số tiến trình chạy các việc
+
+    Note:
+    - Các việc chạy cùng lúc nên tổng thời gian của chúng là thời gian CPU,
+      không phải thời gian thực của request. Mỗi giai đoạn được ghi theo
+      đường găng: max(việc lâu nhất, tổng / n_jobs); n_jobs = 1 thì bằng tổng
+    """
+    n_jobs = max(n_jobs, 1)
+    merged: dict[str, float] = {}
+    for name in {name for job in stages for name in job}:
+        seconds = [job[name] for job in stages if name in job]
+        merged[name] = max(max(seconds), sum(seconds) / n_jobs)
+    add_stages(merged)
+
+
+def set_stage_labels(**labels: str):
+    """
+    Gắn nhãn (endpoint, model, ...) cho lần đo hiện tại
+    """
+    current = _stages.get()
+    if current is not None:
+        current.labels.update(labels)
+
+
+def call_with_stages(func, /, *args, **kwargs):
+    """
+    Gọi func và đo các giai đoạn bên trong (dùng trong process pool / joblib)
+
+    Return:
+    - (kết quả của func, dict thời gian các giai đoạn)
+    """
+    with record_stages() as stages:
+        result = func(*args, **kwargs)
+    return result, dict(stages)
+
+
+def server_timing(stages: dict[str, float]) -> str:
+    """
+    Giá trị header Server-Timing, vd: "fit;dur=12.3, predict;dur=1.5" (ms)
+    """
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()
+    )
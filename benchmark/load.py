@@ -0,0 +1,260 @@
+"""
+Load test cho app FastAPI chạy ngay trong tiến trình (không cần server, không
+cần MongoDB): create_app() + lifespan, gọi qua httpx.ASGITransport, lịch sử
+lưu trong database bộ nhớ (URL memory://)
+
+Gửi lưu lượng trộn lẫn tới /regression/option/, /regression/best-model/,
+/regression/stack-model/ và các route lịch sử với số request đồng thời tuỳ
+chọn, rồi báo cáo độ trễ p50 / p95 / p99, thông lượng và độ trễ event loop
+
+Chạy:
+    python -m benchmark.load --requests 200 --concurrency 8
+    python -m benchmark.load --mix option=5,history=5 --rows 2000 --cols 10
+    python -m benchmark.load --output load.json
+
+Note:
+    - Mỗi request huấn luyện dùng dữ liệu mới nên không trúng cache kết quả
+    - Độ trễ event loop đo bằng một task ngủ định kỳ; client cũng chạy trên
+      cùng event loop nên con số này là cận trên của độ trễ do app gây ra
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from app import create_app
+from app.database import database
+from app.database.memory import MEMORY_URL_PREFIX
+
+DEFAULT_MIX = "option=6,history=6,stack_model=2,best_model=1"
+DEFAULT_OPTION_MODELS = "linear,ridge,lasso,elastic,decision_tree,knn"
+
+TRAINING_PATHS = {
+    "option": "/regression/option/",
+    "best_model": "/regression/best-model/",
+    "stack_model": "/regression/stack-model/",
+}
+HISTORY_PATHS = [
+    "/regression/option/history?limit=20",
+    "/regression/best-model/history?limit=10",
+    "/regression/stack-model/history?limit=10",
+    "/history/option?limit=10",
+]
+
+# Khoảng ngủ của task đo độ trễ event loop (giây)
+LAG_INTERVAL = 0.01
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """
+    Chuyển "option=6,history=6" thành {"option": 6, "history": 6}
+
+    Raises:
+    - ValueError: Nếu loại request không hợp lệ hoặc trọng số âm
+    """
+    mix = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in (*TRAINING_PATHS, "history"):
+            raise ValueError(f"Loại request không hợp lệ: {kind}")
+        mix[kind] = int(weight or 1)
+        if mix[kind] < 0:
+            raise ValueError(f"Trọng số của {kind} phải >= 0")
+
+    if not any(mix.values()):
+        raise ValueError("Cần ít nhất một loại request có trọng số > 0")
+    return mix
+
+
+def make_request(kind: str, rng: np.random.Generator, rows: int, cols: int, models):
+    """
+    Tạo (method, path, body) cho một request thuộc loại kind
+    """
+    if kind == "history":
+        return "GET", HISTORY_PATHS[rng.integers(len(HISTORY_PATHS))], None
+
+    X = rng.normal(size=(rows, cols))
+    Y = X @ rng.normal(size=cols) + rng.normal(scale=0.1, size=rows)
+    body = {"X_array": X.tolist(), "Y_array": Y.tolist(), "x0": X[:3].tolist()}
+    if kind == "option":
+        body["model"] = models[rng.integers(len(models))]
+    return "POST", TRAINING_PATHS[kind], body
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+async def _monitor_lag(lags: list[float]):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, loop.time() - start - LAG_INTERVAL))
+
+
+async def run_load(
+    n_requests: int,
+    concurrency: int,
+    mix: dict[str, int],
+    rows: int = 200,
+    cols: int = 5,
+    option_models=None,
+    seed: int = 0,
+) -> dict:
+    """
+    Khởi động app trong tiến trình và gửi n_requests request với concurrency
+    request đồng thời
+
+    Return:
+    - Dict gồm requests, duration_s, throughput_rps, loop_lag và thống kê
+      độ trễ / số lỗi theo từng loại request
+    """
+    option_models = option_models or DEFAULT_OPTION_MODELS.split(",")
+    kinds = random.Random(seed).choices(
+        list(mix), weights=list(mix.values()), k=n_requests
+    )
+    # Lịch sử cần có dữ liệu: bắt đầu bằng một request huấn luyện nếu có
+    training = [kind for kind in kinds if kind != "history"]
+    if training:
+        kinds.remove(training[0])
+        kinds.insert(0, training[0])
+
+    latencies: dict[str, list[float]] = {kind: [] for kind in mix}
+    errors: dict[str, int] = {kind: 0 for kind in mix}
+    lags: list[float] = []
+    queue = list(enumerate(kinds))
+
+    app = create_app()
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            index, kind = queue.pop(0)
+            rng = np.random.default_rng(seed * 1_000_003 + index)
+            method, path, body = make_request(kind, rng, rows, cols, option_models)
+
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except Exception as e:
+                print(f"Lỗi request {kind}: {e}")
+                ok = False
+            latencies[kind].append(time.perf_counter() - start)
+            if not ok:
+                errors[kind] += 1
+
+    url, database.URL = database.URL, MEMORY_URL_PREFIX
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://load-test",
+                timeout=None,
+                follow_redirects=True,
+            ) as client:
+                monitor = asyncio.create_task(_monitor_lag(lags))
+                start = time.perf_counter()
+                await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+                duration = time.perf_counter() - start
+                monitor.cancel()
+                await asyncio.gather(monitor, return_exceptions=True)
+    finally:
+        database.URL = url
+
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "rows": rows,
+        "cols": cols,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(n_requests / duration, 3),
+        "loop_lag": percentiles(lags),
+        "endpoints": {
+            kind: {
+                "count": len(latencies[kind]),
+                "errors": errors[kind],
+                **percentiles(latencies[kind]),
+            }
+            for kind in mix
+        },
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"\n{report['requests']} request, {report['concurrency']} đồng thời,"
+        f" {report['duration_s']:.1f} s, {report['throughput_rps']:.2f} req/s"
+    )
+    print(
+        f"{'endpoint':>12} {'count':>6} {'errors':>6} {'p50 (ms)':>10}"
+        f" {'p95 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}"
+    )
+    rows = [*report["endpoints"].items(), ("loop lag", report["loop_lag"])]
+    for name, stats in rows:
+        if stats["p50_ms"] is None:
+            continue
+        print(
+            f"{name:>12} {stats.get('count', ''):>6} {stats.get('errors', ''):>6}"
+            f" {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f}"
+            f" {stats['p99_ms']:>10.1f} {stats['max_ms']:>10.1f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Mặc định {DEFAULT_MIX}")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--option-models", default=DEFAULT_OPTION_MODELS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Ghi báo cáo ra file JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(
+        run_load(
+            args.requests,
+            args.concurrency,
+            mix,
+            rows=args.rows,
+            cols=args.cols,
+            option_models=args.option_models.split(","),
+            seed=args.seed,
+        )
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
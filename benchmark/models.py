@@ -0,0 +1,294 @@
+"""
+Đo hiệu năng của mọi mô hình (run_option_model cho từng khóa MODELS,
+run_best_model, run_stack_model) trên dữ liệu tổng hợp thuộc mọi nhóm
+kích thước của get_data_size_label và nhiều số cột khác nhau
+
+Mỗi trường hợp ghi lại: thời gian tổng (wall), thời gian fit / predict
+(từ app.utils.timing) và bộ nhớ cấp phát cao nhất (tracemalloc)
+
+Chạy:
+    python -m benchmark.models --output bench.json
+    python -m benchmark.models --sizes tiny,small --widths 1,5 --models linear,knn
+    python -m benchmark.models --baseline bench.json   # so sánh, báo chậm đi
+
+Note:
+    - Registry mô hình bị tắt trong lúc đo (không ghi file)
+    - Khi một trường hợp vượt quá --budget giây, các kích thước lớn hơn của
+      cùng mô hình và số cột được bỏ qua (status "skipped")
+    - Kết thúc với mã 1 nếu có trường hợp chậm hơn baseline quá ngưỡng
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import sklearn
+
+from app import config
+from app.utils.machine_learning import run_best_model, run_option_model, run_stack_model
+from app.utils.machine_learning.model_index import get_data_size_label
+from app.utils.machine_learning.model_training import MODELS
+from app.utils.timing import record_stages
+
+# Số dòng đại diện cho từng nhóm kích thước của get_data_size_label
+SIZES = {
+    "tiny": 30,
+    "small": 80,
+    "normal": 500,
+    "big": 5_000,
+    "enormous": 20_000,
+}
+WIDTHS = [1, 5, 20]
+
+# Tên mô hình mà run_option_model nhận cho các khóa MODELS khác tên
+OPTION_NAMES = {"svr": "svm", "nu_svr": "nu_svm"}
+
+CASES = [f"option/{name}" for name in MODELS] + ["best_model", "stack_model"]
+
+
+def make_data(n_samples: int, n_features: int, seed: int = 0):
+    """
+    Dữ liệu hồi quy tổng hợp: tuyến tính + một thành phần phi tuyến + nhiễu
+
+    Return:
+    - X, Y, x0 (5 dòng cần dự đoán)
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, n_features))
+    Y = (
+        X @ rng.normal(size=n_features)
+        + np.sin(X[:, 0]) * 2
+        + rng.normal(scale=0.1, size=n_samples)
+    )
+    x0 = rng.normal(size=(5, n_features))
+    return X, Y, x0
+
+
+def _runner(case: str):
+    if case == "best_model":
+        return run_best_model
+    if case == "stack_model":
+        return run_stack_model
+
+    name = case.split("/", 1)[1]
+    model_name = OPTION_NAMES.get(name, name)
+    return lambda X, Y, x0, random_state: run_option_model(
+        X, Y, x0, model_name, random_state
+    )
+
+
+def run_case(case: str, size: str, n_features: int, repeat: int = 1) -> dict:
+    """
+    Đo một trường hợp (lấy lần chạy nhanh nhất trong repeat lần)
+
+    Return:
+    - Dict gồm case, size, n_samples, n_features, status, wall_ms, fit_ms,
+      predict_ms, peak_mb (và error nếu lỗi)
+    """
+    n_samples = SIZES[size]
+    X, Y, x0 = make_data(n_samples, n_features)
+    run = _runner(case)
+    entry = {
+        "case": case,
+        "size": size,
+        "n_samples": n_samples,
+        "n_features": n_features,
+    }
+
+    best = None
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        try:
+            with record_stages() as stages:
+                start = time.perf_counter()
+                run(X, Y, x0, random_state=0)
+                wall = time.perf_counter() - start
+        except Exception as e:
+            return {**entry, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+        peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+        if best is None or wall < best["wall_ms"] / 1000:
+            best = {
+                "status": "ok",
+                "wall_ms": round(wall * 1000, 3),
+                "fit_ms": round(stages.get("fit", 0.0) * 1000, 3),
+                "predict_ms": round(stages.get("predict", 0.0) * 1000, 3),
+                "peak_mb": round(peak_bytes / 2**20, 3),
+            }
+
+    return {**entry, **best}
+
+
+def run_suite(cases, sizes, widths, repeat=1, budget=None, log=print) -> list[dict]:
+    """
+    Chạy mọi tổ hợp (case, số cột, kích thước) theo kích thước tăng dần
+
+    Param:
+    - budget: Số giây tối đa của một trường hợp; vượt quá thì bỏ qua các
+      kích thước lớn hơn của cùng case và số cột (None = không giới hạn)
+    """
+    sizes = sorted(sizes, key=SIZES.get)
+    results = []
+
+    tracemalloc.start()
+    try:
+        for case in cases:
+            for n_features in widths:
+                too_slow = False
+                for size in sizes:
+                    if too_slow:
+                        entry = {
+                            "case": case,
+                            "size": size,
+                            "n_samples": SIZES[size],
+                            "n_features": n_features,
+                            "status": "skipped",
+                        }
+                    else:
+                        entry = run_case(case, size, n_features, repeat)
+                        too_slow = (
+                            budget is not None
+                            and entry["status"] == "ok"
+                            and entry["wall_ms"] > budget * 1000
+                        )
+                    results.append(entry)
+                    log(format_entry(entry))
+    finally:
+        tracemalloc.stop()
+
+    return results
+
+
+def _key(entry: dict) -> tuple:
+    return entry["case"], entry["size"], entry["n_features"]
+
+
+def compare(results, baseline, threshold=0.25, min_ms=20.0) -> list[dict]:
+    """
+    So sánh với baseline, trả về các trường hợp bị chậm đi
+
+    Param:
+    - results, baseline: Danh sách kết quả (khóa "results" của file JSON)
+    - threshold: Tỉ lệ chậm đi tối đa cho phép (0.25 = chậm hơn 25%)
+    - min_ms: Chênh lệch tuyệt đối tối thiểu (ms) để coi là chậm đi, tránh
+      báo nhầm do nhiễu ở các trường hợp rất nhanh
+
+    Return:
+    - Danh sách {case, size, n_features, baseline_ms, wall_ms, ratio}
+    """
+    previous = {_key(entry): entry for entry in baseline if entry["status"] == "ok"}
+    regressions = []
+
+    for entry in results:
+        old = previous.get(_key(entry))
+        if old is None or entry["status"] != "ok":
+            continue
+
+        slower_ms = entry["wall_ms"] - old["wall_ms"]
+        if slower_ms > min_ms and entry["wall_ms"] > old["wall_ms"] * (1 + threshold):
+            regressions.append(
+                {
+                    "case": entry["case"],
+                    "size": entry["size"],
+                    "n_features": entry["n_features"],
+                    "baseline_ms": old["wall_ms"],
+                    "wall_ms": entry["wall_ms"],
+                    "ratio": round(entry["wall_ms"] / old["wall_ms"], 3),
+                }
+            )
+
+    return regressions
+
+
+def format_entry(entry: dict) -> str:
+    head = f"{entry['case']:>22} {entry['size']:>9} {entry['n_features']:>4}"
+    if entry["status"] != "ok":
+        return f"{head}  {entry['status']} {entry.get('error', '')}".rstrip()
+    return (
+        f"{head} {entry['wall_ms']:>10.1f} {entry['fit_ms']:>10.1f}"
+        f" {entry['predict_ms']:>10.1f} {entry['peak_mb']:>9.2f}"
+    )
+
+
+def _metadata() -> dict:
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", help="Danh sách case, vd linear,knn,best_model")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--widths", default=",".join(map(str, WIDTHS)))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--budget", type=float, default=60.0)
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.models:
+        wanted = _split(args.models)
+        cases = [
+            case for case in CASES if case in wanted or case.split("/")[-1] in wanted
+        ]
+
+    sizes = _split(args.sizes)
+    for size in sizes:
+        if size not in SIZES or get_data_size_label(SIZES[size]) != size:
+            parser.error(f"Kích thước không hợp lệ: {size}")
+
+    config.MODEL_REGISTRY_DIR = ""
+
+    print(
+        f"{'case':>22} {'size':>9} {'cols':>4} {'wall (ms)':>10}"
+        f" {'fit (ms)':>10} {'pred (ms)':>10} {'peak (MB)':>9}"
+    )
+    results = run_suite(
+        cases,
+        sizes,
+        [int(width) for width in _split(args.widths)],
+        repeat=args.repeat,
+        budget=args.budget,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": _metadata(), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        for item in regressions:
+            print(
+                f"CHẬM ĐI {item['case']} {item['size']} {item['n_features']} cột:"
+                f" {item['baseline_ms']:.1f} ms -> {item['wall_ms']:.1f} ms"
+                f" (x{item['ratio']})"
+            )
+        if regressions:
+            return 1
+        print("Không có trường hợp nào chậm đi so với baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Đo thời gian khởi động lạnh của app, mỗi lần trong một tiến trình Python mới:
+import package app, lifespan cho tới khi nhận request, request huấn luyện
+đầu tiên và warm-up worker (chạy nền)
+
+Chạy:
+    python -m benchmark.startup --repeat 5 --output startup.json
+    python -m benchmark.startup --baseline startup.json   # báo chậm đi
+
+Note:
+    - Database dùng bộ nhớ (memory://), không cần MongoDB
+    - Kết thúc với mã 1 nếu có chỉ số chậm hơn baseline quá ngưỡng
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+METRICS = ["import_ms", "ready_ms", "first_request_ms", "warmup_ms"]
+
+# Request huấn luyện đầu tiên, gửi ngay khi app sẵn sàng (phải chờ worker)
+FIRST_REQUEST = {
+    "X_array": [[1, 2], [2, 3], [3, 5], [4, 4], [5, 7], [6, 8], [7, 9], [8, 9]],
+    "Y_array": [1, 2, 3, 4, 5, 6, 7, 8],
+    "model": "linear",
+}
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+async def _measure_child() -> dict:
+    # Import trong hàm: tiến trình con phải bắt đầu đo trước khi import app
+    start = time.perf_counter()
+    from app import create_app
+
+    imported = time.perf_counter()
+
+    import httpx
+
+    from app.database import database
+    from app.utils import executor
+    from app.utils.metrics import STARTUP_SECONDS
+
+    database.URL = "memory://"
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        web_modules = sorted({name.split(".")[0] for name in sys.modules})
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://startup", follow_redirects=True
+        ) as client:
+            response = await client.post("/regression/option/", json=FIRST_REQUEST)
+            response.raise_for_status()
+        first_request = time.perf_counter()
+
+        if executor._warmup_task is not None:
+            await executor._warmup_task
+
+    return {
+        "import_ms": _ms(imported - start),
+        "ready_ms": _ms(ready - imported),
+        "first_request_ms": _ms(first_request - ready),
+        # Warm-up chạy nền, song song với request đầu tiên
+        "warmup_ms": _ms(STARTUP_SECONDS.value(phase="warmup")),
+        "sklearn_in_web_process": "sklearn" in web_modules,
+    }
+
+
+def run_once() -> dict:
+    """
+    Khởi động app trong một tiến trình mới, trả về các chỉ số của lần đó
+    """
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmark.startup", "--child"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: list[dict]) -> dict:
+    """
+    Trung vị của từng chỉ số qua các lần chạy
+    """
+    summary = {
+        name: round(statistics.median(run[name] for run in runs), 3) for name in METRICS
+    }
+    summary["sklearn_in_web_process"] = any(
+        run["sklearn_in_web_process"] for run in runs
+    )
+    return summary
+
+
+def compare(summary: dict, baseline: dict, threshold=0.25, min_ms=50.0) -> list[dict]:
+    """
+    So sánh với baseline, trả về các chỉ số bị chậm đi
+
+    Param:
+    - threshold: Tỉ lệ chậm đi tối đa cho phép (0.25 = chậm hơn 25%)
+    - min_ms: Chênh lệch tuyệt đối tối thiểu (ms) để coi là chậm đi
+    """
+    regressions = []
+    for name in METRICS:
+        old, new = baseline.get(name), summary[name]
+        if old is None:
+            continue
+        if new - old > min_ms and new > old * (1 + threshold):
+            regressions.append(
+                {
+                    "metric": name,
+                    "baseline_ms": old,
+                    "value_ms": new,
+                    "ratio": round(new / old, 3),
+                }
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="File JSON kết quả cũ để so sánh")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-ms", type=float, default=50.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        import asyncio
+
+        print(json.dumps(asyncio.run(_measure_child())))
+        return 0
+
+    runs = [run_once() for _ in range(args.repeat)]
+    summary = summarize(runs)
+    for name in METRICS:
+        print(f"{name:>18} {summary[name]:>10.1f}")
+    print(f"{'sklearn trong web':>18} {summary['sklearn_in_web_process']!s:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        regressions = compare(summary, baseline, args.threshold, args.min_ms)
+        for item in regressions:
+            print(
+                f"CHẬM ĐI {item['metric']}: {item['baseline_ms']:.1f} ms"
+                f" -> {item['value_ms']:.1f} ms (x{item['ratio']})"
+            )
+        if regressions:
+            return 1
+        print("Không có chỉ số nào chậm đi so với baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
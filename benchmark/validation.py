@@ -0,0 +1,111 @@
+"""
+So sánh thời gian validate input giữa cách cũ (duyệt từng phần tử bằng Python
+rồi Pydantic kiểm tra List[List[float]]) và cách mới (chuyển sang numpy một lần)
+
+Chạy:
+    python -m benchmark.validation
+"""
+
+import json
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, field_validator
+
+from app.schemas import InputOptionData
+from app.utils.machine_learning.data_preprocessing import prepare_input
+
+SIZES = [(1_000, 10), (10_000, 10), (100_000, 10), (100_000, 20)]
+REPEAT = 3
+
+
+class LegacyInputOptionData(BaseModel):
+    """Bản sao schema trước khi vector hoá, chỉ dùng để so sánh"""
+
+    X_array: Union[List[float], List[List[float]]]
+    Y_array: List[float]
+    x0: Optional[Union[List[float], List[List[float]]]] = None
+    model: str = "linear"
+
+    @field_validator("X_array", "x0", mode="before")
+    @classmethod
+    def ensure_2d(cls, v):
+        if v is None:
+            return None
+
+        if not isinstance(v, list) or not v:
+            raise ValueError("X_array/x0 không được rỗng")
+
+        if all(isinstance(el, (int, float)) for el in v):
+            return [[el] for el in v]
+
+        if all(isinstance(el, list) for el in v):
+            for row in v:
+                if not all(isinstance(el, (int, float)) for el in row):
+                    raise ValueError("Tất cả phần tử trong ma trận phải là số")
+            return v
+
+        raise ValueError("Kiểu dữ liệu không hợp lệ cho ma trận")
+
+    @field_validator("Y_array")
+    @classmethod
+    def check_XY_alignment(cls, y, info):
+        X = info.data.get("X_array")
+        if X is not None and len(X) != len(y):
+            raise ValueError("Số hàng của X_array phải bằng độ dài của Y_array")
+        return y
+
+    @field_validator("x0")
+    @classmethod
+    def check_columns_match(cls, v, info):
+        X_array = info.data.get("X_array")
+        if v is not None and X_array is not None and len(X_array[0]) != len(v[0]):
+            raise ValueError("Số cột của x0 phải bằng số cột của X_array")
+        return v
+
+
+def _best_of(func) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'rows x cols':>14} {'legacy (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+
+    for n_rows, n_cols in SIZES:
+        X = rng.normal(size=(n_rows, n_cols))
+        # Payload như sau khi FastAPI parse JSON: list Python lồng nhau
+        payload = json.loads(
+            json.dumps(
+                {
+                    "X_array": X.tolist(),
+                    "Y_array": X.sum(axis=1).tolist(),
+                    "x0": X[:5].tolist(),
+                }
+            )
+        )
+
+        def legacy():
+            data = LegacyInputOptionData.model_validate(payload)
+            prepare_input(data.X_array, data.Y_array, data.x0)
+
+        def vectorized():
+            data = InputOptionData.model_validate(payload)
+            prepare_input(data.X_array, data.Y_array, data.x0)
+
+        legacy_time = _best_of(legacy)
+        vectorized_time = _best_of(vectorized)
+        print(
+            f"{f'{n_rows} x {n_cols}':>14} {legacy_time * 1000:>12.1f}"
+            f" {vectorized_time * 1000:>11.1f} {legacy_time / vectorized_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+
+from app import config
+from app.database import get_simple_model_collection
+from app.database.memory import MemoryClient
+from app.router.option import router as option_router
+from app.router.utils import estimate_cost, run_training
+from app.utils.admission import AdmissionController, AdmissionRejected
+from app.utils.machine_learning import create_session_model
+from app.utils.machine_learning.control import Cancelled
+from app.utils.machine_learning.cost import model_cost, request_cost
+from app.utils.machine_learning.session_store import read_session_meta
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(60, 3))
+Y = X @ np.array([1.0, 2.0, 3.0]) + rng.normal(scale=0.1, size=60)
+
+
+def test_request_cost_depends_on_model_and_size():
+    linear, _ = request_cost("option", 10_000, 10, model_name="linear")
+    svr, svr_memory = request_cost("option", 10_000, 10, model_name="svm")
+    theilsen, _ = request_cost("option", 10_000, 10, model_name="theilsen")
+    best, _ = request_cost("best_model", 10_000, 10)
+    budget, _ = request_cost("best_model", 10_000, 10, time_budget_ms=1)
+
+    assert linear < theilsen < svr < best
+    assert budget < 1
+    assert request_cost("option", 1000, 10, model_name="svm")[0] < svr
+    assert svr_memory > request_cost("option", 10_000, 10, model_name="linear")[1]
+
+
+@pytest.mark.parametrize(
+    "model_name, key",
+    [
+        ("svm", "svr"),
+        ("SVM", "svr"),
+        ("nu_svm", "nu_svr"),
+        ("Nu_SVM", "nu_svr"),
+        ("theil_sen", "theilsen"),
+        ("TheilSen", "theilsen"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_estimate_cost_maps_client_model_names(model_name, key):
+    kwargs = {"X": np.zeros((5000, 10)), "model_name": model_name}
+    linear, linear_memory = await estimate_cost(
+        "option", {**kwargs, "model_name": "linear"}
+    )
+
+    cost, memory = await estimate_cost("option", kwargs)
+
+    assert cost == model_cost(key, 5000, 10) and cost > 100 * linear
+    if key != "theilsen":
+        # Cache kernel của SVR / NuSVR
+        assert memory > linear_memory + 100 * 1024**2
+
+
+@pytest.mark.asyncio
+async def test_session_append_cost_uses_whole_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", str(tmp_path / "registry"))
+    X_session = rng.normal(size=(400, 3))
+    Y_session = X_session @ np.array([1.0, 2.0, 3.0])
+    session = create_session_model(X_session, Y_session, None, "SVM", random_state=0)
+    kwargs = {"session_id": session["session_id"], "X": X[:5], "Y": Y[:5]}
+
+    cost, _ = await estimate_cost("session", kwargs)
+    batch, _ = await estimate_cost("session", {"X": X[:5], "model_name": "SVM"})
+
+    n_train = read_session_meta(session["session_id"])["n_train"]
+    assert n_train > 200
+    assert cost == model_cost("svr", n_train + 5, 3) and cost > batch
+
+
+@pytest.mark.asyncio
+async def test_admission_queues_in_order_beyond_budget():
+    admission = AdmissionController(cpu_seconds=10, memory_bytes=100, queue_size=2)
+    order = []
+
+    async def work(name, cost, memory=0):
+        async with admission.admit(cost, memory):
+            order.append(name)
+            await asyncio.sleep(0.05)
+
+    # big vượt ngân sách khi đang có việc chạy → chờ; small đến sau phải chờ big
+    tasks = [
+        asyncio.create_task(work("first", 6)),
+        asyncio.create_task(work("big", 8)),
+        asyncio.create_task(work("small", 1)),
+    ]
+    await asyncio.sleep(0.01)
+    assert order == ["first"] and admission.queue_depth == 2
+
+    with pytest.raises(AdmissionRejected) as e:
+        async with admission.admit(1, 0):
+            pass
+    assert e.value.retry_after == 15  # (6 + 8 + 1) / 1 giây CPU mỗi giây
+
+    await asyncio.gather(*tasks)
+    assert order == ["first", "big", "small"]
+    assert admission.cpu_in_flight == 0 and admission.queue_depth == 0
+
+    # Bộ nhớ cũng là ngân sách; việc duy nhất luôn được nhận dù vượt ngân sách
+    async with admission.admit(1, 1000):
+        task = asyncio.create_task(work("light", 1, 1))
+        await asyncio.sleep(0.01)
+        assert admission.queue_depth == 1
+    await task
+    assert order[-1] == "light"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    admission = AdmissionController(cpu_seconds=1, memory_bytes=100, queue_size=1)
+
+    async with admission.admit(1, 0):
+
+        async def wait():
+            async with admission.admit(1, 0):
+                pass
+
+        task = asyncio.create_task(wait())
+        await asyncio.sleep(0.01)
+        assert admission.queue_depth == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert admission.queue_depth == 0
+
+    assert admission.cpu_in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_abandoned_waiter_leaves_queue():
+    admission = AdmissionController(cpu_seconds=1, memory_bytes=100, queue_size=1)
+    abandon = asyncio.Event()
+
+    async with admission.admit(1, 0):
+
+        async def wait():
+            async with admission.admit(1, 0, abandon=abandon):
+                pass
+
+        task = asyncio.create_task(wait())
+        await asyncio.sleep(0.01)
+        assert admission.queue_depth == 1
+        abandon.set()
+        with pytest.raises(Cancelled):
+            await task
+        assert admission.queue_depth == 0
+
+    assert admission.cpu_in_flight == 0
+
+    # Không phải chờ thì abandon không có tác dụng
+    async with admission.admit(1, 0, abandon=abandon):
+        assert admission.cpu_in_flight == 1
+
+
+def _record_budget(X, Y, time_budget_ms, progress=None):
+    return {"time_budget_ms": time_budget_ms}
+
+
+@pytest.mark.asyncio
+async def test_admission_wait_is_charged_to_time_budget(monkeypatch):
+    admission = AdmissionController(cpu_seconds=10, memory_bytes=10**12, queue_size=1)
+    monkeypatch.setattr("app.router.utils.admission", admission)
+    kwargs = {"X": X, "Y": Y, "time_budget_ms": 1000}
+
+    async def hold():
+        async with admission.admit(10, 0):
+            await asyncio.sleep(0.3)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    # Request tới 200 ms trước (đọc body, ...) rồi chờ admission thêm 300 ms
+    arrival = time.time() - 0.2
+    result = await run_training(
+        "best_model", _record_budget, kwargs, cache=False, arrival=arrival
+    )
+    await holder
+
+    assert 0 < result["time_budget_ms"] <= 500
+    assert kwargs["time_budget_ms"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_router_rejects_with_retry_after(monkeypatch):
+    admission = AdmissionController(cpu_seconds=1e-6, memory_bytes=1, queue_size=0)
+    monkeypatch.setattr("app.router.utils.admission", admission)
+    collection = MemoryClient()["regression"]["simple_model"]
+    app = FastAPI()
+    app.include_router(option_router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+    body = {"X_array": X.tolist(), "Y_array": Y.tolist(), "model": "linear"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        admitted = await client.post("/option/", json=body)
+        async with admission.admit(30, 0):
+            rejected = await client.post("/option/", json=body)
+
+    assert admitted.status_code == 200
+    assert rejected.status_code == 503
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert await collection.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_router_throttles_expensive_client_model_names(monkeypatch):
+    admission = AdmissionController(cpu_seconds=1.0, memory_bytes=1024**3, queue_size=0)
+    monkeypatch.setattr("app.router.utils.admission", admission)
+    collection = MemoryClient()["regression"]["simple_model"]
+    app = FastAPI()
+    app.include_router(option_router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+    X_big = rng.normal(size=(3000, 3))
+    Y_big = X_big @ np.array([1.0, 2.0, 3.0])
+    body = {"X_array": X_big.tolist(), "Y_array": Y_big.tolist()}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        # Một việc rẻ đang chạy: linear vẫn vừa ngân sách, svm thì không
+        async with admission.admit(0.5, 0):
+            cheap = await client.post("/option/", json={**body, "model": "linear"})
+            expensive = {
+                name: await client.post("/option/", json={**body, "model": name})
+                for name in ("svm", "SVM", "nu_svm", "theil_sen")
+            }
+
+    assert cheap.status_code == 200
+    for name, response in expensive.items():
+        assert response.status_code == 503, name
+        assert "Retry-After" in response.headers
@@ -0,0 +1,76 @@
+from app import config
+from app.utils.machine_learning.model_index import get_data_size_label
+from app.utils.timing import record_stages, stage
+from benchmark import startup
+from benchmark.models import SIZES, compare, run_case
+
+
+def _entry(wall_ms, status="ok", case="option/linear"):
+    return {
+        "case": case,
+        "size": "tiny",
+        "n_features": 5,
+        "status": status,
+        "wall_ms": wall_ms,
+    }
+
+
+def test_sizes_cover_every_label():
+    assert [get_data_size_label(n) for n in SIZES.values()] == list(SIZES)
+
+
+def test_stages_are_recorded_only_inside_record_stages():
+    with stage("fit"):
+        pass
+
+    with record_stages() as stages:
+        with stage("fit"):
+            pass
+        with stage("fit"):
+            pass
+
+    assert list(stages) == ["fit"]
+    assert stages["fit"] >= 0
+
+
+def test_run_case_records_fit_and_predict(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", "")
+    entry = run_case("option/linear", "tiny", 2)
+
+    assert entry["status"] == "ok"
+    assert entry["n_samples"] == SIZES["tiny"]
+    assert entry["wall_ms"] >= entry["fit_ms"] + entry["predict_ms"]
+    assert entry["peak_mb"] >= 0
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = [_entry(100), _entry(5, case="option/knn"), _entry(100, case="svr")]
+    results = [
+        _entry(200),  # chậm đi rõ rệt
+        _entry(15, case="option/knn"),  # x3 nhưng chỉ chênh 10 ms
+        _entry(110, case="svr"),  # trong ngưỡng
+        _entry(500, case="option/ridge"),  # không có trong baseline
+    ]
+
+    regressions = compare(results, baseline, threshold=0.25, min_ms=20)
+
+    assert [item["case"] for item in regressions] == ["option/linear"]
+    assert regressions[0]["ratio"] == 2.0
+
+
+def test_startup_compare_and_summary():
+    runs = [
+        {"import_ms": 500, "ready_ms": 40, "first_request_ms": 2000, "warmup_ms": 1900},
+        {"import_ms": 700, "ready_ms": 60, "first_request_ms": 2200, "warmup_ms": 2100},
+        {"import_ms": 600, "ready_ms": 50, "first_request_ms": 2100, "warmup_ms": 2000},
+    ]
+    for run in runs:
+        run["sklearn_in_web_process"] = False
+
+    summary = startup.summarize(runs)
+    baseline = {**summary, "import_ms": 300, "ready_ms": 45}
+
+    assert summary["import_ms"] == 600
+    assert [item["metric"] for item in startup.compare(summary, baseline)] == [
+        "import_ms"
+    ]
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+
+from app import config
+from app.utils.machine_learning.cost import MODEL_COST
+from app.utils.machine_learning.data_preprocessing import splitting_data
+from app.utils.machine_learning.model_training import MODELS
+from app.utils.machine_learning.run_best_model import (
+    CANDIDATE_MODELS,
+    race_candidates,
+    run_all_model,
+    run_best_model,
+)
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(60, 3))
+Y = X @ np.array([1.0, 2.0, 3.0]) + rng.normal(scale=0.1, size=60)
+
+
+class _BrokenModel:
+    def fit(self, X, Y):
+        raise RuntimeError("boom")
+
+
+def test_run_all_model_keeps_candidate_order():
+    records = run_all_model(X[:50], Y[:50], X[50:], Y[50:], X[:2])
+    assert [r["model"] for r in records] == CANDIDATE_MODELS
+
+
+def test_run_all_model_isolates_failed_candidate(monkeypatch):
+    monkeypatch.setitem(MODELS, "svr", lambda: _BrokenModel())
+
+    records = run_all_model(X[:50], Y[:50], X[50:], Y[50:], X[:2])
+    names = [r["model"] for r in records]
+
+    assert "svr" not in names
+    assert names == [name for name in CANDIDATE_MODELS if name != "svr"]
+
+
+def test_run_best_model_output_keys():
+    result = run_best_model(X, Y, X[:2])
+    assert result["best_model"] in CANDIDATE_MODELS
+    assert len(result["best_result"]) == 2
+
+
+def test_race_eliminates_down_to_survivors(monkeypatch):
+    monkeypatch.setattr(config, "RACE_MIN_SAMPLES", 10)
+    monkeypatch.setattr(config, "RACE_SURVIVORS", 2)
+    X_big = rng.normal(size=(400, 3))
+    Y_big = X_big @ np.array([1.0, 2.0, 3.0]) + rng.normal(scale=0.1, size=400)
+
+    survivors, rounds, eliminated = race_candidates(
+        X_big[:300], Y_big[:300], random_state=0
+    )
+
+    assert rounds == 2
+    assert len(survivors) == 2
+    assert sorted(survivors + eliminated) == sorted(CANDIDATE_MODELS)
+    assert "linear" in survivors
+
+
+def test_race_scores_on_held_out_train_rows(monkeypatch):
+    monkeypatch.setattr(config, "RACE_MIN_SAMPLES", 10)
+    monkeypatch.setattr(config, "BEST_MODEL_N_JOBS", 1)
+    X_big = rng.normal(size=(400, 3))
+    Y_big = X_big @ np.array([1.0, 2.0, 3.0]) + rng.normal(scale=0.1, size=400)
+    calls = []
+
+    def score(model_name, X_fit, Y_fit, X_val, Y_val, random_state=None):
+        calls.append((X_fit, X_val))
+        return model_name, 0.0
+
+    monkeypatch.setattr(
+        "app.utils.machine_learning.run_best_model.score_candidate", score
+    )
+    result = run_best_model(X_big, Y_big, None, random_state=0, race=True)
+
+    X_train, X_test, _, _ = splitting_data(X_big, Y_big, 0)
+    train_rows = set(map(tuple, X_train))
+    test_rows = set(map(tuple, X_test))
+    assert result["race_rounds"] >= 1 and calls
+    for X_fit, X_val in calls:
+        val_rows = set(map(tuple, X_val))
+        # Vòng loại không nhìn thấy tập test, không chấm trên dòng đã fit
+        assert val_rows <= train_rows and not val_rows & test_rows
+        assert not val_rows & set(map(tuple, X_fit))
+
+
+def test_race_skipped_on_small_data():
+    result = run_best_model(X, Y, X[:2], random_state=0, race=True)
+
+    assert result["race_rounds"] == 0
+    assert result["eliminated"] == []
+
+
+def test_time_budget_skips_candidates_that_cannot_finish(monkeypatch):
+    # svr được coi là tốn 1000 giây, random_forest được coi là rẻ nhất
+    monkeypatch.setitem(MODEL_COST, "svr", lambda n, p: 1000.0)
+    monkeypatch.setitem(MODEL_COST, "random_forest", lambda n, p: 0.0)
+    order = []
+    monkeypatch.setattr(
+        "app.utils.machine_learning.run_best_model.fit_candidate",
+        lambda name, *args: order.append(name) or None,
+    )
+
+    result = run_best_model(X, Y, X[:2], random_state=0, time_budget_ms=5000)
+
+    assert result["skipped"] == ["svr"]
+    assert order[0] == "random_forest" and order[1] == "linear"
+
+
+def test_time_budget_returns_best_so_far():
+    start = time.time()
+    result = run_best_model(X, Y, X[:2], random_state=0, time_budget_ms=1)
+    elapsed = time.time() - start
+
+    # Ứng viên rẻ nhất luôn được chạy, các ứng viên khác không còn kịp
+    assert result["best_model"] == "linear"
+    assert result["skipped"] == [name for name in CANDIDATE_MODELS if name != "linear"]
+    assert result["cut_short"] == []
+    assert len(result["best_result"]) == 2
+    assert elapsed < 1.0
+
+
+def test_no_budget_fields_without_time_budget():
+    result = run_best_model(X, Y, X[:2], random_state=0)
+    assert "skipped" not in result and "cut_short" not in result
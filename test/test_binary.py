@@ -0,0 +1,81 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import InputOptionData
+from app.utils.binary import decode_arrow, decode_msgpack, decode_npz
+
+X = np.array([[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]], dtype=float)
+Y = np.array([150_000, 180_000, 200_000, 220_000, 250_000, 280_000], dtype=float)
+x0 = np.array([[85, 3]], dtype=float)
+
+
+def _npz(**arrays) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def test_decode_npz():
+    data = decode_npz(_npz(X_array=X, Y_array=Y, x0=x0, model=np.array("ridge")))
+
+    assert data["X_array"].dtype == np.float64
+    assert np.array_equal(data["X_array"], X)
+    assert np.array_equal(data["x0"], x0)
+    assert data["model"] == "ridge"
+
+
+def test_npz_non_numeric_rejected_by_schema():
+    data = decode_npz(_npz(X_array=np.array(["a", "b"]), Y_array=Y[:2]))
+
+    with pytest.raises(ValidationError):
+        InputOptionData.model_validate(data)
+
+
+def test_decode_arrow():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"a": X[:, 0], "b": X[:, 1], "Y_array": Y})
+    table = table.replace_schema_metadata({"x0": json.dumps(x0.tolist())})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    data = decode_arrow(sink.getvalue().to_pybytes())
+
+    assert np.array_equal(data["X_array"], X)
+    assert np.array_equal(data["Y_array"], Y)
+    assert np.array_equal(data["x0"], x0)
+
+
+def test_decode_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+
+    def pack(array):
+        return {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "data": array.tobytes(),
+        }
+
+    body = msgpack.packb({"X_array": pack(X), "Y_array": pack(Y), "model": "ridge"})
+    data = decode_msgpack(body)
+
+    assert np.array_equal(data["X_array"], X)
+    assert np.array_equal(data["Y_array"], Y)
+    assert data["model"] == "ridge"
+
+
+def test_schema_accepts_ndarray():
+    data = InputOptionData.model_validate(
+        {"X_array": X[:, 0], "Y_array": Y, "x0": x0[:, :1]}
+    )
+    assert data.X_array.shape == (6, 1)
+
+    with pytest.raises(ValidationError):
+        InputOptionData.model_validate({"X_array": X, "Y_array": Y[:3]})
+
+    with pytest.raises(ValidationError):
+        InputOptionData.model_validate({"X_array": X, "Y_array": Y, "x0": X[:, :1]})
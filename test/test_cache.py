@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+import pytest
+
+from app import config
+from app.utils.cache import ResultCache, make_key
+from app.utils.machine_learning import run_option_model
+
+X = np.array([[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]], dtype=float)
+Y = np.array([150_000, 180_000, 200_000, 220_000, 250_000, 280_000], dtype=float)
+
+
+def test_make_key_depends_on_content():
+    params = {"model_name": "linear", "random_state": 42}
+    key = make_key("option", params, X, Y, None)
+
+    assert key == make_key("option", dict(params), X.tolist(), Y.tolist(), None)
+    assert key != make_key("option", {**params, "random_state": 7}, X, Y, None)
+    assert key != make_key("option", {**params, "model_name": "ridge"}, X, Y, None)
+    assert key != make_key("best_model", params, X, Y, None)
+    assert key != make_key("option", params, X, Y, [[85, 3]])
+    assert key != make_key("option", params, X.reshape(2, 6), Y, None)
+
+
+@pytest.mark.asyncio
+async def test_memory_lru_and_ttl():
+    cache = ResultCache(max_size=2, ttl=60)
+    await cache.set("a", {"r2": 1})
+    await cache.set("b", {"r2": 2})
+    await cache.get("a")
+    await cache.set("c", {"r2": 3})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"r2": 1}
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert await cache.get("a") is None
+    assert cache.hits == 2
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_tier(tmp_path):
+    await ResultCache(max_size=2, ttl=60, directory=str(tmp_path)).set("a", {"r2": 1})
+
+    cache = ResultCache(max_size=2, ttl=60, directory=str(tmp_path))
+    assert await cache.get("a") == {"r2": 1}
+    assert cache.disk_hits == 1
+
+
+def test_seeded_training_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", "")
+    first = run_option_model(X, Y, [[85, 3]], "random_forest", random_state=42)
+    second = run_option_model(X, Y, [[85, 3]], "random_forest", random_state=42)
+
+    assert first["r2_test"] == second["r2_test"]
+    assert first["y0"] == second["y0"]
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+
+from app import config
+from app.database import get_simple_model_collection
+from app.database.memory import MemoryClient
+from app.app import create_app
+from app.router.option import router as option_router
+from app.router.utils import CLIENT_CLOSED_REQUEST, cancel_on_disconnect
+from app.utils.admission import AdmissionController
+from app.utils.machine_learning.control import (
+    Cancelled,
+    call_with_cancel,
+    check_cancelled,
+)
+from app.utils.machine_learning.run_best_model import run_best_model
+from app.utils.machine_learning.run_option import run_option_model
+from app.utils.machine_learning.run_stack_model import run_stack_model
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(60, 3))
+Y = X @ np.array([1.0, 2.0, 3.0]) + rng.normal(scale=0.1, size=60)
+
+
+class _FakeRequest:
+    def __init__(self, disconnected: bool):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+def test_check_cancelled_follows_event():
+    cancel = threading.Event()
+
+    check_cancelled()
+    call_with_cancel(cancel, check_cancelled)
+    cancel.set()
+    with pytest.raises(Cancelled):
+        call_with_cancel(cancel, check_cancelled)
+    # Ngoài call_with_cancel không còn event huỷ
+    check_cancelled()
+
+
+@pytest.mark.parametrize(
+    "func, kwargs",
+    [
+        (run_option_model, {"model_name": "ridge"}),
+        (run_best_model, {}),
+        (run_stack_model, {}),
+    ],
+)
+def test_cancelled_training_stops(func, kwargs):
+    cancel = threading.Event()
+    cancel.set()
+
+    with pytest.raises(Cancelled):
+        call_with_cancel(cancel, func, X=X, Y=Y, x0=X[:2], random_state=0, **kwargs)
+
+    # Event chưa set thì huấn luyện như bình thường
+    result = call_with_cancel(threading.Event(), func, X=X, Y=Y, x0=X[:2], **kwargs)
+    assert len(result.get("y0", result.get("best_result"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect(monkeypatch):
+    monkeypatch.setattr(config, "DISCONNECT_POLL_SECONDS", 0.01)
+
+    async with cancel_on_disconnect(_FakeRequest(False)) as cancel:
+        pass
+    assert not cancel.is_set()
+
+    with pytest.raises(HTTPException) as e:
+        async with cancel_on_disconnect(_FakeRequest(True)) as cancel:
+            await asyncio.sleep(0.1)
+            call_with_cancel(cancel, check_cancelled)
+    assert e.value.status_code == CLIENT_CLOSED_REQUEST
+    assert cancel.is_set()
+
+
+@pytest.mark.asyncio
+async def test_disconnected_request_is_not_saved(monkeypatch):
+    async def disconnected(self):
+        return True
+
+    monkeypatch.setattr(Request, "is_disconnected", disconnected)
+    collection = MemoryClient()["regression"]["simple_model"]
+    app = FastAPI()
+    app.include_router(option_router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        response = await client.post(
+            "/option/",
+            json={"X_array": X.tolist(), "Y_array": Y.tolist(), "model": "ridge"},
+        )
+
+    assert response.status_code == CLIENT_CLOSED_REQUEST
+    assert await collection.count_documents({}) == 0
+
+
+async def _call_then_disconnect(app, path: str, body: dict) -> int:
+    """
+    Gọi app qua ASGI như server thật: gửi body rồi client ngắt kết nối
+    (mọi lần receive sau đó nhận http.disconnect)
+
+    Return:
+    - Mã trạng thái của response
+    """
+    messages = [
+        {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+    ]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"t"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1),
+        "server": ("t", 80),
+    }
+    await app(scope, receive, send)
+    return next(m["status"] for m in sent if m["type"] == "http.response.start")
+
+
+@pytest.fixture
+def asgi_app(monkeypatch):
+    monkeypatch.setattr(config, "DISCONNECT_POLL_SECONDS", 0.01)
+    collection = MemoryClient()["regression"]["simple_model"]
+    # App đầy đủ (kèm mọi middleware), không chạy lifespan
+    app = create_app()
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+    return app, collection
+
+
+@pytest.mark.asyncio
+async def test_asgi_disconnect_through_middleware(asgi_app):
+    app, collection = asgi_app
+    body = {"X_array": X.tolist(), "Y_array": Y.tolist(), "model": "ridge"}
+
+    status = await _call_then_disconnect(app, "/regression/option/", body)
+
+    assert status == CLIENT_CLOSED_REQUEST
+    assert await collection.count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_asgi_disconnect_leaves_admission_queue(asgi_app, monkeypatch):
+    app, collection = asgi_app
+    admission = AdmissionController(cpu_seconds=1, memory_bytes=1024**3, queue_size=4)
+    monkeypatch.setattr("app.router.utils.admission", admission)
+    body = {"X_array": X.tolist(), "Y_array": Y.tolist(), "model": "ridge"}
+
+    # Một việc đang giữ toàn bộ ngân sách: request phải chờ trong hàng đợi
+    async with admission.admit(1, 0):
+        status = await asyncio.wait_for(
+            _call_then_disconnect(app, "/regression/option/", body), timeout=5
+        )
+        assert admission.queue_depth == 0
+
+    assert status == CLIENT_CLOSED_REQUEST
+    assert admission.cpu_in_flight == 0
+    assert await collection.count_documents({}) == 0
@@ -0,0 +1,221 @@
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+from pydantic import ValidationError
+
+from app import config
+from app.database import (
+    get_best_model_collection,
+    get_simple_model_collection,
+    get_stack_model_collection,
+)
+from app.database.memory import MemoryClient
+from app.router.best_model import router as best_model_router
+from app.router.datasets import router as datasets_router
+from app.router.option import router as option_router
+from app.router.session import router as session_router
+from app.router.stack_model import router as stack_model_router
+from app.router.utils import run_training
+from app.schemas import InputOptionData
+from app.utils.datasets import (
+    DatasetNotFound,
+    DatasetTooLarge,
+    call_with_dataset,
+    delete_dataset,
+    load_dataset,
+    read_dataset_meta,
+    save_dataset,
+)
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(200, 3)) * [1, 10, 100]
+Y = X @ [3.0, -2.0, 0.5] + 7 + rng.normal(scale=0.5, size=200)
+
+
+@pytest.fixture(autouse=True)
+def dataset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATASET_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setattr(config, "SESSION_DIR", str(tmp_path / "sessions"))
+    return tmp_path / "datasets"
+
+
+def test_save_and_load_memory_mapped():
+    meta = save_dataset(X, Y)
+
+    X_loaded, Y_loaded = load_dataset(meta["dataset_id"])
+
+    assert isinstance(X_loaded, np.memmap) and not X_loaded.flags.writeable
+    np.testing.assert_array_equal(X_loaded, X)
+    np.testing.assert_array_equal(Y_loaded, Y)
+    assert meta["n_samples"] == 200 and meta["n_features"] == 3
+    assert meta["bytes"] == X.nbytes + Y.nbytes
+    np.testing.assert_allclose(meta["stats"]["X"]["mean"], X.mean(axis=0))
+    assert meta["stats"]["Y"]["max"] == [Y.max()]
+    # Cùng nội dung → cùng dataset
+    assert save_dataset(X.copy(), Y.copy())["dataset_id"] == meta["dataset_id"]
+    assert save_dataset(X, Y + 1)["dataset_id"] != meta["dataset_id"]
+
+
+def test_missing_and_invalid_ids():
+    meta = save_dataset(X, Y)
+    delete_dataset(meta["dataset_id"])
+
+    for dataset_id in (meta["dataset_id"], "../x"):
+        with pytest.raises(DatasetNotFound):
+            read_dataset_meta(dataset_id)
+        with pytest.raises(DatasetNotFound):
+            call_with_dataset(lambda X, Y: None, dataset_id=dataset_id)
+
+
+def _lookup_fails(X, Y, progress=None):
+    return {}["column"]
+
+
+@pytest.mark.asyncio
+async def test_training_key_error_is_not_dataset_not_found():
+    dataset_id = save_dataset(X, Y)["dataset_id"]
+
+    # KeyError trong lúc huấn luyện là lỗi thật, không phải 404
+    with pytest.raises(KeyError, match="column"):
+        await run_training("option", _lookup_fails, {"dataset_id": dataset_id})
+
+    delete_dataset(dataset_id)
+    with pytest.raises(HTTPException) as e:
+        await run_training("option", _lookup_fails, {"dataset_id": dataset_id})
+    assert e.value.status_code == 404
+
+
+def test_least_recently_used_datasets_are_evicted(dataset_dir, monkeypatch):
+    monkeypatch.setattr(config, "DATASET_MAX_BYTES", 2 * (X.nbytes + Y.nbytes))
+
+    first = save_dataset(X, Y)
+    second = save_dataset(X, Y + 1)
+    read_dataset_meta(first["dataset_id"])
+    third = save_dataset(X, Y + 2)
+
+    assert sorted(p.name for p in dataset_dir.iterdir()) == sorted(
+        [first["dataset_id"], third["dataset_id"]]
+    )
+    with pytest.raises(KeyError):
+        load_dataset(second["dataset_id"])
+
+    monkeypatch.setattr(config, "DATASET_MAX_ENTRIES", 1)
+    save_dataset(X, Y + 3)
+    assert len(list(dataset_dir.iterdir())) == 1
+
+    monkeypatch.setattr(config, "DATASET_MAX_BYTES", X.nbytes)
+    with pytest.raises(DatasetTooLarge):
+        save_dataset(X, Y)
+
+
+def test_schema_requires_one_data_source():
+    assert InputOptionData(dataset_id="abc").X_array is None
+
+    for data in (
+        {},
+        {"X_array": X[:5]},
+        {"X_array": X[:5], "Y_array": Y[:5], "dataset_id": "abc"},
+    ):
+        with pytest.raises(ValidationError):
+            InputOptionData.model_validate(data)
+
+
+@pytest.mark.asyncio
+async def test_routers_accept_dataset_id():
+    simple = MemoryClient()["regression"]["simple_model"]
+    stack = MemoryClient()["regression"]["stack_model"]
+    app = FastAPI()
+    for router in (datasets_router, option_router, stack_model_router):
+        app.include_router(router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: simple
+    app.dependency_overrides[get_stack_model_collection] = lambda: stack
+
+    inline = {"X_array": X.tolist(), "Y_array": Y.tolist()}
+    params = {"x0": [[1, 2, 3]], "random_state": 0}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        created = await client.post("/datasets/", json=inline)
+        dataset_id = created.json()["dataset_id"]
+        by_id = {"dataset_id": dataset_id, **params}
+
+        option = await client.post("/option/", json={**by_id, "model": "ridge"})
+        option_inline = await client.post(
+            "/option/", json={**inline, **params, "model": "ridge"}
+        )
+        stacked = await client.post("/stack-model/", json=by_id)
+        stacked_inline = await client.post("/stack-model/", json={**inline, **params})
+        wrong_x0 = await client.post(
+            "/option/", json={**by_id, "x0": [[1, 2]], "model": "ridge"}
+        )
+        info = await client.get(f"/datasets/{dataset_id}")
+        deleted = await client.delete(f"/datasets/{dataset_id}")
+        missing = await client.post("/option/", json=by_id)
+
+    assert created.status_code == 201
+    assert created.headers["Location"].endswith(dataset_id)
+    assert info.json() == created.json()
+    for result, expected in ((option, option_inline), (stacked, stacked_inline)):
+        result, expected = result.json(), expected.json()
+        del result["model_id"], expected["model_id"]
+        assert result == expected
+    assert wrong_x0.status_code == 422
+    assert deleted.status_code == 204
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_best_model_and_session_accept_dataset_id(monkeypatch):
+    # Dữ liệu nhỏ, cùng thang đo: best-model (có SVR) chạy nhanh; mẫu con đủ
+    # nhỏ để race thực sự loại ứng viên
+    monkeypatch.setattr(config, "RACE_MIN_SAMPLES", 10)
+    X_small = X[:60] / [1, 10, 100]
+    client_db = MemoryClient()["regression"]
+    app = FastAPI()
+    for router in (datasets_router, best_model_router, session_router):
+        app.include_router(router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: client_db["simple"]
+    app.dependency_overrides[get_best_model_collection] = lambda: client_db["best"]
+
+    inline = {"X_array": X_small.tolist(), "Y_array": Y[:60].tolist()}
+    params = {"x0": [[1, 2, 3]], "random_state": 0}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        created = await client.post("/datasets/", json=inline)
+        by_id = {"dataset_id": created.json()["dataset_id"], **params}
+
+        pairs = []
+        for race in (False, True):
+            pairs.append(
+                (
+                    await client.post("/best-model/", json={**by_id, "race": race}),
+                    await client.post(
+                        "/best-model/", json={**inline, **params, "race": race}
+                    ),
+                )
+            )
+        session = await client.post("/sessions/", json={**by_id, "model": "ridge"})
+        session_inline = await client.post(
+            "/sessions/", json={**inline, **params, "model": "ridge"}
+        )
+        appended = await client.post(
+            f"/sessions/{session.json()['session_id']}/append",
+            json={"X_array": X_small[:5].tolist(), "Y_array": Y[:5].tolist()},
+        )
+
+    for result, expected in pairs:
+        assert result.status_code == 200
+        result, expected = result.json(), expected.json()
+        del result["model_id"], expected["model_id"]
+        assert result == expected
+    assert pairs[1][0].json()["race_rounds"] >= 1
+
+    assert session.status_code == 201
+    result, expected = session.json(), session_inline.json()
+    for key in ("model_id", "session_id"):
+        assert result.pop(key) != expected.pop(key)
+    assert result == expected
+    assert appended.status_code == 200
@@ -0,0 +1,109 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+from app import config
+from app.utils import executor
+from app.utils.machine_learning import run_option_model
+from app.utils.machine_learning.control import Cancelled, call_with_cancel
+from app.utils.machine_learning.model_training import warm_up
+from app.utils.metrics import STARTUP_SECONDS
+
+X = [[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]]
+Y = [150_000, 180_000, 200_000, 220_000, 250_000, 280_000]
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_without_pool_uses_thread():
+    # Không gọi start_executor → chạy trong thread của tiến trình hiện tại
+    assert await executor.run_in_pool(os.getpid) == os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_run_in_pool_with_worker(monkeypatch):
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "WORKER_MAX_TASKS", 2)
+
+    await executor.start_executor()
+    try:
+        assert await executor.run_in_pool(os.getpid) != os.getpid()
+
+        # Sau WORKER_MAX_TASKS task, pool được thay bằng worker mới (không treo)
+        pids = {(await executor.run_in_pool(executor._ping))[0] for _ in range(5)}
+        assert len(pids) >= 2
+        _, n_jobs = await executor.run_in_pool(executor._ping)
+        assert n_jobs == executor.worker_n_jobs()
+
+        result = await executor.run_in_pool(
+            run_option_model, X=X, Y=Y, x0=[[85, 3]], model_name="linear"
+        )
+        assert "r2_test" in result
+        assert len(result["y0"]) == 1
+
+        # Event huỷ được set ở tiến trình web, worker đọc qua Manager
+        cancel = await executor.create_cancel_event()
+        cancel.set()
+        with pytest.raises(Cancelled):
+            await executor.run_in_pool(
+                call_with_cancel,
+                cancel,
+                run_option_model,
+                X=X,
+                Y=Y,
+                x0=None,
+                model_name="linear",
+            )
+    finally:
+        await executor.stop_executor()
+
+
+def test_worker_n_jobs_shares_cpus(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 2)
+
+    for n_jobs, expected in ((-1, 4), (-6, 3), (2, 2), (16, 4)):
+        monkeypatch.setattr(config, "BEST_MODEL_N_JOBS", n_jobs)
+        assert executor.worker_n_jobs() == expected
+
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 16)
+    monkeypatch.setattr(config, "BEST_MODEL_N_JOBS", -1)
+    assert executor.worker_n_jobs() == 1
+
+
+def test_web_process_does_not_import_sklearn():
+    code = "import sys, app, pickle; pickle.dumps(app.utils.machine_learning.run_option_model); print('sklearn' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"
+
+
+def test_lazy_import_pickles_by_name():
+    restored = pickle.loads(pickle.dumps(run_option_model))
+
+    assert restored.resolve() is run_option_model.resolve()
+    assert restored(X=X, Y=Y, x0=None, model_name="linear")["model"] == "linear"
+
+
+def test_warm_up_fits_models():
+    seconds = warm_up(["linear", "knn", "unknown"])
+
+    assert set(seconds) == {"linear", "knn", "unknown"}
+    assert all(value >= 0 for value in seconds.values())
+
+
+@pytest.mark.asyncio
+async def test_background_warm_up_without_pool(monkeypatch):
+    monkeypatch.setattr(config, "WORKER_POOL_SIZE", 0)
+    monkeypatch.setattr(config, "WORKER_WARMUP", 1)
+    monkeypatch.setattr(config, "WARMUP_MODELS", "linear")
+
+    await executor.start_executor()
+    try:
+        await executor._warmup_task
+        assert STARTUP_SECONDS.value(phase="warmup") > 0
+    finally:
+        await executor.stop_executor()
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.utils.machine_learning.folds import FoldPlan, FoldSearchCV
+from app.utils.machine_learning.model_training import MODELS, seed_model
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(90, 3))
+Y = X @ np.array([1.0, 2.0, 3.0]) + np.sin(X[:, 0]) + rng.normal(scale=0.1, size=90)
+
+
+def test_plan_matches_kfold():
+    plan = FoldPlan(X, Y)
+
+    assert len(plan) == 3
+    for (train, val), (X_train, Y_train, X_val, Y_val) in zip(plan.splits, plan.folds):
+        assert X_train.flags["C_CONTIGUOUS"]
+        assert np.array_equal(X_train, X[train])
+        assert np.array_equal(Y_val, Y[val])
+
+
+def test_prepare_computes_cached_arrays():
+    plan = FoldPlan(X, Y).prepare(["knn"])
+    assert "folds" in vars(plan) and "linear_family" not in vars(plan)
+
+    plan.prepare(["knn", "ridge"])
+    assert "linear_family" in vars(plan)
+
+
+@pytest.mark.parametrize("name", ["svr", "knn", "decision_tree", "random_forest"])
+def test_fold_search_matches_sklearn_search(name):
+    plan = FoldPlan(X, Y)
+    sklearn_search = seed_model(MODELS[name](), 0).fit(X, Y)
+    fold_search = seed_model(MODELS[name](plan), 0).fit(X, Y)
+
+    assert isinstance(fold_search, FoldSearchCV)
+    assert fold_search.best_params_ == sklearn_search.best_params_
+    assert np.isclose(fold_search.best_score_, sklearn_search.best_score_)
+    assert np.allclose(fold_search.predict(X[:5]), sklearn_search.predict(X[:5]))
+
+
+def test_fold_search_rejects_other_data():
+    search = MODELS["knn"](FoldPlan(X, Y))
+
+    with pytest.raises(ValueError):
+        search.fit(X[:60], Y[:60])
+
+
+def test_fold_search_stops_at_deadline():
+    plan = FoldPlan(X, Y)
+    search = MODELS["knn"](plan)
+
+    full = search.fit(X, Y)
+    assert not full.cut_short_ and len(full.cv_scores_) == 16
+
+    search.set_params(deadline=time.time() - 1)
+    cut = search.fit(X, Y)
+    # Luôn thử ít nhất một bộ tham số
+    assert cut.cut_short_ and len(cut.cv_scores_) == 1
+    assert cut.best_params_ == full._candidate_params()[0]
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.router.utils import decode_cursor, encode_cursor, parse_fields
+
+
+def test_cursor_roundtrip():
+    doc = {"time": datetime(2025, 1, 1, 12, 30), "_id": ObjectId()}
+
+    query = decode_cursor(encode_cursor(doc))
+
+    assert query == {
+        "$or": [
+            {"time": {"$lt": doc["time"]}},
+            {"time": doc["time"], "_id": {"$lt": doc["_id"]}},
+        ]
+    }
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("not-a-token")
+    assert e.value.status_code == 400
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("model, r2_test") == {"time": 1, "model": 1, "r2_test": 1}
+
+    with pytest.raises(HTTPException):
+        parse_fields("$where")
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils import executor
+from app.utils.jobs import MemoryJobStore, SQLiteJobStore
+from app.utils.jobs.runner import JobQueueFull, JobRunner
+from app.utils.machine_learning import run_option_model
+
+X = [[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]]
+Y = [150_000, 180_000, 200_000, 220_000, 250_000, 280_000]
+
+
+def _job(job_id: str, status: str = "queued") -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "job_id": job_id,
+        "kind": "option",
+        "status": status,
+        "progress": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_store_roundtrip(store):
+    await store.create(_job("a"))
+    await store.update("a", status="done", progress={"stage": "training"})
+    await store.update("a", result={"r2_test": 0.9})
+
+    job = await store.get("a")
+    assert job["status"] == "done"
+    assert job["progress"] == {"stage": "training"}
+    assert job["result"] == {"r2_test": 0.9}
+    assert await store.get("missing") is None
+
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_store_purge_only_finished(store):
+    await store.create(_job("done", status="done"))
+    await store.create(_job("queued"))
+
+    await store.purge(datetime.now(timezone.utc) + timedelta(seconds=1))
+
+    assert await store.get("done") is None
+    assert await store.get("queued") is not None
+
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_store_times_are_utc(store):
+    await store.create(_job("a"))
+    await store.update("a", status="running")
+
+    job = await store.get("a")
+    assert job["created_at"].utcoffset() == timedelta(0)
+    assert job["updated_at"].utcoffset() == timedelta(0)
+
+    await store.close()
+
+
+class _SlowStore(MemoryJobStore):
+    async def create(self, job: dict):
+        await asyncio.sleep(0.01)
+        await super().create(job)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_respect_queue_size():
+    # Không có worker: job chỉ nằm trong hàng đợi
+    runner = JobRunner(_SlowStore(), workers=0, queue_size=2)
+
+    async def noop(_):
+        return {}
+
+    results = await asyncio.gather(
+        *(runner.submit("option", noop, noop) for _ in range(5)),
+        return_exceptions=True,
+    )
+
+    accepted = [r for r in results if isinstance(r, str)]
+    assert len(accepted) == 2
+    assert all(isinstance(r, JobQueueFull) for r in results if r not in accepted)
+    assert runner.queue_depth == 2
+    assert sorted(runner.store._jobs) == sorted(accepted)
+
+
+@pytest.mark.asyncio
+async def test_runner_executes_job():
+    runner = JobRunner(MemoryJobStore(), workers=1, queue_size=2)
+    await runner.start()
+
+    async def on_done(result):
+        return {"r2_test": result["r2_test"]}
+
+    async def work(progress):
+        return await executor.run_in_pool(
+            run_option_model,
+            X=X,
+            Y=Y,
+            x0=[[85, 3]],
+            model_name="linear",
+            progress=progress,
+        )
+
+    try:
+        job_id = await runner.submit("option", work, on_done)
+
+        for _ in range(100):
+            job = await runner.store.get(job_id)
+            if job["status"] in ("done", "failed"):
+                break
+            await asyncio.sleep(0.05)
+
+        assert job["status"] == "done"
+        assert "r2_test" in job["result"]
+    finally:
+        await runner.stop()
+        await executor.stop_executor()
@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from app.utils.machine_learning.folds import FoldPlan
+from app.utils.machine_learning.linear_path import GramLinearRegressor, RunningGram
+from app.utils.machine_learning.model_training import MODELS
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(120, 4)) * [1, 10, 100, 0.1] + [5, -20, 300, 0]
+Y = X @ np.array([2.0, -0.5, 0.03, 8.0]) + rng.normal(scale=0.5, size=120) + 40
+
+
+@pytest.mark.parametrize("name", ["linear", "ridge", "lasso", "elastic"])
+def test_gram_model_matches_sklearn(name):
+    plan = FoldPlan(X, Y)
+    sklearn_model = MODELS[name](plan.splits).fit(X, Y)
+    gram_model = MODELS[name](plan).fit(X, Y)
+
+    assert isinstance(gram_model, GramLinearRegressor)
+    assert getattr(gram_model, "alpha_", None) == getattr(sklearn_model, "alpha_", None)
+    assert getattr(gram_model, "l1_ratio_", None) == getattr(
+        sklearn_model, "l1_ratio_", None
+    )
+    assert np.allclose(gram_model.predict(X), sklearn_model.predict(X), rtol=1e-7)
+
+
+def test_ridge_badly_scaled_matches_exact_solution():
+    """
+    RidgeCV (eigen) mất chính xác khi cột có trung bình lớn so với độ lệch
+    chuẩn; so alpha với RidgeCV nhưng so hệ số với nghiệm lstsq chính xác
+    """
+    scaled_rng = np.random.default_rng(1)
+    X_scaled = scaled_rng.normal(size=(400, 3)) * [0.1, 1, 100] + [1e5, -1e4, 1e6]
+    Y_scaled = X_scaled @ np.array([10.0, 2.0, -0.01]) + scaled_rng.normal(size=400)
+    plan = FoldPlan(X_scaled, Y_scaled)
+    sklearn_model = MODELS["ridge"](plan.splits).fit(X_scaled, Y_scaled)
+    gram_model = MODELS["ridge"](plan).fit(X_scaled, Y_scaled)
+    assert isinstance(gram_model, GramLinearRegressor)
+    assert gram_model.alpha_ == sklearn_model.alpha_
+
+    X_centered = X_scaled - X_scaled.mean(axis=0)
+    augmented = np.vstack([X_centered, np.sqrt(gram_model.alpha_) * np.eye(3)])
+    target = np.concatenate([Y_scaled - Y_scaled.mean(), np.zeros(3)])
+    exact = np.linalg.lstsq(augmented, target, rcond=None)[0]
+
+    scale = np.std(X_centered @ exact)
+    gram_error = np.abs(X_centered @ (gram_model.coef_ - exact)).max() / scale
+    sklearn_error = np.abs(
+        gram_model.predict(X_scaled) - sklearn_model.predict(X_scaled)
+    ).max() / scale
+    assert gram_error < 1e-7
+    assert sklearn_error < 1e-3
+
+
+def test_fallback_when_not_tall():
+    plan = FoldPlan(X[:4], Y[:4], n_splits=2)
+    assert not isinstance(MODELS["ridge"](plan), GramLinearRegressor)
+
+    collinear = np.column_stack([X[:, 0], 2 * X[:, 0]])
+    assert not isinstance(MODELS["linear"](FoldPlan(collinear, Y)), GramLinearRegressor)
+
+
+def test_pickle_drops_plan():
+    model = MODELS["ridge"](FoldPlan(X, Y)).fit(X, Y)
+    restored = pickle.loads(pickle.dumps(model))
+
+    assert restored.plan is None
+    assert np.allclose(restored.predict(X[:5]), model.predict(X[:5]))
+
+
+def test_rejects_other_data():
+    model = MODELS["lasso"](FoldPlan(X, Y))
+    with pytest.raises(ValueError):
+        model.fit(X[:60], Y[:60])
+
+
+def test_running_gram_bayesian_and_ridge_match_sklearn():
+    from sklearn.linear_model import BayesianRidge, Ridge
+
+    gram = RunningGram()
+    for start in range(0, 120, 25):
+        gram.add(X[start : start + 25], Y[start : start + 25])
+
+    coef, intercept, info = gram.bayesian()
+    bayesian = BayesianRidge().fit(X, Y)
+    assert np.allclose(coef, bayesian.coef_, rtol=1e-6)
+    assert intercept == pytest.approx(bayesian.intercept_)
+    assert info["alpha_"] == pytest.approx(bayesian.alpha_)
+
+    coef, intercept = gram.solve(alpha=3.0)
+    ridge = Ridge(alpha=3.0).fit(X, Y)
+    assert np.allclose(coef, ridge.coef_, rtol=1e-7)
+    assert gram.sse(coef, intercept) == pytest.approx(
+        np.sum((Y - ridge.predict(X)) ** 2)
+    )
+    assert gram.sst() == pytest.approx(np.sum((Y - Y.mean()) ** 2))
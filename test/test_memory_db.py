@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import Response
+
+from app.database.memory import MemoryClient
+from app.database.retention import trim_collection
+from app.router.utils import read_history, save_result
+from benchmark.load import parse_mix, run_load
+
+
+def _collection(n: int):
+    collection = MemoryClient()["regression"]["simple_model"]
+    start = datetime(2025, 1, 1)
+    for i in range(n):
+        collection._docs.append(
+            {"_id": ObjectId(), "time": start + timedelta(minutes=i), "r2": i}
+        )
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_save_result_adds_id_and_time():
+    collection = _collection(0)
+    result = {"model": "linear"}
+
+    await save_result(collection, result)
+
+    docs = await collection.find({}).to_list(length=None)
+    assert docs == [result]
+    assert "_id" in result and "time" in result
+    assert result["time"].utcoffset() == timedelta(0)
+    assert abs(datetime.now(timezone.utc) - result["time"]) < timedelta(minutes=1)
+
+
+@pytest.mark.asyncio
+async def test_history_pagination_with_after_and_fields():
+    collection = _collection(5)
+    response = Response()
+
+    first = await read_history(collection, response, limit=2, fields="r2")
+    token = response.headers["X-Next-After"]
+    second = await read_history(collection, Response(), limit=2, after=token)
+
+    assert [doc["r2"] for doc in first] == [4, 3]
+    assert set(first[0]) == {"_id", "time", "r2"}
+    assert [doc["r2"] for doc in second] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_trim_keeps_newest():
+    collection = _collection(10)
+
+    assert await trim_collection(collection, 3) == 7
+    assert [doc["r2"] for doc in collection._docs] == [7, 8, 9]
+
+
+def test_parse_mix():
+    assert parse_mix("option=3, history") == {"option": 3, "history": 1}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+    with pytest.raises(ValueError):
+        parse_mix("option=0")
+
+
+@pytest.mark.asyncio
+async def test_load_harness_runs_in_process():
+    report = await run_load(6, 2, {"option": 1, "history": 1}, rows=30, cols=2)
+
+    endpoints = report["endpoints"]
+    assert sum(stats["count"] for stats in endpoints.values()) == 6
+    assert all(stats["errors"] == 0 for stats in endpoints.values())
+    assert report["throughput_rps"] > 0
+    assert report["loop_lag"]["p99_ms"] is not None
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middleware import ServerTimingMiddleware
+from app.utils.metrics import Gauge, Histogram, observe_stages, render_metrics
+from app.utils.timing import (
+    add_concurrent_stages,
+    add_stages,
+    call_with_stages,
+    record_stages,
+    server_timing,
+    set_stage_labels,
+    stage,
+)
+
+
+def _work():
+    with stage("fit"):
+        pass
+    with stage("fit"):
+        pass
+    return 42
+
+
+def test_concurrent_stages_record_critical_path():
+    jobs = [{"fit": 3.0, "predict": 0.1}, {"fit": 1.0}, {"fit": 2.0}]
+
+    with record_stages() as timings:
+        add_concurrent_stages(jobs, n_jobs=3)
+    # Chạy cùng lúc: việc lâu nhất, không phải tổng
+    assert timings == {"fit": 3.0, "predict": 0.1}
+
+    with record_stages() as timings:
+        add_concurrent_stages(jobs, n_jobs=2)
+    assert timings["fit"] == 3.0
+
+    with record_stages() as timings:
+        add_concurrent_stages(jobs + [{"fit": 2.0}], n_jobs=2)
+    # 4 việc trên 2 tiến trình: ít nhất tổng / 2
+    assert timings["fit"] == 4.0
+
+    with record_stages() as timings:
+        add_concurrent_stages(jobs, n_jobs=1)
+    assert timings["fit"] == 6.0
+
+
+def test_stage_is_noop_without_recording():
+    with stage("fit"):
+        pass
+    add_stages({"fit": 1.0})
+    set_stage_labels(endpoint="option")
+
+
+def test_call_with_stages_returns_worker_timings():
+    result, stages = call_with_stages(_work)
+
+    assert result == 42
+    assert set(stages) == {"fit"}
+
+    with record_stages() as timings:
+        add_stages(stages)
+        add_stages({"fit": 1.0, "predict": 0.5})
+        set_stage_labels(endpoint="option", model="ridge")
+
+    assert timings["fit"] == pytest.approx(stages["fit"] + 1.0)
+    assert timings["predict"] == 0.5
+    assert timings.labels == {"endpoint": "option", "model": "ridge"}
+    assert server_timing({"fit": 0.0123}) == "fit;dur=12.3"
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(
+        "test_seconds", "Test", labelnames=("stage",), buckets=(0.1, 1)
+    )
+    histogram.observe(0.05, stage='a"b')
+    histogram.observe(0.5, stage='a"b')
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a\\"b",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a\\"b",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="a\\"b"} 2' in lines
+
+
+def test_render_metrics_includes_stages_and_gauges():
+    gauge = Gauge("test_in_flight", "Test")
+    gauge.inc()
+    gauge.set_function(lambda: 3)
+    labeled = Gauge("test_phase_seconds", "Test", labelnames=("phase",))
+    labeled.set(0.5, phase="import")
+    observe_stages({"fit": 0.2}, endpoint="test_endpoint", model="linear")
+
+    text = render_metrics()
+
+    assert "test_in_flight 3" in text
+    assert 'test_phase_seconds{phase="import"} 0.5' in text
+    assert labeled.value(phase="import") == 0.5
+    assert (
+        'regression_stage_seconds_count{endpoint="test_endpoint",'
+        'model="linear",stage="fit"} 1'
+    ) in text
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        set_stage_labels(endpoint="test_header", model="knn")
+        with stage("fit"):
+            await asyncio.sleep(0.01)
+        _, stages = await asyncio.to_thread(call_with_stages, _work)
+        add_stages(stages)
+        return {}
+
+    @app.get("/plain")
+    async def plain():
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        timed = await client.get("/work")
+        plain = await client.get("/plain")
+
+    header = timed.headers["Server-Timing"]
+    assert header.startswith("fit;dur=")
+    assert float(header.split("dur=")[1]) >= 10
+    assert timed.headers["Timing-Allow-Origin"] == "*"
+    assert "Server-Timing" not in plain.headers
+    assert (
+        'regression_stage_seconds_count{endpoint="test_header",'
+        'model="knn",stage="fit"} 1'
+    ) in render_metrics()
@@ -0,0 +1,111 @@
+import pstats
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+
+from app import config
+from app.middleware import ProfilingMiddleware
+from app.router.utils import run_training
+from app.utils.machine_learning.run_best_model import run_best_model
+from app.utils.profiling import (
+    call_with_profile,
+    profile_path,
+    read_profile,
+    should_profile,
+)
+
+PROFILE_ID = "0" * 32
+
+
+def _train(X, Y, progress=None):
+    return {"coef": np.linalg.lstsq(np.asarray(X), np.asarray(Y), rcond=None)[0]}
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILE_ENABLED", 1)
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 0.0)
+    return tmp_path
+
+
+def test_should_profile_is_gated_by_config(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_ENABLED", 0)
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 0.0)
+    assert not should_profile(True)
+
+    monkeypatch.setattr(config, "PROFILE_ENABLED", 1)
+    assert should_profile(True)
+    assert not should_profile(False)
+
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 1.0)
+    assert should_profile(False)
+
+
+def test_call_with_profile_saves_hot_functions(profile_dir):
+    X = np.random.default_rng(0).normal(size=(50, 3))
+
+    result = call_with_profile(PROFILE_ID, _train, X, X[:, 0])
+
+    assert result["coef"] == pytest.approx([1, 0, 0])
+    summary = read_profile(PROFILE_ID)
+    assert summary["profile_id"] == PROFILE_ID
+    assert any("numpy" in row["function"] for row in summary["top"])
+    assert profile_path(PROFILE_ID, ".prof") is not None
+    assert read_profile("../" + PROFILE_ID) is None
+
+
+def test_best_model_profile_sees_candidate_fits(profile_dir, monkeypatch):
+    # Đủ điều kiện chạy song song: khi profile, ứng viên vẫn phải chạy tại chỗ
+    monkeypatch.setattr(config, "BEST_MODEL_PARALLEL_MIN_SAMPLES", 0)
+    monkeypatch.setattr(config, "BEST_MODEL_N_JOBS", 2)
+    X = np.random.default_rng(0).normal(size=(60, 3))
+
+    call_with_profile(PROFILE_ID, run_best_model, X, X @ [1.0, 2.0, 3.0], None)
+
+    stats = pstats.Stats(profile_path(PROFILE_ID, ".prof"))
+    fits = [
+        filename
+        for filename, _, function in stats.stats
+        if "sklearn/svm" in filename.replace("\\", "/") and function == "fit"
+    ]
+    assert fits
+
+
+def test_old_profiles_are_evicted(profile_dir, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_MAX_ENTRIES", 2)
+    ids = [str(i) * 32 for i in range(1, 4)]
+    for profile_id in ids:
+        call_with_profile(profile_id, sum, [1, 2])
+
+    assert len(list(profile_dir.glob("*.json"))) == 2
+    assert len(list(profile_dir.glob("*.prof"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_profile_header_only_when_requested_and_trained(profile_dir):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/train")
+    async def train():
+        await run_training("option", _train, {"X": [[1.0], [2.0]], "Y": [2.0, 4.0]})
+        return {}
+
+    @app.get("/plain")
+    async def plain():
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        profiled = await client.get("/train", headers={"X-Profile": "1"})
+        by_query = await client.get("/train?profile=true")
+        unflagged = await client.get("/train")
+        plain = await client.get("/plain?profile=1")
+
+    assert read_profile(profiled.headers["X-Profile-Id"]) is not None
+    assert read_profile(by_query.headers["X-Profile-Id"]) is not None
+    assert "X-Profile-Id" not in unflagged.headers
+    assert "X-Profile-Id" not in plain.headers
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from app import config
+from app.utils.machine_learning import registry
+from app.utils.machine_learning.run_stack_model import run_stack_model
+
+X = np.array([[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]], dtype=float)
+Y = np.array([150_000, 180_000, 200_000, 220_000, 250_000, 280_000], dtype=float)
+
+
+@pytest.fixture(autouse=True)
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", str(tmp_path))
+    monkeypatch.setattr(registry, "_cache", registry.OrderedDict())
+    return tmp_path
+
+
+def test_register_and_predict():
+    model = LinearRegression().fit(X, Y)
+    model_id = registry.register_model(model, "linear", X.shape[1])
+
+    # Xoá cache trong bộ nhớ để buộc nạp lại từ đĩa
+    registry._cache.clear()
+    name, y0 = registry.predict_with_model(model_id, [[85, 3]])
+
+    assert name == "linear"
+    assert np.allclose(y0, model.predict([[85, 3]]))
+
+
+def test_predict_rejects_wrong_columns():
+    model_id = registry.register_model(LinearRegression().fit(X, Y), "linear", 2)
+    with pytest.raises(ValueError):
+        registry.predict_with_model(model_id, [[1, 2, 3]])
+
+
+def test_unknown_model():
+    with pytest.raises(KeyError):
+        registry.load_model("doesnotexist")
+    with pytest.raises(KeyError):
+        registry.load_model("../etc/passwd")
+
+
+def test_lru_eviction(monkeypatch, registry_dir):
+    monkeypatch.setattr(config, "MODEL_REGISTRY_MAX_ENTRIES", 2)
+    model = LinearRegression().fit(X, Y)
+
+    first = registry.register_model(model, "linear", 2)
+    second = registry.register_model(model, "linear", 2)
+    # Dùng lại first → second trở thành mô hình ít dùng nhất
+    registry.load_model(first)
+    # Đảm bảo mtime của first mới hơn second trên mọi hệ thống file
+    registry.os.utime(registry._path(second), (0, 0))
+    third = registry.register_model(model, "linear", 2)
+
+    stored = {p.stem for p in registry_dir.glob("*.joblib")}
+    assert stored == {first, third}
+
+
+def test_stack_model_registered_predictor_matches_response():
+    x0 = np.array([[85, 3], [55, 1]], dtype=float)
+    result = run_stack_model(X, Y, x0)
+
+    registry._cache.clear()
+    _, y0 = registry.predict_with_model(result["model_id"], x0)
+    assert np.allclose(np.round(y0, 4), result["y0"], rtol=1e-4)
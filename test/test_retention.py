@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app import config
+from app.database.memory import MemoryClient
+from app.database.retention import TIME_INDEX, ensure_time_index, trim_collection
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def skip(self, n):
+        self.docs = self.docs[n:]
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class _Collection:
+    """Collection tối giản, chỉ đủ cho trim_collection"""
+
+    def __init__(self, n):
+        now = datetime.now()
+        self.docs = [{"_id": i, "time": now + timedelta(seconds=i)} for i in range(n)]
+
+    def find(self, query, projection):
+        return _Cursor(list(self.docs))
+
+    async def delete_many(self, query):
+        cutoff = query["time"]["$lt"]
+        kept = [doc for doc in self.docs if doc["time"] >= cutoff]
+        deleted = len(self.docs) - len(kept)
+        self.docs = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+
+@pytest.mark.asyncio
+async def test_trim_keeps_newest():
+    collection = _Collection(120)
+
+    assert await trim_collection(collection, 100) == 20
+    assert len(collection.docs) == 100
+    assert min(doc["_id"] for doc in collection.docs) == 20
+
+
+@pytest.mark.asyncio
+async def test_trim_under_limit_or_disabled():
+    collection = _Collection(10)
+
+    assert await trim_collection(collection, 100) == 0
+    assert await trim_collection(collection, 0) == 0
+    assert len(collection.docs) == 10
+
+
+@pytest.fixture
+def history(monkeypatch):
+    collection = MemoryClient()["regression"]["simple_model"]
+    commands = []
+
+    async def command(*args, **kwargs):
+        commands.append((args, kwargs))
+        return {"ok": 1}
+
+    monkeypatch.setattr(collection.database, "command", command)
+    return collection, commands
+
+
+async def _time_ttl(collection):
+    return (await collection.index_information())[TIME_INDEX].get("expireAfterSeconds")
+
+
+@pytest.mark.asyncio
+async def test_ttl_index_turned_on_changed_and_off(history, monkeypatch):
+    collection, commands = history
+
+    monkeypatch.setattr(config, "HISTORY_TTL_SECONDS", 0)
+    await ensure_time_index(collection)
+    assert await _time_ttl(collection) is None
+
+    # Index thường → TTL: xoá rồi tạo lại
+    monkeypatch.setattr(config, "HISTORY_TTL_SECONDS", 60)
+    await ensure_time_index(collection)
+    assert await _time_ttl(collection) == 60
+    assert commands == []
+
+    # Đổi thời gian sống: collMod, không tạo lại
+    monkeypatch.setattr(config, "HISTORY_TTL_SECONDS", 120)
+    await ensure_time_index(collection)
+    assert commands[0][0] == ("collMod", "simple_model")
+    assert commands[0][1]["index"]["expireAfterSeconds"] == 120
+
+    # Đặt lại về 0 khi đã có TTL index: bỏ TTL thay vì lỗi IndexOptionsConflict
+    monkeypatch.setattr(config, "HISTORY_TTL_SECONDS", 0)
+    await ensure_time_index(collection)
+    assert await _time_ttl(collection) is None
+    assert len(commands) == 1
@@ -0,0 +1,212 @@
+import os
+import threading
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+
+from app import config
+from app.database import get_simple_model_collection
+from app.database.memory import MemoryClient
+from app.router.session import router as session_router
+from app.utils.machine_learning.run_option import run_option_model
+from app.utils.machine_learning.run_session import (
+    append_session_model,
+    create_session_model,
+)
+from app.utils.machine_learning.session import DatasetSession, load_session
+from app.utils.machine_learning.session_store import (
+    TEST_FILE,
+    TRAIN_FILE,
+    delete_session,
+    session_lock,
+)
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(600, 3)) * [1, 10, 100] + [5, 50, 0]
+Y = X @ [3.0, -2.0, 0.5] + 7 + rng.normal(scale=0.5, size=600)
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", str(tmp_path / "registry"))
+    return tmp_path / "sessions"
+
+
+def _train_rows(session_id):
+    session = load_session(session_id)
+    rows = np.fromfile(f"{session.directory}/{TRAIN_FILE}").reshape(-1, 4)
+    return session, rows[:, :-1], rows[:, -1]
+
+
+@pytest.mark.parametrize("model_name", ["linear", "bayesian", "huber"])
+def test_models_without_cv_fit_two_rows(model_name):
+    # Mô hình không cross-validate không được đòi đủ dòng cho KFold(3)
+    X_two, Y_two = X[:2], Y[:2]
+
+    option = run_option_model(X_two, Y_two, None, model_name, random_state=0)
+    session = create_session_model(X_two, Y_two, None, "huber", random_state=0)
+
+    assert option["model_id"]
+    assert session["update"] == "full"
+
+
+@pytest.mark.parametrize("model_name", ["linear", "ridge", "bayesian"])
+def test_append_updates_from_sufficient_statistics(model_name):
+    created = create_session_model(X[:200], Y[:200], None, model_name, 0)
+    session_id = created["session_id"]
+
+    for start in range(200, 600, 100):
+        result = append_session_model(
+            session_id, X[start : start + 100], Y[start : start + 100], [[5, 50, 0]]
+        )
+
+    session, X_train, Y_train = _train_rows(session_id)
+    assert result["update"] == "incremental"
+    assert result["data_size"] == session.n_rows == 600
+    assert session.n_train + session.n_test == 600 and session.n_test > 0
+    assert result["r2_train"] == pytest.approx(
+        r2_score(Y_train, session.model.predict(X_train)), abs=1e-4
+    )
+    assert result["y0"][0] == pytest.approx(7 + 15 - 100, abs=1)
+    if model_name == "linear":
+        reference = LinearRegression().fit(X_train, Y_train)
+        np.testing.assert_allclose(session.model.coef_, reference.coef_, rtol=1e-8)
+
+
+def test_append_does_not_rescan_test_rows(monkeypatch):
+    created = create_session_model(X[:300], Y[:300], None, "ridge", 0)
+    scan = DatasetSession._scan
+
+    def no_test_scan(self, name, n_rows):
+        assert name != TEST_FILE, "append không được đọc lại test.f64"
+        return scan(self, name, n_rows)
+
+    monkeypatch.setattr(DatasetSession, "_scan", no_test_scan)
+    result = append_session_model(created["session_id"], X[300:], Y[300:])
+
+    session = load_session(created["session_id"])
+    rows = np.fromfile(f"{session.directory}/{TEST_FILE}").reshape(-1, 4)
+    Y_predicted = session.model.predict(rows[:, :-1])
+    assert result["r2_test"] == pytest.approx(
+        r2_score(rows[:, -1], Y_predicted), abs=1e-4
+    )
+    assert result["rmse_test"] == pytest.approx(
+        np.sqrt(mean_squared_error(rows[:, -1], Y_predicted)), abs=1e-4
+    )
+    assert 0 < result["mae"] < 1
+
+
+def test_appends_wait_for_session_lock():
+    created = create_session_model(X[:50], Y[:50], None, "linear", 0)
+    session_id = created["session_id"]
+    results = []
+
+    # Khoá giữa các process: một fd khác (như worker khác) giữ khoá
+    with session_lock(session_id):
+        worker = threading.Thread(
+            target=lambda: results.append(
+                append_session_model(session_id, X[50:60], Y[50:60])
+            )
+        )
+        worker.start()
+        worker.join(0.5)
+        assert worker.is_alive() and not results
+    worker.join(10)
+
+    assert results[0]["data_size"] == 60
+    delete_session(session_id)
+    with pytest.raises(KeyError):
+        append_session_model(session_id, X[:5], Y[:5])
+
+
+def test_other_models_refit_on_all_rows():
+    created = create_session_model(X[:100], Y[:100], None, "decision_tree", 0)
+
+    result = append_session_model(created["session_id"], X[100:300], Y[100:300])
+
+    session, X_train, _ = _train_rows(created["session_id"])
+    assert created["update"] == result["update"] == "full"
+    assert session.model.best_estimator_.n_features_in_ == 3
+    assert X_train.shape[0] == session.n_train
+    assert result["r2_test"] > 0.5
+
+
+def test_append_rejects_unknown_session_and_wrong_columns():
+    created = create_session_model(X[:50], Y[:50], None, "linear", 0)
+
+    with pytest.raises(KeyError):
+        append_session_model("0" * 32, X[:5], Y[:5])
+    with pytest.raises(KeyError):
+        append_session_model("../x", X[:5], Y[:5])
+    with pytest.raises(ValueError, match="Số cột"):
+        append_session_model(created["session_id"], X[:5, :2], Y[:5])
+
+
+def test_least_recently_used_sessions_are_evicted(session_dir, monkeypatch):
+    monkeypatch.setattr(config, "SESSION_MAX_ENTRIES", 2)
+
+    for _ in range(3):
+        create_session_model(X[:20], Y[:20], None, "linear", 0)
+
+    assert len(list(session_dir.iterdir())) == 2
+
+
+def test_failed_create_leaves_no_data(session_dir, monkeypatch):
+    def broken_fit(self):
+        raise RuntimeError("boom")
+
+    fit = DatasetSession.fit
+    create_session_model(X[:20], Y[:20], None, "linear", 0)
+    monkeypatch.setattr(DatasetSession, "fit", broken_fit)
+    with pytest.raises(RuntimeError):
+        create_session_model(X[:20], Y[:20], None, "linear", 0)
+    assert len(list(session_dir.iterdir())) == 1
+
+    # Thư mục không có file trạng thái (vd: tiến trình chết giữa chừng) vẫn bị
+    # xoá khi vượt giới hạn
+    monkeypatch.setattr(DatasetSession, "fit", fit)
+    monkeypatch.setattr(config, "SESSION_MAX_ENTRIES", 1)
+    orphan = session_dir / ("0" * 32)
+    orphan.mkdir()
+    os.utime(orphan, (0, 0))
+    create_session_model(X[:20], Y[:20], None, "linear", 0)
+    assert not orphan.exists()
+
+
+@pytest.mark.asyncio
+async def test_session_endpoints():
+    collection = MemoryClient()["regression"]["simple_model"]
+    app = FastAPI()
+    app.include_router(session_router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        created = await client.post(
+            "/sessions/",
+            json={"X_array": X[:100].tolist(), "Y_array": Y[:100].tolist()},
+        )
+        session_id = created.json()["session_id"]
+        appended = await client.post(
+            f"/sessions/{session_id}/append",
+            json={"X_array": X[100:150].tolist(), "Y_array": Y[100:150].tolist()},
+        )
+        latest = await client.get(f"/sessions/{session_id}")
+        deleted = await client.delete(f"/sessions/{session_id}")
+        missing = await client.post(
+            f"/sessions/{session_id}/append",
+            json={"X_array": [[1, 2, 3]], "Y_array": [1]},
+        )
+
+    assert created.status_code == 201
+    assert created.headers["Location"].endswith(session_id)
+    assert appended.json()["data_size"] == 150
+    assert latest.json() == appended.json()
+    assert deleted.status_code == 204
+    assert missing.status_code == 404
+    assert await collection.count_documents({}) == 2
@@ -0,0 +1,86 @@
+import numpy as np
+from sklearn.ensemble import (
+    GradientBoostingRegressor,
+    StackingRegressor,
+    VotingRegressor,
+)
+from sklearn.linear_model import ElasticNet
+from sklearn.tree import DecisionTreeRegressor
+
+from app.utils.machine_learning.classify import classify, classify_stats
+from app.utils.machine_learning.run_stack_model import (
+    StackPredictor,
+    VotingEnsemble,
+    fit_stacking,
+)
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(120, 4))
+Y = X @ np.array([1.0, -2.0, 0.5, 3.0]) + np.sin(X[:, 0]) * 2
+
+
+def _estimators():
+    return [
+        ("elastic", ElasticNet(alpha=1, l1_ratio=0.5, random_state=42)),
+        ("decision_tree", DecisionTreeRegressor(random_state=42)),
+    ]
+
+
+def test_shared_fits_match_sklearn_ensembles():
+    final = GradientBoostingRegressor(n_estimators=20, random_state=42)
+    stacking = StackingRegressor(_estimators(), final_estimator=final, cv=4).fit(X, Y)
+    voting = VotingRegressor(_estimators()).fit(X, Y)
+
+    base = [(name, model.fit(X, Y)) for name, model in _estimators()]
+    shared_stacking = fit_stacking(base, final, X, Y, 4)
+    shared_voting = VotingEnsemble(base)
+
+    assert np.array_equal(shared_stacking.predict(X), stacking.predict(X))
+    assert np.array_equal(shared_voting.predict(X), voting.predict(X))
+
+
+def test_base_models_are_not_refitted():
+    base = [(name, model.fit(X, Y)) for name, model in _estimators()]
+    tree = base[1][1]
+    fit_stacking(base, GradientBoostingRegressor(n_estimators=5), X, Y, 3)
+
+    # Mô hình cơ sở giữ nguyên (chỉ các bản clone được fit trên từng fold)
+    assert base[1][1] is tree
+    assert (
+        tree.tree_.node_count
+        == DecisionTreeRegressor(random_state=42).fit(X, Y).tree_.node_count
+    )
+
+
+def test_classify_labels():
+    stats = classify_stats(X)
+    Q1, Q2, Q3, _ = stats
+    far = Q3 + 100
+
+    x0 = np.array([Q2, Q1, far, np.concatenate([Q2[:1], far[1:]])])
+    assert classify(None, x0, stats=stats) == [
+        "stacking",
+        "voting",
+        "elastic",
+        "voting",
+    ]
+
+
+def test_stack_predictor_groups_rows_by_label():
+    base = [(name, model.fit(X, Y)) for name, model in _estimators()]
+    predictor = StackPredictor(
+        classify_stats(X),
+        fit_stacking(base, GradientBoostingRegressor(n_estimators=5), X, Y, 3),
+        VotingEnsemble(base),
+        base[1][1],
+        base[0][1],
+    )
+    x0 = rng.normal(size=(50, 4)) * 2
+
+    labels = classify(None, x0, stats=predictor.stats)
+    expected = [
+        predictor.models[label].predict(row.reshape(1, -1))[0]
+        for label, row in zip(labels, x0)
+    ]
+    assert len(set(labels)) > 1
+    assert np.allclose(predictor.predict(x0), expected, rtol=1e-12)
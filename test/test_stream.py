@@ -0,0 +1,166 @@
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+
+from app import config
+from app.database import get_simple_model_collection
+from app.database.memory import MemoryClient
+from app.middleware import EnforceContentTypeMiddleware
+from app.router.stream import router as stream_router
+from app.utils.machine_learning.data_preprocessing import (
+    holdout_fraction,
+    splitting_data,
+)
+from app.utils.machine_learning.linear_path import RunningGram
+from app.utils.machine_learning.run_stream import run_stream_model
+from app.utils.machine_learning.streaming import (
+    RunningMetrics,
+    csv_to_binary,
+    read_chunks,
+)
+
+
+def _data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3)) * [1, 10, 100] + [5, 50, 0]
+    Y = X @ [3.0, -2.0, 0.5] + 7 + rng.normal(scale=0.5, size=n)
+    return X, Y
+
+
+def _csv(tmp_path, X, Y, name="data.csv"):
+    path = tmp_path / name
+    np.savetxt(path, np.column_stack([X, Y]), delimiter=",")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STREAM_CHUNK_ROWS", 64)
+    monkeypatch.setattr(config, "STREAM_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "MODEL_REGISTRY_DIR", str(tmp_path / "registry"))
+
+
+def test_splitting_data_uses_holdout_fraction():
+    X, Y = _data(200)
+
+    X_train, X_test, _, _ = splitting_data(X, Y, random_state=0)
+
+    assert holdout_fraction(5) is None
+    assert holdout_fraction(50) == 0.1
+    assert X_test.shape[0] == round(200 * holdout_fraction(200))
+    assert X_train.shape[0] + X_test.shape[0] == 200
+
+
+def test_running_stats_match_full_batch():
+    X, Y = _data(500)
+    Y_predicted = Y + np.random.default_rng(1).normal(size=500)
+    gram, metrics = RunningGram(), RunningMetrics()
+
+    for start in range(0, 500, 64):
+        gram.add(X[start : start + 64], Y[start : start + 64])
+        metrics.add(Y[start : start + 64], Y_predicted[start : start + 64])
+
+    coef, intercept = gram.solve()
+    reference = LinearRegression().fit(X, Y)
+    np.testing.assert_allclose(coef, reference.coef_, rtol=1e-8)
+    assert intercept == pytest.approx(reference.intercept_, rel=1e-8)
+    assert metrics.rmse == pytest.approx(root_mean_squared_error(Y, Y_predicted))
+    assert metrics.mae == pytest.approx(mean_absolute_error(Y, Y_predicted))
+    assert metrics.r2 == pytest.approx(r2_score(Y, Y_predicted))
+
+
+def test_csv_to_binary_moves_target_and_splits_the_same_way(tmp_path):
+    X, Y = _data(300)
+    source = tmp_path / "target_first.csv"
+    np.savetxt(source, np.column_stack([Y, X]), delimiter=",", header="y,a,b,c")
+    data = str(tmp_path / "data.f64")
+
+    n_samples, n_features = csv_to_binary(str(source), data, 0, True, 64)
+
+    assert (n_samples, n_features) == (300, 3)
+    first = list(read_chunks(data, 3, 64, seed=7, fraction=0.2))
+    second = list(read_chunks(data, 3, 64, seed=7, fraction=0.2))
+    X_train = np.vstack([chunk[0] for chunk in first])
+    Y_test = np.concatenate([chunk[3] for chunk in first])
+    np.testing.assert_array_equal(X_train, np.vstack([c[0] for c in second]))
+    assert X_train.shape[0] + Y_test.shape[0] == 300
+    assert 0 < Y_test.shape[0] < 300
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        ("1,2\n3,x\n", "could not convert"),
+        ("1,2\n3,\n", "không hữu hạn"),
+        ("1\n2\n", "ít nhất 2 cột"),
+        ("", "không có dữ liệu"),
+    ],
+)
+def test_csv_to_binary_rejects_bad_input(tmp_path, content, message):
+    source = tmp_path / "bad.csv"
+    source.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        csv_to_binary(str(source), str(tmp_path / "bad.f64"))
+
+
+@pytest.mark.parametrize("model_name", ["linear", "sgd", "passive_aggressive"])
+def test_run_stream_model_learns_and_cleans_up(tmp_path, model_name):
+    X, Y = _data(2000)
+    source = _csv(tmp_path, X, Y)
+
+    result = run_stream_model(source, model_name, x0=[[5, 50, 0]], random_state=0)
+
+    assert result["data_size"] == 2000
+    assert result["data_size_label"] == "big"
+    assert result["r2_test"] > 0.99
+    assert result["y0"][0] == pytest.approx(7 + 15 - 100, abs=1)
+    assert result["model_id"] is not None
+    assert list(tmp_path.glob("data.csv*")) == []
+
+
+def test_run_stream_model_rejects_mismatched_x0(tmp_path):
+    X, Y = _data(50)
+    source = _csv(tmp_path, X, Y)
+
+    with pytest.raises(ValueError, match="x0"):
+        run_stream_model(source, "linear", x0=[[1, 2]])
+
+    assert list(tmp_path.glob("data.csv*")) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_accepts_chunked_csv(tmp_path):
+    collection = MemoryClient()["regression"]["simple_model"]
+    app = FastAPI()
+    app.add_middleware(EnforceContentTypeMiddleware)
+    app.include_router(stream_router)
+    app.dependency_overrides[get_simple_model_collection] = lambda: collection
+
+    X, Y = _data(300)
+    body = open(_csv(tmp_path, X, Y, name="upload.csv"), "rb").read()
+
+    async def chunks():
+        for start in range(0, len(body), 1000):
+            yield body[start : start + 1000]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        response = await client.post(
+            "/stream/?model=linear&x0=5,50,0&random_state=1",
+            content=chunks(),
+            headers={"Content-Type": "text/csv"},
+        )
+        invalid = await client.post(
+            "/stream/", content=b"1,a\n", headers={"Content-Type": "text/csv"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["model"] == "linear"
+    assert response.json()["r2_train"] > 0.99
+    assert await collection.count_documents({}) == 1
+    assert invalid.status_code == 422
+    assert list(tmp_path.glob("stream-*")) == []
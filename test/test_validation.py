@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import InputBestModelData, InputOptionData, InputStackModelData
+
+X = [[50, 1], [60, 2], [70, 2], [80, 3], [90, 3], [100, 4]]
+Y = [150_000, 180_000, 200_000, 220_000, 250_000, 280_000]
+
+SCHEMAS = [InputOptionData, InputBestModelData, InputStackModelData]
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_lists_become_arrays(schema):
+    data = schema.model_validate({"X_array": X, "Y_array": Y, "x0": [[85, 3]]})
+
+    assert isinstance(data.X_array, np.ndarray)
+    assert data.X_array.shape == (6, 2)
+    assert data.Y_array.shape == (6,)
+    assert data.x0.shape == (1, 2)
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_vector_becomes_column(schema):
+    data = schema.model_validate({"X_array": Y, "Y_array": Y, "x0": [1.0]})
+
+    assert data.X_array.shape == (6, 1)
+    assert data.x0.shape == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"X_array": [[1, 2], [3]], "Y_array": [1, 2]},  # hàng lệch
+        {"X_array": [[1, "a"], [3, 4]], "Y_array": [1, 2]},  # không phải số
+        {"X_array": [[1, None], [3, 4]], "Y_array": [1, 2]},
+        {"X_array": [[1, float("nan")], [3, 4]], "Y_array": [1, 2]},
+        {"X_array": [], "Y_array": []},
+        {"X_array": X, "Y_array": Y[:3]},  # số hàng không khớp
+        {"X_array": X, "Y_array": Y, "x0": [[1, 2, 3]]},  # số cột không khớp
+        {"X_array": X, "Y_array": [[1, 2]] * 6},  # Y không phải vector
+    ],
+)
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_invalid_payloads(schema, payload):
+    payload = {"x0": None, **payload}
+    with pytest.raises(ValidationError):
+        schema.model_validate(payload)